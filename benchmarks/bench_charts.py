@@ -0,0 +1,91 @@
+# benchmarks/bench_charts.py
+"""Chart build time and Plotly payload size for large results, full-resolution vs downsampled.
+
+"full" passes row dicts and disables every threshold, which is what the
+browser received before downsampling. "columnar" passes the QueryResult
+with the configured ChartConfig thresholds. Both include serializing the
+figure to JSON, which Gradio does for every chart.
+
+Usage:
+    python -m benchmarks.bench_charts --scale 10
+    python -m benchmarks.bench_charts --scale 100 --output benchmarks/results/charts.json
+"""
+
+from typing import Any, Dict
+import argparse
+import json
+import os
+import sys
+import time
+from config.config import ChartConfig
+from src.database.backends import DuckDBBackend
+from src.visualization.chart_generator import ChartGenerator, payload_bytes
+from . import datasets
+
+CASES = [
+    ("order amounts over time", "line",
+     "SELECT o.occurred_at, o.total_amt_usd FROM orders o"),
+    ("web events per minute", "line",
+     "SELECT DATE_TRUNC('minute', w.occurred_at) AS minute, COUNT(*) AS events FROM web_events w GROUP BY 1"),
+    ("revenue by account", "bar",
+     "SELECT a.name, SUM(o.total_amt_usd) AS revenue FROM orders o JOIN accounts a ON a.id = o.account_id "
+     "GROUP BY a.name"),
+    ("orders per day", "bar",
+     "SELECT CAST(o.occurred_at AS DATE) AS day, COUNT(*) AS order_count FROM orders o GROUP BY 1"),
+    ("quantity vs amount", "scatter",
+     "SELECT o.standard_qty, o.total_amt_usd FROM orders o"),
+]
+THRESHOLDS = ("MAX_LINE_POINTS", "MAX_BAR_CATEGORIES", "MAX_SCATTER_SVG_POINTS", "MAX_SCATTER_POINTS")
+
+def render(generator: ChartGenerator, data, chart_type: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    fig = generator.generate_chart(data, chart_type)
+    built = time.perf_counter()
+    size = payload_bytes(fig)
+    return {
+        "build_ms": (built - start) * 1000,
+        "total_ms": (time.perf_counter() - start) * 1000,
+        "payload_kb": size / 1024,
+        "trace": fig.data[0].type,
+    }
+
+def run_case(generator: ChartGenerator, result, chart_type: str) -> Dict[str, Any]:
+    defaults = {name: getattr(ChartConfig, name) for name in THRESHOLDS}
+    try:
+        for name in THRESHOLDS:
+            setattr(ChartConfig, name, sys.maxsize)
+        full = render(generator, result.to_dicts(), chart_type)
+    finally:
+        for name, value in defaults.items():
+            setattr(ChartConfig, name, value)
+    return {"rows": len(result), "full": full, "columnar": render(generator, result, chart_type)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=10, help="dataset scale (see benchmarks/datasets.py)")
+    parser.add_argument("--dump", default=datasets.DEFAULT_DUMP)
+    parser.add_argument("--data-dir", default=datasets.DEFAULT_DATA_DIR)
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    backend = DuckDBBackend(datasets.build_duckdb(args.scale, args.dump, args.data_dir), statement_timeout_ms=0)
+    generator = ChartGenerator()
+    generator.warm_up()
+    report = {"benchmark": "charts", "scale": args.scale, "cases": {}}
+    for name, chart_type, sql in CASES:
+        result = backend.execute(sql, max_rows=10_000_000)
+        case = report["cases"][name] = run_case(generator, result, chart_type)
+        for mode in ("full", "columnar"):
+            stats = case[mode]
+            print(
+                f"{name:>24} {mode:>8}: rows={case['rows']:>8,} {stats['trace']:>11} "
+                f"build={stats['build_ms']:8.1f}ms build+json={stats['total_ms']:8.1f}ms "
+                f"payload={stats['payload_kb']:9.1f} KiB"
+            )
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+if __name__ == "__main__":
+    main()
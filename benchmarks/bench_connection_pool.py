@@ -0,0 +1,69 @@
+# benchmarks/bench_connection_pool.py
+"""Per-query latency with and without the shared connection pool.
+
+Usage:
+    python -m benchmarks.bench_connection_pool --iterations 500 --threads 8
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+import psycopg2
+from config.config import DatabaseConfig
+from src.database.connection_pool import ConnectionPool
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean_ms": statistics.mean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[int(len(ordered) * 0.95) - 1] * 1000,
+        "max_ms": ordered[-1] * 1000
+    }
+
+def run(fn: Callable[[], None], iterations: int, threads: int) -> List[float]:
+    def timed(_):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(timed, range(iterations)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--query", default="SELECT COUNT(*) FROM region")
+    args = parser.parse_args()
+
+    db_config = DatabaseConfig.get_db_config()
+
+    def direct():
+        conn = psycopg2.connect(**db_config)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(args.query)
+                cur.fetchall()
+        finally:
+            conn.close()
+
+    pool = ConnectionPool(db_config, max_size=max(args.threads, DatabaseConfig.POOL_MIN_SIZE))
+
+    def pooled():
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(args.query)
+                cur.fetchall()
+
+    pooled()  # open the first connection outside the measurement
+    for name, fn in (("direct", direct), ("pooled", pooled)):
+        stats = summarize(run(fn, args.iterations, args.threads))
+        print(f"{name:>7}: " + ", ".join(f"{k}={v:.2f}" for k, v in stats.items()))
+    print(f"pool stats: {pool.stats}")
+    pool.close()
+
+if __name__ == "__main__":
+    main()
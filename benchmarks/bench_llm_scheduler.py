@@ -0,0 +1,117 @@
+# benchmarks/bench_llm_scheduler.py
+"""SQL generation latency when the model is the bottleneck, with and without single-flight and the LLM scheduler.
+
+StubLLM stands in for Ollama with a fixed number of parallel streams (extra
+requests wait in arrival order, as they do on the server). Two scenarios:
+
+* burst: many users ask the same question at once (a shared dashboard link);
+  compared with in-flight deduplication off and on.
+* mixed: a batch job queues many questions while interactive users keep
+  arriving; compared with the scheduler off (every call goes straight to the
+  server queue) and on (at most ``--parallel`` calls, interactive first).
+
+Caches are disabled so every call that is not coalesced reaches the model.
+
+Usage:
+    python -m benchmarks.bench_llm_scheduler
+    python -m benchmarks.bench_llm_scheduler --parallel 2 --llm-latency 0.5 --output benchmarks/results/llm_scheduler.json
+"""
+
+from typing import Any, Dict
+import argparse
+import asyncio
+import json
+import os
+import time
+from src.llm.llm_handler import LLMHandler
+from src.llm.query_cache import QueryCache
+from src.llm.scheduler import LLMScheduler, SingleFlight, set_llm_priority
+from .stats import summarize
+from .stub_llm import QUESTIONS, StubLLM
+
+def configure(llm_handler: LLMHandler, latency: float, parallel: int, limit: int, single_flight: bool) -> StubLLM:
+    stub = StubLLM(latency=latency, parallel=parallel)
+    llm_handler.query_generator.llm = stub
+    llm_handler.query_generator.scheduler = LLMScheduler(limit=limit)
+    llm_handler.in_flight = SingleFlight() if single_flight else None
+    return stub
+
+async def burst(llm_handler: LLMHandler, users: int) -> Dict[str, Any]:
+    latencies = []
+
+    async def user():
+        start = time.perf_counter()
+        await llm_handler.agenerate_sql_query(QUESTIONS[0])
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(user() for _ in range(users)))
+    return summarize(latencies)
+
+async def mixed(llm_handler: LLMHandler, batch_size: int, users: int, interval: float) -> Dict[str, Any]:
+    latencies = {"interactive": [], "batch": []}
+
+    async def ask(question: str, priority: str):
+        set_llm_priority(priority)
+        start = time.perf_counter()
+        await llm_handler.agenerate_sql_query(question)
+        latencies[priority].append(time.perf_counter() - start)
+
+    async def interactive():
+        tasks = []
+        for i in range(users):
+            tasks.append(asyncio.create_task(ask(f"{QUESTIONS[i % len(QUESTIONS)]} for user {i}", "interactive")))
+            await asyncio.sleep(interval)
+        await asyncio.gather(*tasks)
+
+    start = time.perf_counter()
+    batch = [ask(f"{QUESTIONS[i % len(QUESTIONS)]} batch item {i}", "batch") for i in range(batch_size)]
+    await asyncio.gather(interactive(), *batch)
+    return {
+        "interactive": summarize(latencies["interactive"]),
+        "batch": summarize(latencies["batch"]),
+        "seconds": time.perf_counter() - start,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--parallel", type=int, default=2, help="streams the stub model serves at once")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per stub completion")
+    parser.add_argument("--burst-users", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=40, help="batch questions queued at the start")
+    parser.add_argument("--users", type=int, default=20, help="interactive questions in the mixed scenario")
+    parser.add_argument("--interval", type=float, default=0.25, help="seconds between interactive arrivals")
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    llm_handler = LLMHandler()
+    llm_handler.query_cache = QueryCache(max_entries=0, path="")
+    report: Dict[str, Any] = {"benchmark": "llm_scheduler", "parallel": args.parallel, "llm_latency": args.llm_latency}
+
+    for single_flight in (False, True):
+        stub = configure(llm_handler, args.llm_latency, args.parallel, args.parallel, single_flight)
+        result = asyncio.run(burst(llm_handler, args.burst_users))
+        result["model_calls"] = stub.calls
+        report[f"burst_single_flight_{'on' if single_flight else 'off'}"] = result
+        print(
+            f"burst x{args.burst_users} single-flight {'on ' if single_flight else 'off'}: "
+            f"model calls={stub.calls:>3}  p50={result['p50_ms']:7.0f}ms  p95={result['p95_ms']:7.0f}ms"
+        )
+
+    for limit, label in ((0, "off"), (args.parallel, "on")):
+        configure(llm_handler, args.llm_latency, args.parallel, limit, True)
+        result = asyncio.run(mixed(llm_handler, args.batch_size, args.users, args.interval))
+        result["queue"] = llm_handler.query_generator.scheduler.get_stats()
+        report[f"mixed_scheduler_{label}"] = result
+        print(
+            f"mixed scheduler {label:<3}: interactive p50={result['interactive']['p50_ms']:6.0f}ms "
+            f"p95={result['interactive']['p95_ms']:6.0f}ms  batch p95={result['batch']['p95_ms']:6.0f}ms  "
+            f"total {result['seconds']:.1f}s  max queue wait {result['queue']['max_wait_seconds']:.2f}s"
+        )
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_load.py
+"""Requests/sec of the async DataAnalysisApp.process_query under concurrent users.
+
+The Ollama model is replaced by StubLLM so the numbers reflect the pipeline
+itself; queries still run against the configured database.
+
+Usage:
+    python -m benchmarks.bench_load --users 1 8 32 --requests-per-user 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from config.config import CacheConfig
+from main import DataAnalysisApp
+from src.llm.llm_handler import LLMHandler
+from src.llm.query_cache import QueryCache
+from .stub_llm import QUESTIONS, StubLLM
+
+async def run_level(app: DataAnalysisApp, users: int, requests_per_user: int):
+    latencies = []
+    errors = 0
+
+    async def user(user_id: int):
+        nonlocal errors
+        for i in range(requests_per_user):
+            question = QUESTIONS[(user_id + i) % len(QUESTIONS)]
+            start = time.perf_counter()
+            chart, message = await app.process_query(question, "bar")
+            latencies.append(time.perf_counter() - start)
+            if chart is None and message and "error" in message.lower():
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(user_id) for user_id in range(users)))
+    elapsed = time.perf_counter() - start
+    ordered = sorted(latencies)
+    print(
+        f"users={users:>3}: {len(ordered) / elapsed:7.2f} req/s, "
+        f"p50={ordered[len(ordered) // 2] * 1000:.0f}ms "
+        f"p95={ordered[int(len(ordered) * 0.95) - 1] * 1000:.0f}ms "
+        f"mean={statistics.mean(ordered) * 1000:.0f}ms errors={errors}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests-per-user", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per stub completion")
+    parser.add_argument("--with-cache", action="store_true", help="keep question caches enabled")
+    args = parser.parse_args()
+
+    if not args.with_cache:
+        # Read when the semantic cache is created, so it never matches without loading the model here.
+        CacheConfig.SEMANTIC_CACHE_THRESHOLD = float("inf")
+    llm_handler = LLMHandler()
+    llm_handler.query_generator.llm = StubLLM(latency=args.llm_latency)
+    if not args.with_cache:
+        llm_handler.query_cache = QueryCache(max_entries=0, path="")
+    app = DataAnalysisApp(llm_handler=llm_handler)
+
+    for users in args.users:
+        asyncio.run(run_level(app, users, args.requests_per_user))
+
+if __name__ == "__main__":
+    main()
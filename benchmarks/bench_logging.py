@@ -0,0 +1,108 @@
+# benchmarks/bench_logging.py
+"""Caller-side logging cost per request: synchronous full-payload logging vs the queue pipeline.
+
+Each simulated request emits the records the pipeline produces: the schema
+text, the LLM response and a handful of short status lines. "legacy" is the
+old setup (basicConfig with FileHandler + StreamHandler, full payloads at
+INFO); "queue" is Logger.setup_logging with truncated/sampled payloads.
+
+Usage:
+    python -m benchmarks.bench_logging --requests 2000 --threads 8
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from .stats import percentile
+from .stub_llm import QUESTIONS, StubLLM
+
+def schema_text() -> str:
+    from benchmarks import datasets
+    from src.database.backends import DuckDBBackend
+    from src.database.schema_cache import SchemaCache
+
+    backend = DuckDBBackend(datasets.build_duckdb(1), statement_timeout_ms=0)
+    return SchemaCache({}, backend=backend).get_snapshot().to_prompt_text()
+
+def run_mode(mode: str, requests: int, threads: int, log_dir: str):
+    schema = schema_text()
+    responses = [StubLLM().respond(f"User Query: {question}") for question in QUESTIONS]
+    # Keep console output out of the terminal; both modes still pay for the console handler.
+    sys.stderr = open(os.devnull, "w")
+
+    if mode == "legacy":
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            handlers=[logging.FileHandler(os.path.join(log_dir, "app.log")), logging.StreamHandler()]
+        )
+    else:
+        from config.config import LogConfig
+        from src.utils.logger import Logger
+
+        LogConfig.LOG_DIR = log_dir
+        Logger.setup_logging()
+    from src.utils.logger import log_payload, reset_request_id, set_request_id
+
+    logger = logging.getLogger("src.llm.query_generator")
+
+    def request(index: int) -> float:
+        token = set_request_id(f"bench{index}")
+        response = responses[index % len(responses)]
+        start = time.perf_counter()
+        logger.info("Query cache miss")
+        if mode == "legacy":
+            logging.info(f"Retrieved schema information:\n{schema}")
+        else:
+            log_payload(logger, "Schema for prompt", schema)
+        logger.info("LLM stream finished after 20 chunks (stopped at end marker)")
+        if mode == "legacy":
+            logging.info(f"LLM Response: {response}")
+        else:
+            log_payload(logger, "LLM response", response)
+        logger.info("Query estimate cost=512 rows=4; actual 3.1 ms, 4 rows")
+        elapsed = time.perf_counter() - start
+        reset_request_id(token)
+        return elapsed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(request, range(requests)))
+    wall = time.perf_counter() - start
+    if mode == "queue":
+        Logger.shutdown()
+    log_bytes = sum(os.path.getsize(os.path.join(log_dir, name)) for name in os.listdir(log_dir))
+    print(
+        f"{mode:>6}: p50={percentile(latencies, 50) * 1e6:7.1f}us "
+        f"p99={percentile(latencies, 99) * 1e6:7.1f}us "
+        f"total={wall:.2f}s log={log_bytes / 1024:.0f} KiB",
+        file=sys.__stdout__
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--mode", choices=["legacy", "queue"], help="run a single mode in this process")
+    args = parser.parse_args()
+
+    if args.mode:
+        with tempfile.TemporaryDirectory() as log_dir:
+            run_mode(args.mode, args.requests, args.threads, log_dir)
+        return
+
+    # Logging setup is process-wide, so each mode runs in a fresh interpreter.
+    for mode in ("legacy", "queue"):
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_logging", "--mode", mode,
+             "--requests", str(args.requests), "--threads", str(args.threads)],
+            check=True
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# benchmarks/bench_pipeline.py
+"""Per-stage latency, throughput and memory of DataAnalysisApp.process_query.
+
+OllamaLLM is replaced by the deterministic StubLLM, and the pipeline runs
+against local databases with ``orders``/``web_events`` at 1x, 10x and 100x
+(see benchmarks/datasets.py). Results are written as JSON so runs can be
+compared across commits.
+
+Usage:
+    python -m benchmarks.bench_pipeline --backend duckdb --scales 1 10 100
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/<previous>.json
+"""
+
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import functools
+import inspect
+import json
+import os
+import resource
+import subprocess
+import time
+import tracemalloc
+from config.config import CacheConfig, DatabaseConfig
+from main import DataAnalysisApp
+from src.database.backends import DuckDBBackend, PostgresBackend
+from src.database.db_manager import DatabaseManager
+from src.database.result_cache import ResultCache
+from src.database.schema_cache import SchemaCache
+from src.llm.llm_handler import LLMHandler
+from src.llm.query_cache import QueryCache
+from . import datasets
+from .stats import summarize
+from .stub_llm import QUESTIONS, StubLLM
+
+STAGES = ("schema", "prompt", "llm", "sql", "chart", "total")
+LINE_CHART_WORDS = ("trend", "daily", "monthly")
+
+class StageRecorder:
+    """Wraps component methods on their instances and collects call durations per stage."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    def reset(self):
+        for samples in self.samples.values():
+            samples.clear()
+
+    def wrap(self, obj, method: str, stage: str):
+        original = getattr(obj, method)
+        samples = self.samples[stage]
+
+        if inspect.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    samples.append(time.perf_counter() - start)
+        else:
+            @functools.wraps(original)
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    samples.append(time.perf_counter() - start)
+        setattr(obj, method, timed)
+
+    def instrument(self, app: DataAnalysisApp):
+        generator = app.llm_handler.query_generator
+        self.wrap(generator.schema_cache, "get_snapshot", "schema")
+        self.wrap(generator, "build_prompt", "prompt")
+        self.wrap(generator, "_astream_response", "llm")
+        self.wrap(app.db_manager, "execute_query_columnar", "sql")
+        self.wrap(app.chart_generator, "generate_chart", "chart")
+        self.wrap(app, "process_query", "total")
+
+
+def make_backend(backend: str, target: str):
+    if backend == "duckdb":
+        return DuckDBBackend(target)
+    return PostgresBackend({**DatabaseConfig.get_db_config(), "dbname": target})
+
+def make_app(llm_handler: LLMHandler, backend, with_cache: bool) -> DataAnalysisApp:
+    llm_handler.query_generator.schema_cache = SchemaCache({}, backend=backend)
+    db_manager = DatabaseManager(backend=backend)
+    if not with_cache:
+        db_manager.result_cache = ResultCache(max_bytes=0)
+    return DataAnalysisApp(db_manager=db_manager, llm_handler=llm_handler)
+
+async def run_requests(app: DataAnalysisApp, requests: int, concurrency: int) -> Dict[str, Any]:
+    slots = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(index: int):
+        nonlocal errors
+        question = QUESTIONS[index % len(QUESTIONS)]
+        chart_type = "line" if any(word in question.lower() for word in LINE_CHART_WORDS) else "bar"
+        async with slots:
+            _, message = await app.process_query(question, chart_type)
+        if message and message.startswith(("Error", "Database error", "Query rejected")):
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return {"requests": requests, "errors": errors, "wall_seconds": time.perf_counter() - start}
+
+def run_scale(app: DataAnalysisApp, recorder: StageRecorder, args) -> Dict[str, Any]:
+    asyncio.run(run_requests(app, len(QUESTIONS) * args.warmup, args.concurrency))
+    recorder.reset()
+    if args.trace_memory:
+        tracemalloc.start()
+    run = asyncio.run(run_requests(app, args.requests, args.concurrency))
+    traced_peak = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+    if args.trace_memory:
+        tracemalloc.stop()
+
+    return {
+        **run,
+        "throughput_rps": run["requests"] / run["wall_seconds"],
+        "stages": {stage: summarize(samples) for stage, samples in recorder.samples.items()},
+        # ru_maxrss is a process high-water mark (KiB on Linux), so it only grows across scales.
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "traced_peak_mb": traced_peak / 1024 / 1024 if traced_peak is not None else None,
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_report(report: Dict[str, Any], previous: Dict[str, Any] = None):
+    for scale, result in report["scales"].items():
+        print(
+            f"\n{scale}x: {result['throughput_rps']:.2f} req/s, {result['requests']} requests, "
+            f"{result['errors']} errors, max RSS {result['max_rss_mb']:.0f} MB"
+            + (f", traced peak {result['traced_peak_mb']:.1f} MB" if result["traced_peak_mb"] is not None else "")
+        )
+        old_stages = ((previous or {}).get("scales", {}).get(scale) or {}).get("stages", {})
+        for stage, stats in result["stages"].items():
+            line = (
+                f"  {stage:>7}: calls={stats['calls']:>5} p50={stats['p50_ms']:8.1f}ms "
+                f"p95={stats['p95_ms']:8.1f}ms p99={stats['p99_ms']:8.1f}ms"
+            )
+            old = old_stages.get(stage)
+            if old and old["p50_ms"]:
+                line += f"  (p50 {(stats['p50_ms'] / old['p50_ms'] - 1) * 100:+.0f}% vs {previous['commit']})"
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["duckdb", "postgres"], default=DatabaseConfig.DB_BACKEND)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--requests", type=int, default=70, help="measured requests per scale")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured passes over the question set")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per stub completion")
+    parser.add_argument("--with-cache", action="store_true", help="keep question and result caches enabled")
+    parser.add_argument("--trace-memory", action="store_true", help="report tracemalloc peaks (slower)")
+    parser.add_argument("--dump", default=datasets.DEFAULT_DUMP)
+    parser.add_argument("--data-dir", default=datasets.DEFAULT_DATA_DIR)
+    parser.add_argument("--output", help="JSON report path (default: benchmarks/results/...)")
+    parser.add_argument("--compare", help="previous JSON report to diff against")
+    args = parser.parse_args()
+
+    targets = {factor: datasets.build(args.backend, factor, args.dump, args.data_dir) for factor in args.scales}
+    # The handler warms its own schema cache on construction, so point the
+    # default configuration at the first dataset before building it.
+    DatabaseConfig.DB_BACKEND = args.backend
+    if args.backend == "duckdb":
+        DatabaseConfig.DUCKDB_PATH = targets[args.scales[0]]
+
+    if not args.with_cache:
+        # Read when the semantic cache is created, so it never matches without loading the model here.
+        CacheConfig.SEMANTIC_CACHE_THRESHOLD = float("inf")
+    llm_handler = LLMHandler()
+    llm_handler.query_generator.llm = StubLLM(latency=args.llm_latency)
+    if not args.with_cache:
+        llm_handler.query_cache = QueryCache(max_entries=0, path="")
+
+    commit = git_commit()
+    report = {
+        "benchmark": "pipeline",
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "scales": {},
+    }
+    for factor, target in targets.items():
+        app = make_app(llm_handler, make_backend(args.backend, target), args.with_cache)
+        recorder = StageRecorder()
+        recorder.instrument(app)
+        report["scales"][str(factor)] = run_scale(app, recorder, args)
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"pipeline-{args.backend}-{commit}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            previous = json.load(handle)
+    print_report(report, previous)
+    print(f"\nWrote {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# benchmarks/bench_prompts.py
+"""Prompt template comparison: success rate, output tokens and latency of "full" vs "compact".
+
+Each question has a reference query; an answer counts as executed when the
+generated SQL runs, and as correct when its rows match the reference rows
+(compared as sorted value tuples, ignoring column names). The compact
+template retrieves FEW_SHOT_K curated examples; learning from executions and
+the semantic cache are off so every question reaches the LLM.
+
+Usage:
+    python -m benchmarks.bench_prompts --repeats 3
+    python -m benchmarks.bench_prompts --stub --embeddings fake   # plumbing and prompt sizes only
+"""
+
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import os
+import tempfile
+import time
+from config.config import DatabaseConfig, IndexConfig, LLMConfig
+from src.database.backends import DuckDBBackend
+from src.database.schema_cache import SchemaCache
+from src.utils.metrics import estimate_tokens
+from . import datasets
+from .bench_retrieval import make_embeddings
+from .stats import summarize
+from .stub_llm import StubLLM
+
+# Deliberately different wording from config/sql_examples.jsonl.
+EVAL_SET = [
+    ("What is the total revenue per region?",
+     "SELECT r.name, SUM(o.total_amt_usd) FROM orders o JOIN accounts a ON o.account_id = a.id "
+     "JOIN sales_reps s ON a.sales_rep_id = s.id JOIN region r ON s.region_id = r.id GROUP BY r.name"),
+    ("How many orders were placed in each month of 2015?",
+     "SELECT DATE_TRUNC('month', o.occurred_at), COUNT(*) FROM orders o "
+     "WHERE EXTRACT(YEAR FROM o.occurred_at) = 2015 GROUP BY 1"),
+    ("Which 3 accounts placed the most orders?",
+     "SELECT a.name, COUNT(*) AS n FROM orders o JOIN accounts a ON o.account_id = a.id "
+     "GROUP BY a.name ORDER BY n DESC LIMIT 3"),
+    ("What is the average gloss quantity per order?",
+     "SELECT AVG(o.gloss_qty) FROM orders o"),
+    ("How many web events did each region generate in 2016?",
+     "SELECT r.name, COUNT(*) FROM web_events w JOIN accounts a ON w.account_id = a.id "
+     "JOIN sales_reps s ON a.sales_rep_id = s.id JOIN region r ON s.region_id = r.id "
+     "WHERE EXTRACT(YEAR FROM w.occurred_at) = 2016 GROUP BY r.name"),
+    ("What was total poster revenue by year?",
+     "SELECT EXTRACT(YEAR FROM o.occurred_at), SUM(o.poster_amt_usd) FROM orders o GROUP BY 1"),
+    ("How many accounts does each region have?",
+     "SELECT r.name, COUNT(a.id) FROM accounts a JOIN sales_reps s ON a.sales_rep_id = s.id "
+     "JOIN region r ON s.region_id = r.id GROUP BY r.name"),
+    ("Which channel brought the most web events in 2015?",
+     "SELECT w.channel, COUNT(*) AS n FROM web_events w WHERE EXTRACT(YEAR FROM w.occurred_at) = 2015 "
+     "GROUP BY w.channel ORDER BY n DESC LIMIT 1"),
+    ("What is the total standard paper quantity sold by each sales rep in the Northeast region?",
+     "SELECT s.name, SUM(o.standard_qty) FROM orders o JOIN accounts a ON o.account_id = a.id "
+     "JOIN sales_reps s ON a.sales_rep_id = s.id JOIN region r ON s.region_id = r.id "
+     "WHERE r.name = 'Northeast' GROUP BY s.name"),
+    ("What is the largest single order in USD?",
+     "SELECT MAX(o.total_amt_usd) FROM orders o"),
+]
+
+def normalized_rows(result) -> List[tuple]:
+    def value(item):
+        if isinstance(item, (int, float)) or type(item).__name__ == "Decimal":
+            return round(float(item), 2)
+        return str(item)
+    return sorted(tuple(value(item) for item in row) for row in result.rows)
+
+def evaluate(generator, backend: DuckDBBackend, template: str, question: str, expected: List[tuple]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    prompt = generator.build_prompt(question, template=template)
+    response = generator._stream_response(prompt)
+    sql = generator._parse_response(response)
+    outcome = {
+        "seconds": time.perf_counter() - start,
+        "prompt_tokens": estimate_tokens(prompt),
+        "output_tokens": estimate_tokens(response),
+        "parsed": not sql.startswith("Unable to generate"),
+        "executed": False,
+        "correct": False,
+    }
+    if outcome["parsed"]:
+        try:
+            rows = normalized_rows(backend.execute(sql, max_rows=DatabaseConfig.MAX_RESULT_ROWS))
+            outcome["executed"] = True
+            outcome["correct"] = rows == expected
+        except Exception as e:
+            outcome["error"] = str(e).splitlines()[0]
+    return outcome
+
+def summarize_template(outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    count = len(outcomes)
+    return {
+        "questions": count,
+        "parse_rate": sum(o["parsed"] for o in outcomes) / count,
+        "success_rate": sum(o["executed"] for o in outcomes) / count,
+        "correct_rate": sum(o["correct"] for o in outcomes) / count,
+        "prompt_tokens_mean": sum(o["prompt_tokens"] for o in outcomes) / count,
+        "output_tokens_mean": sum(o["output_tokens"] for o in outcomes) / count,
+        "latency": summarize([o["seconds"] for o in outcomes]),
+    }
+
+def make_generator(args, backend: DuckDBBackend):
+    from src.llm import vector_index
+    from src.llm.query_generator import QueryGenerator
+
+    IndexConfig.CHROMA_PATH = tempfile.mkdtemp(prefix="chroma-prompts-")
+    LLMConfig.FEW_SHOT_K = args.k
+    LLMConfig.FEW_SHOT_MAX_LEARNED = 0
+    if args.embeddings == "fake":
+        vector_index.load_embeddings = lambda model_name=None: make_embeddings("fake")
+
+    generator = QueryGenerator({})
+    generator.schema_cache = SchemaCache({}, backend=backend)
+    if args.stub:
+        generator.llm = StubLLM(latency=0.05)
+    generator.example_store.index()
+    return generator
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--templates", nargs="+", default=["full", "compact"])
+    parser.add_argument("--k", type=int, default=LLMConfig.FEW_SHOT_K, help="few-shot examples for compact")
+    parser.add_argument("--repeats", type=int, default=1, help="passes over the question set")
+    parser.add_argument("--embeddings", choices=["hf", "fake"], default="hf")
+    parser.add_argument("--stub", action="store_true", help="use the stub LLM instead of Ollama")
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    backend = DuckDBBackend(datasets.build_duckdb(1), statement_timeout_ms=10000)
+    generator = make_generator(args, backend)
+    expected = {question: normalized_rows(backend.execute(sql, max_rows=10000)) for question, sql in EVAL_SET}
+
+    report: Dict[str, Any] = {"benchmark": "prompts", "config": vars(args), "templates": {}}
+    for template in args.templates:
+        outcomes = [
+            evaluate(generator, backend, template, question, expected[question])
+            for _ in range(args.repeats) for question, _ in EVAL_SET
+        ]
+        report["templates"][template] = summarize_template(outcomes)
+
+    for template, result in report["templates"].items():
+        print(
+            f"{template:>8}: executed={result['success_rate']:.0%} correct={result['correct_rate']:.0%} "
+            f"parsed={result['parse_rate']:.0%} prompt_tokens={result['prompt_tokens_mean']:.0f} "
+            f"output_tokens={result['output_tokens_mean']:.0f} "
+            f"p50={result['latency']['p50_ms']:.0f}ms p95={result['latency']['p95_ms']:.0f}ms"
+        )
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+if __name__ == "__main__":
+    main()
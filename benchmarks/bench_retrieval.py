@@ -0,0 +1,157 @@
+# benchmarks/bench_retrieval.py
+"""Persistent embedding index: build, incremental resync, cold load and top-k retrieval latency.
+
+The schema (tables and columns) and the curated question→SQL examples are
+indexed into a throwaway persistent Chroma directory. ``--examples`` pads the
+example collection with variants to measure larger indexes. ``--embeddings
+fake`` swaps bge-small for a hash embedding so only index cost is measured.
+
+Usage:
+    python -m benchmarks.bench_retrieval --examples 1000 --k 1 3 5
+    python -m benchmarks.bench_retrieval --embeddings fake --output benchmarks/results/retrieval.json
+"""
+
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from .stats import summarize
+from .stub_llm import QUESTIONS
+
+def make_embeddings(kind: str):
+    if kind == "fake":
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+
+        return DeterministicFakeEmbedding(size=384)
+    from src.llm.vector_index import load_embeddings
+
+    return load_embeddings()
+
+def padded_examples(count: int) -> List[Dict[str, str]]:
+    from src.llm.example_store import load_examples
+
+    curated = load_examples()
+    examples = list(curated)
+    variant = 1
+    while len(examples) < count:
+        for example in curated[:count - len(examples)]:
+            examples.append({"question": f"{example['question']} (variant {variant})", "sql": example["sql"]})
+        variant += 1
+    return examples[:max(count, len(curated))]
+
+def open_stores(path: str, embeddings):
+    from src.llm.example_store import ExampleStore
+    from src.llm.schema_retriever import SchemaRetriever
+    from src.llm.vector_index import open_client
+
+    client = open_client(path)
+    return SchemaRetriever(embeddings, client, index_columns=True), ExampleStore(embeddings, client)
+
+def load_only(path: str, embeddings_kind: str):
+    """Runs in a fresh interpreter: time to import the stack and open the persisted collections."""
+    start = time.perf_counter()
+    import chromadb  # noqa: F401
+    imported = time.perf_counter()
+    embeddings = make_embeddings(embeddings_kind)
+    model_loaded = time.perf_counter()
+    _, examples = open_stores(path, embeddings)
+    count = len(examples)
+    opened = time.perf_counter()
+    examples.search(QUESTIONS[0], k=3)
+    print(json.dumps({
+        "import_chromadb_seconds": imported - start,
+        "model_seconds": model_loaded - imported,
+        "open_seconds": opened - model_loaded,
+        "first_query_seconds": time.perf_counter() - opened,
+        "examples": count,
+    }))
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def run(args) -> Dict[str, Any]:
+    from benchmarks import datasets
+    from src.database.backends import DuckDBBackend
+    from src.database.schema_cache import SchemaCache
+
+    snapshot = SchemaCache({}, backend=DuckDBBackend(datasets.build_duckdb(1), statement_timeout_ms=0)).get_snapshot()
+    examples = padded_examples(args.examples)
+    embeddings = make_embeddings(args.embeddings)
+    path = tempfile.mkdtemp(prefix="chroma-bench-")
+    try:
+        schema_store, example_store = open_stores(path, embeddings)
+        schema_stats, schema_build = timed(schema_store.index, snapshot)
+        example_stats, example_build = timed(example_store.index, examples)
+        resync_stats, resync = timed(example_store.index, examples)
+        changed = [dict(example) for example in examples]
+        changed[0]["sql"] += " -- edited"
+        changed_stats, changed_resync = timed(example_store.index, changed)
+
+        load = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_retrieval", "--load-only", path, "--embeddings", args.embeddings],
+            capture_output=True, text=True, check=True
+        )
+        cold_load = json.loads(load.stdout.strip().splitlines()[-1])
+
+        questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.queries)]
+        embed_samples = [timed(embeddings.embed_query, question)[1] for question in questions]
+        retrieval: Dict[str, Any] = {"embed_query": summarize(embed_samples)}
+        for k in args.k:
+            retrieval[f"examples_top{k}"] = summarize([timed(example_store.search, q, k)[1] for q in questions])
+        schema_store.top_k = max(args.k)
+        retrieval["schema_select_tables"] = summarize(
+            [timed(schema_store.select_tables, q, snapshot)[1] for q in questions]
+        )
+        return {
+            "benchmark": "retrieval",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "load_only")},
+            "index": {
+                "schema_build": {**schema_stats, "seconds": schema_build},
+                "examples_build": {**example_stats, "seconds": example_build},
+                "examples_resync_unchanged": {**resync_stats, "seconds": resync},
+                "examples_resync_one_changed": {**changed_stats, "seconds": changed_resync},
+                "disk_mb": sum(
+                    os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+                ) / 1024 / 1024,
+            },
+            "cold_load": cold_load,
+            "retrieval": retrieval,
+        }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--embeddings", choices=["hf", "fake"], default="hf")
+    parser.add_argument("--examples", type=int, default=0, help="pad the example index to this many entries")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--queries", type=int, default=200, help="measured lookups per k")
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--load-only", metavar="PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.load_only:
+        load_only(args.load_only, args.embeddings)
+        return
+
+    report = run(args)
+    for name, stats in report["index"].items():
+        print(f"{name:>28}: {stats if isinstance(stats, float) else json.dumps(stats)}")
+    print(f"{'cold load':>28}: {json.dumps({k: round(v, 4) for k, v in report['cold_load'].items()})}")
+    for name, stats in report["retrieval"].items():
+        print(f"{name:>28}: p50={stats['p50_ms']:7.2f}ms p95={stats['p95_ms']:7.2f}ms p99={stats['p99_ms']:7.2f}ms")
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# benchmarks/bench_rollups.py
+"""Query latency on the raw tables vs. the rollup tables, plus rollup build and incremental refresh time.
+
+The queries are the dashboard questions from the Gradio examples. Each one
+runs as written and as rewritten by RollupManager.route, and the two results
+are compared. DuckDB runs use a copy of the dataset file; on PostgreSQL the
+rollups and the appended rows are removed again afterwards, and the EXPLAIN
+cost guard is off so the raw queries are measured rather than rejected.
+
+Usage:
+    python -m benchmarks.bench_rollups --scale 100
+    python -m benchmarks.bench_rollups --backend postgres --scale 100 --output benchmarks/results/rollups.json
+"""
+
+from typing import Any, Dict
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from config.config import DatabaseConfig
+from src.database.backends import DuckDBBackend, PostgresBackend
+from src.database.rollups import ROLLUPS, STATE_TABLE, RollupManager
+from . import datasets
+from .bench_prompts import normalized_rows
+from .stats import summarize
+
+ORDER_JOINS = (
+    "FROM orders o JOIN accounts a ON o.account_id = a.id JOIN sales_reps s ON a.sales_rep_id = s.id "
+    "JOIN region r ON s.region_id = r.id "
+)
+QUERIES = [
+    ("sales by region", "SELECT r.name, SUM(o.total_amt_usd) AS revenue " + ORDER_JOINS + "GROUP BY r.name"),
+    ("monthly revenue 2016",
+     "SELECT DATE_TRUNC('month', o.occurred_at) AS month, SUM(o.total_amt_usd) AS revenue FROM orders o "
+     "WHERE o.occurred_at >= '2016-01-01' AND o.occurred_at < '2017-01-01' GROUP BY 1 ORDER BY 1"),
+    ("top 5 sales reps",
+     "SELECT s.name, SUM(o.total_amt_usd) AS revenue " + ORDER_JOINS
+     + "GROUP BY s.name ORDER BY revenue DESC LIMIT 5"),
+    ("revenue all time", "SELECT SUM(o.total_amt_usd) AS revenue FROM orders o"),
+    ("orders per year and region",
+     "SELECT EXTRACT(YEAR FROM o.occurred_at) AS year, r.name, COUNT(*) AS orders " + ORDER_JOINS + "GROUP BY 1, 2"),
+    ("web events by channel 2016",
+     "SELECT w.channel, COUNT(*) AS events FROM web_events w "
+     "WHERE EXTRACT(YEAR FROM w.occurred_at) = 2016 GROUP BY w.channel"),
+]
+APPEND_FRACTION = 0.01
+
+def timed_runs(backend, sql: str, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = backend.execute(sql, max_rows=100_000)
+        samples.append(time.perf_counter() - start)
+    return result, summarize(samples)
+
+def append_orders(backend, fraction: float) -> int:
+    """Copy the newest ``fraction`` of orders with fresh ids; returns the old maximum id."""
+    def work(cur):
+        cur.execute("SELECT MAX(id), COUNT(*) FROM orders")
+        max_id, count = cur.fetchone()
+        columns = ["id", "account_id", "occurred_at", "standard_qty", "gloss_qty", "poster_qty", "total",
+                   "standard_amt_usd", "gloss_amt_usd", "poster_amt_usd", "total_amt_usd"]
+        select_list = ", ".join(f"id + {int(max_id)}" if column == "id" else column for column in columns)
+        cur.execute(
+            f"INSERT INTO orders ({', '.join(columns)}) SELECT {select_list} FROM orders "
+            f"ORDER BY occurred_at DESC LIMIT {max(1, int(count * fraction))}"
+        )
+        return max_id
+    return backend.run_in_transaction(work)
+
+def cleanup_postgres(backend, old_max_id=None):
+    def work(cur):
+        if old_max_id is not None:
+            cur.execute(f"DELETE FROM orders WHERE id > {int(old_max_id)}")
+        for rollup in ROLLUPS:
+            cur.execute(f"DROP TABLE IF EXISTS {rollup.name}")
+        cur.execute(f"DROP TABLE IF EXISTS {STATE_TABLE}")
+    backend.run_in_transaction(work)
+
+def run(backend, repeats: int) -> Dict[str, Any]:
+    manager = RollupManager(backend, check_seconds=3600, rewrite=True)
+    report: Dict[str, Any] = {"build": manager.refresh(full=True), "queries": {}}
+    for name, sql in QUERIES:
+        rewritten, rollup = manager.route(sql)
+        raw_result, raw = timed_runs(backend, sql, repeats)
+        entry = {"rollup": rollup, "raw": raw}
+        if rollup is not None:
+            rollup_result, entry["rollup_latency"] = timed_runs(backend, rewritten, repeats)
+            entry["same_rows"] = normalized_rows(raw_result) == normalized_rows(rollup_result)
+            entry["speedup"] = raw["p50_ms"] / max(entry["rollup_latency"]["p50_ms"], 1e-6)
+        report["queries"][name] = entry
+
+    report["appended_from_id"] = append_orders(backend, APPEND_FRACTION)
+    start = time.perf_counter()
+    report["incremental"] = manager.refresh(names=["rollup_orders_monthly"])
+    report["incremental_seconds"] = time.perf_counter() - start
+    start = time.perf_counter()
+    manager.refresh(full=True, names=["rollup_orders_monthly"])
+    report["full_seconds"] = time.perf_counter() - start
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["duckdb", "postgres"], default="duckdb")
+    parser.add_argument("--scale", type=int, default=100, help="dataset scale (see benchmarks/datasets.py)")
+    parser.add_argument("--repeats", type=int, default=20, help="timed runs per query")
+    parser.add_argument("--dump", default=datasets.DEFAULT_DUMP)
+    parser.add_argument("--data-dir", default=datasets.DEFAULT_DATA_DIR)
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    if args.backend == "duckdb":
+        workdir = tempfile.mkdtemp(prefix="bench-rollups-")
+        path = os.path.join(workdir, "parch.duckdb")
+        shutil.copyfile(datasets.build_duckdb(args.scale, args.dump, args.data_dir), path)
+        backend = DuckDBBackend(path, statement_timeout_ms=0)
+        try:
+            report = run(backend, args.repeats)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    else:
+        name = datasets.build_postgres(args.scale, args.dump)
+        backend = PostgresBackend({**DatabaseConfig.get_db_config(), "dbname": name})
+        backend.guard.max_cost = backend.guard.statement_timeout_ms = 0
+        report = {}
+        try:
+            report = run(backend, args.repeats)
+        finally:
+            cleanup_postgres(backend, report.get("appended_from_id"))
+    report.update(benchmark="rollups", backend=args.backend, scale=args.scale)
+
+    for name, entry in report["queries"].items():
+        line = f"{name:>28}: raw p50={entry['raw']['p50_ms']:8.2f}ms"
+        if entry["rollup"]:
+            line += (
+                f"  rollup p50={entry['rollup_latency']['p50_ms']:7.2f}ms  x{entry['speedup']:.0f}"
+                f"  same rows={entry['same_rows']}"
+            )
+        else:
+            line += "  (not rewritten)"
+        print(line)
+    for rollup, stats in report["build"].items():
+        print(f"{'build ' + rollup:>40}: {stats['rows']:,} rows in {stats['seconds']:.2f}s")
+    incremental = report["incremental"]["rollup_orders_monthly"]
+    print(
+        f"{'refresh after +1% orders':>40}: {incremental['mode']} ({incremental.get('from')}..{incremental.get('to')}) "
+        f"{report['incremental_seconds']:.2f}s vs full {report['full_seconds']:.2f}s"
+    )
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, default=str)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/bench_schema_pruning.py
+"""Prompt size and end-to-end latency with the full vs pruned schema.
+
+Usage:
+    python -m benchmarks.bench_schema_pruning
+    python -m benchmarks.bench_schema_pruning --no-llm   # prompt sizes only
+"""
+
+import argparse
+import statistics
+import time
+from config.config import DatabaseConfig
+from src.llm.query_generator import QueryGenerator
+
+QUESTIONS = [
+    "Show me total sales by region",
+    "What is the monthly revenue trend for 2016?",
+    "What are the top 5 sales reps by total revenue?",
+    "How many web events came from each channel?",
+    "Which accounts have the largest average order size?"
+]
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--no-llm", action="store_true", help="only build prompts, skip Ollama")
+    args = parser.parse_args()
+
+    generator = QueryGenerator(DatabaseConfig.get_db_config())
+    snapshot = generator.schema_cache.get_snapshot()
+    generator.schema_retriever.index(snapshot)
+
+    for mode in ("full", "pruned"):
+        prompt_tokens, latencies = [], []
+        for question in QUESTIONS:
+            start = time.perf_counter()
+            prompt = generator.build_prompt(question, snapshot, schema_mode=mode)
+            tokens = estimate_tokens(prompt)
+            if not args.no_llm:
+                result = generator.llm.generate([prompt])
+                info = result.generations[0][0].generation_info or {}
+                tokens = info.get("prompt_eval_count", tokens)
+            latencies.append(time.perf_counter() - start)
+            prompt_tokens.append(tokens)
+
+        print(
+            f"{mode:>6}: prompt_tokens mean={statistics.mean(prompt_tokens):.0f} "
+            f"max={max(prompt_tokens)}, latency mean={statistics.mean(latencies) * 1000:.1f}ms "
+            f"max={max(latencies) * 1000:.1f}ms"
+        )
+
+if __name__ == "__main__":
+    main()
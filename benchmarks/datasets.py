@@ -0,0 +1,137 @@
+# benchmarks/datasets.py
+"""Build Parch & Posey databases with ``orders`` and ``web_events`` scaled 10x/100x.
+
+Scaled rows are copies of the originals with fresh ids, so joins, dates and
+group cardinalities stay realistic while the fact tables grow.
+
+Usage:
+    python -m benchmarks.datasets --backend duckdb --scales 10 100
+"""
+
+from typing import List
+import argparse
+import logging
+import os
+import time
+import psycopg2
+from psycopg2 import sql as pgsql
+from config.config import DatabaseConfig
+from src.database.bulk_loader import BulkLoader, DuckDBBulkLoader
+
+SCALED_TABLES = ("orders", "web_events")
+DEFAULT_DUMP = "ParchPosey-database.sql"
+DEFAULT_DATA_DIR = "data/bench"
+
+def scale_statement(table: str, columns: List[str], factor: int) -> str:
+    """INSERT ... SELECT adding ``factor - 1`` copies of ``table`` with offset ids."""
+    select_list = ", ".join(
+        "t.id + g.n * m.max_id" if column == "id" else f"t.{column}" for column in columns
+    )
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"SELECT {select_list} FROM {table} t "
+        f"CROSS JOIN (SELECT MAX(id) AS max_id FROM {table}) m "
+        f"CROSS JOIN generate_series(1, {int(factor) - 1}) AS g(n)"
+    )
+
+def _columns(cur, table: str) -> List[str]:
+    cur.execute(
+        "SELECT column_name FROM information_schema.columns "
+        f"WHERE table_name = '{table}' ORDER BY ordinal_position"
+    )
+    return [row[0] for row in cur.fetchall()]
+
+def scale_tables(cur, factor: int, tables=SCALED_TABLES):
+    """Multiply ``tables`` by ``factor`` in place; works on PostgreSQL and DuckDB cursors."""
+    if factor <= 1:
+        return
+    for table in tables:
+        cur.execute(scale_statement(table, _columns(cur, table), factor))
+
+def duckdb_path(factor: int, data_dir: str = DEFAULT_DATA_DIR) -> str:
+    return os.path.join(data_dir, f"parch_x{factor}.duckdb")
+
+def postgres_name(factor: int) -> str:
+    return DatabaseConfig.DB_NAME if factor <= 1 else f"{DatabaseConfig.DB_NAME}_x{factor}"
+
+def build_duckdb(factor: int, dump: str = DEFAULT_DUMP, data_dir: str = DEFAULT_DATA_DIR,
+                 rebuild: bool = False) -> str:
+    import duckdb
+
+    path = duckdb_path(factor, data_dir)
+    if os.path.exists(path) and not rebuild:
+        return path
+    os.makedirs(data_dir, exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+    conn = duckdb.connect(path)
+    try:
+        DuckDBBulkLoader(conn).load(dump)
+        scale_tables(conn, factor)
+    finally:
+        conn.close()
+    return path
+
+def build_postgres(factor: int, dump: str = DEFAULT_DUMP, rebuild: bool = False) -> str:
+    """Create ``<DB_NAME>_x<factor>`` next to the configured database (1x uses it as is)."""
+    name = postgres_name(factor)
+    if factor <= 1:
+        return name
+    admin = psycopg2.connect(**DatabaseConfig.get_db_config())
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (name,))
+            exists = cur.fetchone() is not None
+            if exists and not rebuild:
+                return name
+            if exists:
+                cur.execute(pgsql.SQL("DROP DATABASE {}").format(pgsql.Identifier(name)))
+            cur.execute(pgsql.SQL("CREATE DATABASE {}").format(pgsql.Identifier(name)))
+    finally:
+        admin.close()
+
+    conn = psycopg2.connect(**{**DatabaseConfig.get_db_config(), "dbname": name})
+    try:
+        loader = BulkLoader(conn)
+        row_counts = loader.load(dump)
+        with conn.cursor() as cur:
+            scale_tables(cur, factor)
+        loader.create_keys(row_counts)
+        conn.commit()
+    finally:
+        conn.close()
+
+    conn = psycopg2.connect(**{**DatabaseConfig.get_db_config(), "dbname": name})
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+    finally:
+        conn.close()
+    return name
+
+def build(backend: str, factor: int, dump: str = DEFAULT_DUMP, data_dir: str = DEFAULT_DATA_DIR,
+          rebuild: bool = False) -> str:
+    """Return the DuckDB path or PostgreSQL database name holding the ``factor``x dataset."""
+    if backend == "duckdb":
+        return build_duckdb(factor, dump, data_dir, rebuild)
+    return build_postgres(factor, dump, rebuild)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["duckdb", "postgres"], default=DatabaseConfig.DB_BACKEND)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--dump", default=DEFAULT_DUMP)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where DuckDB files are written")
+    parser.add_argument("--rebuild", action="store_true", help="recreate datasets that already exist")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    for factor in args.scales:
+        start = time.perf_counter()
+        target = build(args.backend, factor, args.dump, args.data_dir, args.rebuild)
+        print(f"{factor:>4}x: {target} ({time.perf_counter() - start:.1f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/stub_llm.py
+"""Deterministic stand-in for OllamaLLM used by the benchmarks and load tests."""
+
+import asyncio
+import contextlib
+import re
+import threading
+import time
+from src.llm.query_cache import normalize_question
+
+CANNED_SQL = {
+    "show me total sales by region": """
+        SELECT r.name AS region, SUM(o.total_amt_usd) AS total_sales
+        FROM orders o
+        JOIN accounts a ON a.id = o.account_id
+        JOIN sales_reps s ON s.id = a.sales_rep_id
+        JOIN region r ON r.id = s.region_id
+        GROUP BY r.name
+        ORDER BY total_sales DESC""",
+    "what is the monthly revenue trend for 2016": """
+        SELECT DATE_TRUNC('month', o.occurred_at) AS month, SUM(o.total_amt_usd) AS revenue
+        FROM orders o
+        WHERE EXTRACT(YEAR FROM o.occurred_at) = 2016
+        GROUP BY DATE_TRUNC('month', o.occurred_at)
+        ORDER BY month""",
+    "what are the top 5 sales reps by total revenue": """
+        SELECT s.name AS sales_rep, SUM(o.total_amt_usd) AS total_revenue
+        FROM orders o
+        JOIN accounts a ON a.id = o.account_id
+        JOIN sales_reps s ON s.id = a.sales_rep_id
+        GROUP BY s.name
+        ORDER BY total_revenue DESC
+        LIMIT 5""",
+    "what is the total revenue for all time": """
+        SELECT SUM(o.total_amt_usd) AS total_revenue FROM orders o""",
+    "how many web events came from each channel": """
+        SELECT w.channel, COUNT(*) AS event_count
+        FROM web_events w
+        GROUP BY w.channel
+        ORDER BY event_count DESC""",
+    "show me daily order counts": """
+        SELECT DATE_TRUNC('day', o.occurred_at) AS order_date, COUNT(*) AS order_count
+        FROM orders o
+        GROUP BY DATE_TRUNC('day', o.occurred_at)
+        ORDER BY order_date""",
+    "which accounts have the largest average order size": """
+        SELECT a.name AS account_name, AVG(o.total) AS avg_order_size
+        FROM orders o
+        JOIN accounts a ON a.id = o.account_id
+        GROUP BY a.name
+        ORDER BY avg_order_size DESC
+        LIMIT 10""",
+}
+
+DEFAULT_SQL = CANNED_SQL["show me total sales by region"]
+
+QUESTIONS = [
+    "Show me total sales by region",
+    "What is the monthly revenue trend for 2016?",
+    "What are the top 5 sales reps by total revenue?",
+    "What is the total revenue for all time?",
+    "How many web events came from each channel?",
+    "Show me daily order counts",
+    "Which accounts have the largest average order size?",
+]
+
+class StubLLM:
+    """Streams a canned SQL answer, followed by chatter that early stopping should skip.
+
+    ``latency`` is the total time spent emitting the answer and is spread evenly
+    across ``chunk_count`` chunks, mimicking token streaming from Ollama.
+    With ``parallel`` set, at most that many streams run at once and the rest
+    wait in arrival order, like requests beyond OLLAMA_NUM_PARALLEL.
+    """
+
+    def __init__(self, latency: float = 0.5, chunk_count: int = 20, parallel: int = 0):
+        self.latency = latency
+        self.chunk_count = chunk_count
+        self.parallel = parallel
+        self.calls = 0
+        self._server_slots = threading.BoundedSemaphore(parallel) if parallel else None
+        self._aserver_slots = None
+
+    def respond(self, prompt: str) -> str:
+        # The last "User Query:" is the question; earlier ones belong to few-shot examples.
+        matches = re.findall(r"User Query:\s*(.+)", prompt)
+        question = normalize_question(matches[-1]) if matches else ""
+        sql = CANNED_SQL.get(question, DEFAULT_SQL)
+        return (
+            "SQL_QUERY_START\n"
+            + "\n".join(line.strip() for line in sql.strip().splitlines())
+            + "\nSQL_QUERY_END\n"
+            + "Analysis Steps:\n1. Identify required tables and their relationships\n" * 5
+        )
+
+    def _chunks(self, prompt: str):
+        self.calls += 1
+        text = self.respond(prompt)
+        size = max(1, len(text) // self.chunk_count)
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def invoke(self, prompt: str) -> str:
+        time.sleep(self.latency)
+        self.calls += 1
+        return self.respond(prompt)
+
+    def stream(self, prompt: str):
+        chunks = self._chunks(prompt)
+        with self._server_slots or contextlib.nullcontext():
+            for chunk in chunks:
+                time.sleep(self.latency / len(chunks))
+                yield chunk
+
+    async def astream(self, prompt: str):
+        chunks = self._chunks(prompt)
+        if self.parallel and self._aserver_slots is None:
+            self._aserver_slots = asyncio.Semaphore(self.parallel)
+        async with self._aserver_slots or contextlib.nullcontext():
+            for chunk in chunks:
+                await asyncio.sleep(self.latency / len(chunks))
+                yield chunk
@@ -4,11 +4,21 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class DatabaseConfig:
+    DB_BACKEND = os.getenv("DB_BACKEND", "postgres")  # "postgres" or "duckdb"
+    DUCKDB_PATH = os.getenv("DUCKDB_PATH", "data/parch.duckdb")
     DB_NAME = os.getenv("DB_NAME")
     DB_USER = os.getenv("DB_USER")
     DB_PASSWORD = os.getenv("DB_PASSWORD")
     DB_HOST = os.getenv("DB_HOST")
     DB_PORT = os.getenv("DB_PORT")
+    POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+    MAX_RESULT_ROWS = int(os.getenv("DB_MAX_RESULT_ROWS", "10000"))
+    FETCH_BATCH_SIZE = int(os.getenv("DB_FETCH_BATCH_SIZE", "2000"))
+    STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    QUERY_MAX_COST = float(os.getenv("DB_QUERY_MAX_COST", "500000"))
+    QUERY_MAX_ESTIMATED_ROWS = float(os.getenv("DB_QUERY_MAX_ESTIMATED_ROWS", "100000"))
 
     @classmethod
     def get_db_config(cls):
@@ -23,4 +33,84 @@ class DatabaseConfig:
 class LLMConfig:
     MODEL_NAME = os.getenv("MODEL_NAME", "llama3.1:8b")
     TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
-    MAX_TOKENS = int(os.getenv("MAX_TOKENS", "8192")) 
\ No newline at end of file
+    MAX_TOKENS = int(os.getenv("MAX_TOKENS", "8192"))
+    SCHEMA_MODE = os.getenv("SCHEMA_MODE", "full")  # "full" or "pruned"
+    SCHEMA_TOP_K = int(os.getenv("SCHEMA_TOP_K", "4"))
+    SCHEMA_INDEX_COLUMNS = os.getenv("SCHEMA_INDEX_COLUMNS", "false").lower() == "true" 
+    PROMPT_TEMPLATE = os.getenv("PROMPT_TEMPLATE", "full")  # "full" or "compact" (few-shot)
+    FEW_SHOT_K = int(os.getenv("FEW_SHOT_K", "3"))
+    FEW_SHOT_MAX_LEARNED = int(os.getenv("FEW_SHOT_MAX_LEARNED", "500"))
+    SQL_REPAIR_ATTEMPTS = int(os.getenv("SQL_REPAIR_ATTEMPTS", "2"))  # LLM retries for SQL failing local checks
+    SQL_DB_REPAIR_ATTEMPTS = int(os.getenv("SQL_DB_REPAIR_ATTEMPTS", "1"))  # retries for SQL the database rejects
+    # Generations sent to Ollama at once (match OLLAMA_NUM_PARALLEL); the rest queue, interactive before batch.
+    MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    SINGLE_FLIGHT = os.getenv("LLM_SINGLE_FLIGHT", "true").lower() == "true"  # share in-flight identical questions
+    # A request that may need the model pings Ollama at most this often so the model is loaded by the time
+    # the cache lookups have missed; 0 disables the ping.
+    KEEP_ALIVE_PING_SECONDS = float(os.getenv("LLM_KEEP_ALIVE_PING_SECONDS", "60"))
+
+class CacheConfig:
+    SCHEMA_TTL_SECONDS = float(os.getenv("SCHEMA_CACHE_TTL", "300"))
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+    QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "512"))
+    QUERY_CACHE_PATH = os.getenv("QUERY_CACHE_PATH", "")
+    QUERY_CACHE_DISK_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_DISK_MAX_ENTRIES", "10000"))
+    RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+    RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+class RollupConfig:
+    # Eligible generated SQL is rewritten onto rollup tables built with `python -m src.cli rollups`.
+    REWRITE = os.getenv("ROLLUP_REWRITE", "true").lower() == "true"
+    # How long a rollup freshness check (MAX(id) of its source table) is trusted.
+    CHECK_SECONDS = float(os.getenv("ROLLUP_CHECK_SECONDS", "10"))
+
+
+class IndexConfig:
+    # Persistent Chroma directory for schema, example and semantic cache embeddings; empty keeps them in memory.
+    CHROMA_PATH = os.getenv("CHROMA_PATH", "data/chroma")
+    EXAMPLES_PATH = os.getenv("SQL_EXAMPLES_PATH", "config/sql_examples.jsonl")
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+
+class AppConfig:
+    # Gradio queue workers; async handlers let one worker interleave many requests.
+    CONCURRENCY_LIMIT = int(os.getenv("GRADIO_CONCURRENCY_LIMIT", "32"))
+    CHART_WORKERS = int(os.getenv("CHART_WORKERS", "4"))
+    # "lazy": serve immediately and warm models/schema in the background; "eager": load all before serving.
+    STARTUP_MODE = os.getenv("STARTUP_MODE", "lazy").lower()
+
+
+class ChartConfig:
+    # Above these sizes results are downsampled or aggregated before the figure is built.
+    MAX_LINE_POINTS = int(os.getenv("CHART_MAX_LINE_POINTS", "2000"))  # LTTB
+    MAX_BAR_CATEGORIES = int(os.getenv("CHART_MAX_BAR_CATEGORIES", "50"))  # top-N + "Other", or range bins
+    MAX_SCATTER_SVG_POINTS = int(os.getenv("CHART_MAX_SCATTER_SVG_POINTS", "1000"))  # above: WebGL scattergl
+    MAX_SCATTER_POINTS = int(os.getenv("CHART_MAX_SCATTER_POINTS", "50000"))  # above: 2D density bins
+    DENSITY_BINS = int(os.getenv("CHART_DENSITY_BINS", "100"))
+
+
+class BatchConfig:
+    # Match OLLAMA_NUM_PARALLEL on the server; more workers only queue inside Ollama.
+    LLM_WORKERS = int(os.getenv("BATCH_LLM_WORKERS", "4"))
+    OUTPUT_DIR = os.getenv("BATCH_OUTPUT_DIR", "reports/batch")
+
+
+class LogConfig:
+    LOG_DIR = os.getenv("LOG_DIR", "logs")
+    LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" or "text" for the log file
+    MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "500"))
+    PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+    TIMELINE = os.getenv("LOG_TIMELINE", "true").lower() == "true"  # one stage-timeline line per request
+
+
+class MetricsConfig:
+    ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    PORT = int(os.getenv("METRICS_PORT", "9464"))
+    OTEL_ENABLED = os.getenv("METRICS_OTEL", "false").lower() == "true"
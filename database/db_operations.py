@@ -2,33 +2,26 @@
 
 import logging
 from typing import List, Dict, Any
-import psycopg2
 from psycopg2.extras import RealDictCursor
-from config import DATABASE_CONFIG
+from config.config import DatabaseConfig
+from src.database.connection_pool import get_pool
 
 logger = logging.getLogger(__name__)
 
 class DatabaseOperations:
     def __init__(self):
-        self.connection = self._connect_to_database()
-
-    def _connect_to_database(self):
-        try:
-            conn = psycopg2.connect(**DATABASE_CONFIG, cursor_factory=RealDictCursor)
-            return conn
-        except Exception as e:
-            logger.error(f"Error connecting to database: {e}")
-            raise
+        self.pool = get_pool(DatabaseConfig.get_db_config())
 
     def execute_query(self, sql_query: str) -> List[Dict[str, Any]]:
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute(sql_query)
-                return cursor.fetchall()
+            with self.pool.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(sql_query)
+                    return cursor.fetchall()
         except Exception as e:
             logger.error(f"Error executing SQL query: {e}")
             raise
 
     def close_connection(self):
-        if self.connection:
-            self.connection.close()
\ No newline at end of file
+        # Connections are owned by the shared pool; nothing to release here.
+        pass
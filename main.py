@@ -7,58 +7,136 @@ import sys
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(project_root)
 
-import gradio as gr
-from src.database.db_manager import DatabaseManager
-from src.llm.llm_handler import LLMHandler
-from src.visualization.chart_generator import ChartGenerator
-from src.utils.logger import Logger
+from src.utils.startup import startup_timer
+
+import asyncio
+import contextvars
+import functools
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from config.config import AppConfig, LLMConfig, MetricsConfig
+with startup_timer.phase("import application modules"):
+    from src.database.db_manager import DatabaseManager
+    from src.database.query_guard import QueryRejectedError
+    from src.llm.llm_handler import LLMHandler
+    from src.visualization.chart_generator import ChartGenerator
+    from src.utils.logger import Logger, reset_request_id, set_request_id
+    from src.utils.metrics import metrics, start_metrics_server
+    from src.utils.timeline import Timeline
 
 class DataAnalysisApp:
-    def __init__(self):
+    def __init__(self, db_manager=None, llm_handler=None, chart_generator=None):
         Logger.setup_logging()
-        self.db_manager = DatabaseManager()
-        self.llm_handler = LLMHandler()
-        self.chart_generator = ChartGenerator()
+        with startup_timer.phase("DatabaseManager"):
+            self.db_manager = db_manager or DatabaseManager()
+        with startup_timer.phase("LLMHandler"):
+            self.llm_handler = llm_handler or LLMHandler()
+        self.chart_generator = chart_generator or ChartGenerator()
+        self.chart_executor = ThreadPoolExecutor(
+            max_workers=AppConfig.CHART_WORKERS, thread_name_prefix="chart"
+        )
+        self._background_tasks = set()
+
+    def start_background_warm_up(self):
+        """Warm the schema cache, embeddings, Ollama model and chart libraries off the main thread."""
+        threading.Thread(target=self.chart_generator.warm_up, name="warm-up-charts", daemon=True).start()
+        self.llm_handler.query_generator.start_background_warm_up()
+
+    async def process_query(self, question: str, chart_type: str):
+        token = set_request_id(uuid.uuid4().hex[:12])
+        timeline = Timeline()
+        try:
+            return await self._process_query(question, chart_type, timeline)
+        finally:
+            timeline.finish()
+            reset_request_id(token)
+
+    def _background(self, task: asyncio.Task):
+        # The event loop only keeps weak references to tasks.
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
 
-    def process_query(self, question: str, chart_type: str):
+    async def _execute(self, sql_query: str, timeline: Timeline):
+        # The result cache is probed on the event loop; only a miss waits for a database worker.
+        with timeline.stage("result_cache") as stage:
+            results = self.db_manager.cached_result(sql_query)
+            stage.status = "miss" if results is None else "hit"
+        if results is None:
+            with timeline.stage("db_execute"):
+                results = await self.db_manager.aexecute_query_columnar(sql_query, probed=True)
+        return results
+
+    async def _process_query(self, question: str, chart_type: str, timeline: Timeline):
         try:
-            # Generate SQL query from natural language question
-            sql_query = self.llm_handler.generate_sql_query(question)
+            # Generate SQL query from natural language question (or find it in a cache)
+            sql_query, _ = await self.llm_handler.aresolve_sql(question, timeline)
             
-            # Check if the response is an error message
-            if sql_query.startswith("Unable to generate query"):
+            # Check if the response is an error message rather than SQL
+            if sql_query.startswith(("Unable to generate", "Error generating")):
                 return None, sql_query
             
             if not sql_query or sql_query.isspace():
                 return None, "Error: Could not generate SQL query"
             
-            # Execute the query
-            try:
-                results = self.db_manager.execute_query(sql_query)
-            except Exception as e:
-                return None, f"Database error: {str(e)}"
+            # Execute the query; a database error is fed back to the LLM for a bounded number of repairs
+            attempt = 0
+            while True:
+                try:
+                    results = await self._execute(sql_query, timeline)
+                    break
+                except QueryRejectedError as e:
+                    return None, f"Query rejected: {str(e)}"
+                except Exception as e:
+                    if attempt >= LLMConfig.SQL_DB_REPAIR_ATTEMPTS:
+                        return None, f"Database error: {str(e)}"
+                    attempt += 1
+                    with timeline.stage("llm_repair"):
+                        repaired = await self.llm_handler.arepair_sql_query(question, sql_query, str(e))
+                    if not repaired or repaired.startswith(("Unable to generate", "Error generating")):
+                        return None, f"Database error: {str(e)}"
+                    sql_query = repaired
+            # Storing the SQL for reuse overlaps with formatting and charting; nothing waits on it.
+            self._background(
+                timeline.start(
+                    "record_success", asyncio.to_thread(self.llm_handler.record_success, question, sql_query),
+                    blocking=False
+                )
+            )
             
-            if not results:
+            if not results.rows:
                 return None, "No data found for the query"
             
             # Check if results should be plotted or displayed as text
-            if len(results) == 1 and len(results[0]) == 1:
+            if len(results) == 1 and len(results.columns) == 1:
                 # Single value result - display as text
-                key = list(results[0].keys())[0]
-                value = results[0][key]
-                return None, f"{key}: {value}"
+                return None, f"{results.columns[0]}: {results.rows[0][0]}"
             
             elif len(results) == 1:
                 # Single row with multiple columns - display as text
-                formatted_result = ", ".join([f"{k}: {v}" for k, v in results[0].items()])
+                formatted_result = ", ".join(
+                    [f"{k}: {v}" for k, v in zip(results.columns, results.rows[0])]
+                )
                 return None, formatted_result
             
             else:
                 # Multiple rows - generate visualization
                 try:
-                    chart = self.chart_generator.generate_chart(results, chart_type)
+                    loop = asyncio.get_running_loop()
+                    with timeline.stage("chart"):
+                        chart = await loop.run_in_executor(
+                            self.chart_executor,
+                            functools.partial(
+                                contextvars.copy_context().run,
+                                self.chart_generator.generate_chart,
+                                results,
+                                chart_type
+                            )
+                        )
                     if isinstance(chart, str):  # Error message
                         return None, chart
+                    if results.truncated:
+                        return chart, f"Showing the first {len(results)} rows; the full result was truncated."
                     return chart, None  # Success case
                 except Exception as e:
                     return None, f"Error generating chart: {str(e)}"
@@ -67,6 +145,9 @@ class DataAnalysisApp:
             return None, f"Error: {str(e)}"
 
     def launch_interface(self):
+        with startup_timer.phase("import gradio"):
+            import gradio as gr
+
         iface = gr.Interface(
             fn=self.process_query,
             inputs=[
@@ -99,6 +180,14 @@ class DataAnalysisApp:
             ],
             allow_flagging="never"
         )
+        iface.queue(default_concurrency_limit=AppConfig.CONCURRENCY_LIMIT)
+        if metrics.enabled:
+            start_metrics_server()
+            if MetricsConfig.OTEL_ENABLED:
+                metrics.enable_otel()
+        if AppConfig.STARTUP_MODE != "eager":
+            self.start_background_warm_up()
+        startup_timer.log_report()
         iface.launch(share=False, server_port=7860)
 
 if __name__ == "__main__":
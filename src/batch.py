@@ -0,0 +1,217 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from config.config import BatchConfig
+from src.database.query_guard import QueryRejectedError
+from src.database.query_result import QueryResult
+from src.llm.query_cache import normalize_question
+from src.llm.scheduler import set_llm_priority
+
+MANIFEST_NAME = "manifest.jsonl"
+RESULT_FORMATS = ("csv", "parquet")
+
+@dataclass
+class BatchItem:
+    key: str
+    question: str
+    chart_type: str = "bar"
+    ids: List[str] = field(default_factory=list)
+
+
+def question_key(question: str) -> str:
+    return hashlib.sha1(normalize_question(question).encode("utf-8")).hexdigest()[:12]
+
+def read_questions(lines: Iterable[str]) -> List[BatchItem]:
+    """Parse JSONL (``{"id": ..., "question": ..., "chart_type": ...}``) and deduplicate.
+
+    Questions that normalize to the same text run once; their ids are kept together.
+    Plain-text lines are accepted as bare questions.
+    """
+    items: Dict[str, BatchItem] = {}
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line) if line.startswith("{") else {"question": line}
+        question = record["question"].strip()
+        key = question_key(question)
+        item = items.setdefault(key, BatchItem(key=key, question=question, chart_type=record.get("chart_type", "bar")))
+        item.ids.append(str(record.get("id", number)))
+    return list(items.values())
+
+def _atomic_write(path: str, write):
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+class BatchRunner:
+    """Runs many questions offline: bounded concurrent SQL generation, pooled execution,
+    result files and static charts, with a manifest that makes reruns resume."""
+
+    def __init__(
+        self,
+        output_dir: str,
+        llm_handler=None,
+        db_manager=None,
+        chart_generator=None,
+        llm_workers: Optional[int] = None,
+        result_format: str = "csv",
+        charts: bool = True
+    ):
+        if result_format not in RESULT_FORMATS:
+            raise ValueError(f"Unsupported result format: {result_format}")
+        if result_format == "parquet":
+            import pyarrow  # noqa: F401  (fail before any LLM work if Parquet support is missing)
+
+        self.output_dir = output_dir
+        self.llm_handler = llm_handler
+        self.db_manager = db_manager
+        self.chart_generator = chart_generator
+        self.llm_workers = llm_workers or BatchConfig.LLM_WORKERS
+        self.result_format = result_format
+        self.charts = charts
+        self.logger = logging.getLogger(__name__)
+        self._manifest_lock: Optional[asyncio.Lock] = None
+
+    def _ensure_components(self):
+        # Imported lazily so the batch module stays cheap to import (and to test).
+        if self.llm_handler is None:
+            from src.llm.llm_handler import LLMHandler
+            self.llm_handler = LLMHandler()
+        if self.db_manager is None:
+            from src.database.db_manager import DatabaseManager
+            self.db_manager = DatabaseManager()
+        if self.chart_generator is None and self.charts:
+            from src.visualization.chart_generator import ChartGenerator
+            self.chart_generator = ChartGenerator()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.output_dir, MANIFEST_NAME)
+
+    def manifest_entries(self) -> Dict[str, Dict[str, Any]]:
+        """Latest manifest entry per question key."""
+        latest: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # a torn last line from an interrupted run
+                    latest[entry["key"]] = entry
+        return latest
+
+    def completed_keys(self) -> Dict[str, Dict[str, Any]]:
+        """Entries whose status is ``done`` and whose result file still exists."""
+        latest = self.manifest_entries()
+        return {
+            key: entry for key, entry in latest.items()
+            if entry["status"] == "done"
+            and (entry.get("result_path") is None or os.path.exists(os.path.join(self.output_dir, entry["result_path"])))
+        }
+
+    async def _record(self, entry: Dict[str, Any]):
+        async with self._manifest_lock:
+            with open(self.manifest_path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(entry, default=str) + "\n")
+                handle.flush()
+
+    def _write_result(self, key: str, result: QueryResult) -> str:
+        import pandas as pd
+
+        os.makedirs(os.path.join(self.output_dir, "results"), exist_ok=True)
+        relative = os.path.join("results", f"{key}.{self.result_format}")
+        frame = pd.DataFrame.from_records(result.rows, columns=result.columns)
+        if self.result_format == "parquet":
+            # Decimal columns from NUMERIC are stored as float for portable Parquet files.
+            for column, kind in zip(result.columns, result.column_types):
+                if kind == "numeric":
+                    try:
+                        frame[column] = pd.to_numeric(frame[column])
+                    except (TypeError, ValueError):
+                        pass
+            _atomic_write(os.path.join(self.output_dir, relative), lambda path: frame.to_parquet(path, index=False))
+        else:
+            _atomic_write(os.path.join(self.output_dir, relative), lambda path: frame.to_csv(path, index=False))
+        return relative
+
+    def _write_chart(self, key: str, result: QueryResult, chart_type: str) -> Optional[str]:
+        chart = self.chart_generator.generate_chart(result, chart_type)
+        if isinstance(chart, str):
+            raise ValueError(chart)
+        os.makedirs(os.path.join(self.output_dir, "charts"), exist_ok=True)
+        relative = os.path.join("charts", f"{key}.png")
+        # Static export needs the optional kaleido package.
+        _atomic_write(os.path.join(self.output_dir, relative), lambda path: chart.write_image(path, format="png"))
+        return relative
+
+    async def _run_item(self, item: BatchItem, llm_slots: asyncio.Semaphore) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"key": item.key, "question": item.question, "ids": item.ids}
+        start = time.perf_counter()
+        set_llm_priority("batch")  # each gathered item runs in its own context copy
+        try:
+            # Only SQL generation holds an LLM slot; execution and file output overlap with it.
+            async with llm_slots:
+                sql_query = await self.llm_handler.agenerate_sql_query(item.question)
+            entry["sql"] = sql_query
+            if not sql_query or sql_query.startswith(("Unable to generate", "Error generating")):
+                raise ValueError(sql_query or "Could not generate SQL query")
+
+            result = await self.db_manager.aexecute_query_columnar(sql_query)
+            await asyncio.to_thread(self.llm_handler.record_success, item.question, sql_query)
+            entry.update(rows=len(result), truncated=result.truncated)
+            entry["result_path"] = await asyncio.to_thread(self._write_result, item.key, result)
+            if self.charts and len(result) > 1:
+                try:
+                    entry["chart_path"] = await asyncio.to_thread(self._write_chart, item.key, result, item.chart_type)
+                except Exception as e:
+                    # A missing chart should not force the query to run again on resume.
+                    entry["chart_error"] = str(e)
+            entry["status"] = "done"
+        except QueryRejectedError as e:
+            entry.update(status="failed", error=f"Query rejected: {str(e)}")
+        except Exception as e:
+            entry.update(status="failed", error=str(e))
+        entry["seconds"] = round(time.perf_counter() - start, 3)
+        await self._record(entry)
+        if entry["status"] == "failed":
+            self.logger.warning(f"Batch question {item.key} failed: {entry['error']}")
+        return entry
+
+    async def arun(self, items: List[BatchItem], retry_failed: bool = True) -> Dict[str, Any]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        done = self.completed_keys()
+        pending = [item for item in items if item.key not in done]
+        if not retry_failed:
+            attempted = self.manifest_entries()
+            pending = [item for item in pending if item.key not in attempted]
+        self.logger.info(
+            f"Batch: {len(items)} unique questions, {len(items) - len(pending)} already done, "
+            f"{len(pending)} to run with {self.llm_workers} LLM workers"
+        )
+
+        if pending:
+            self._ensure_components()
+        self._manifest_lock = asyncio.Lock()
+        llm_slots = asyncio.Semaphore(self.llm_workers)
+        start = time.perf_counter()
+        entries = await asyncio.gather(*(self._run_item(item, llm_slots) for item in pending))
+        elapsed = time.perf_counter() - start
+        return {
+            "unique_questions": len(items),
+            "skipped": len(items) - len(pending),
+            "done": sum(entry["status"] == "done" for entry in entries),
+            "failed": sum(entry["status"] == "failed" for entry in entries),
+            "seconds": elapsed,
+            "questions_per_minute": len(entries) / elapsed * 60 if entries and elapsed else 0.0,
+        }
+
+    def run(self, items: List[BatchItem], retry_failed: bool = True) -> Dict[str, Any]:
+        return asyncio.run(self.arun(items, retry_failed))
@@ -0,0 +1,88 @@
+# src/cli.py
+"""Command-line entry points for offline work.
+
+Usage:
+    python -m src.cli batch questions.jsonl --output reports/nightly --llm-workers 4
+    python -m src.cli index                     # embed schema + curated examples into CHROMA_PATH
+    python -m src.cli rollups [--full]          # create or incrementally refresh the rollup tables
+"""
+
+import argparse
+import json
+import sys
+import time
+from config.config import BatchConfig, DatabaseConfig, IndexConfig
+from src.utils.logger import Logger
+
+def run_batch(args) -> int:
+    from src.batch import BatchRunner, read_questions
+
+    with open(args.questions, encoding="utf-8") as handle:
+        items = read_questions(handle)
+    runner = BatchRunner(
+        args.output,
+        llm_workers=args.llm_workers,
+        result_format=args.format,
+        charts=not args.no_charts
+    )
+    summary = runner.run(items, retry_failed=not args.skip_failed)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+def run_index(args) -> int:
+    from src.llm.query_generator import QueryGenerator
+
+    IndexConfig.CHROMA_PATH = args.chroma_path
+    IndexConfig.EMBED_BATCH_SIZE = args.batch_size
+    start = time.perf_counter()
+    generator = QueryGenerator(DatabaseConfig.get_db_config())
+    generator.example_store.path = args.examples
+    loaded = time.perf_counter()
+    summary = {
+        "chroma_path": args.chroma_path,
+        "schema": generator.schema_retriever.index(generator.schema_cache.get_snapshot(), force=args.rebuild),
+        "examples": generator.example_store.index(force=args.rebuild),
+        "semantic_cache_entries": generator.semantic_cache.get_stats()["entries"],
+        "load_seconds": round(loaded - start, 3),
+        "index_seconds": round(time.perf_counter() - loaded, 3),
+    }
+    print(json.dumps(summary, indent=2))
+    return 0
+
+def run_rollups(args) -> int:
+    from src.database.db_manager import DatabaseManager
+
+    report = DatabaseManager().refresh_rollups(full=args.full)
+    print(json.dumps(report, indent=2, default=str))
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="answer a JSONL file of questions into an output directory")
+    batch.add_argument("questions", help='JSONL with {"id", "question", "chart_type"} per line (or plain text lines)')
+    batch.add_argument("--output", default=BatchConfig.OUTPUT_DIR, help="results, charts and manifest.jsonl go here")
+    batch.add_argument("--llm-workers", type=int, default=BatchConfig.LLM_WORKERS, help="concurrent SQL generations")
+    batch.add_argument("--format", choices=["csv", "parquet"], default="csv", help="result file format")
+    batch.add_argument("--no-charts", action="store_true", help="skip static PNG charts")
+    batch.add_argument("--skip-failed", action="store_true", help="on resume, do not retry questions that failed")
+    batch.set_defaults(handler=run_batch)
+
+    index = commands.add_parser("index", help="precompute schema and example embeddings into the persistent index")
+    index.add_argument("--chroma-path", default=IndexConfig.CHROMA_PATH, help="persistent Chroma directory")
+    index.add_argument("--examples", default=IndexConfig.EXAMPLES_PATH, help="curated question/SQL JSONL")
+    index.add_argument("--batch-size", type=int, default=IndexConfig.EMBED_BATCH_SIZE, help="texts per embedding call")
+    index.add_argument("--rebuild", action="store_true", help="re-embed everything, not just changed items")
+    index.set_defaults(handler=run_index)
+
+    rollups = commands.add_parser("rollups", help="create or incrementally refresh the pre-aggregated rollup tables")
+    rollups.add_argument("--full", action="store_true", help="rebuild from scratch (after updates or deletes)")
+    rollups.set_defaults(handler=run_rollups)
+
+    args = parser.parse_args(argv)
+    Logger.setup_logging()
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+from typing import Dict, List, Optional, Tuple
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+import psycopg2
+from config.config import DatabaseConfig
+from .connection_pool import get_pool
+from .query_guard import QueryGuard
+from .query_result import QueryResult
+
+# Statements that return rows (and can be wrapped in a cursor or subquery).
+ROW_RETURNING = re.compile(r"^\s*(?:--[^\n]*\n\s*|/\*.*?\*/\s*|\(\s*)*(select|with|values|table)\b", re.I | re.S)
+
+# Cheap change detector: hashes relation/column/FK catalog rows for the public
+# schema without touching the information_schema views.
+PG_FINGERPRINT_QUERY = """
+    SELECT md5(
+        COALESCE((
+            SELECT string_agg(
+                c.oid::text || ':' || c.relname || ':' || a.attnum::text || ':' ||
+                a.attname || ':' || a.atttypid::text || ':' || a.attnotnull::text,
+                ',' ORDER BY c.oid, a.attnum
+            )
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            JOIN pg_attribute a ON a.attrelid = c.oid
+            WHERE n.nspname = 'public'
+                AND c.relkind IN ('r', 'v', 'm', 'p')
+                AND a.attnum > 0
+                AND NOT a.attisdropped
+        ), '') || '|' ||
+        COALESCE((
+            SELECT string_agg(con.oid::text, ',' ORDER BY con.oid)
+            FROM pg_constraint con
+            JOIN pg_namespace n ON n.oid = con.connamespace
+            WHERE n.nspname = 'public' AND con.contype = 'f'
+        ), '')
+    );
+"""
+
+PG_INTROSPECTION_QUERY = """
+    WITH fk_info AS (
+        SELECT
+            tc.table_name,
+            kcu.column_name,
+            ccu.table_name AS foreign_table_name,
+            ccu.column_name AS foreign_column_name
+        FROM information_schema.table_constraints tc
+        JOIN information_schema.key_column_usage kcu
+            ON tc.constraint_name = kcu.constraint_name
+            AND tc.table_schema = kcu.table_schema
+        JOIN information_schema.constraint_column_usage ccu
+            ON ccu.constraint_name = tc.constraint_name
+            AND ccu.table_schema = tc.table_schema
+        WHERE tc.constraint_type = 'FOREIGN KEY'
+            AND tc.table_schema = 'public'
+    )
+    SELECT
+        t.table_name,
+        c.column_name,
+        c.data_type,
+        c.is_nullable = 'NO' AS not_null,
+        fk.foreign_table_name,
+        fk.foreign_column_name
+    FROM information_schema.tables t
+    JOIN information_schema.columns c
+        ON c.table_name = t.table_name
+        AND c.table_schema = t.table_schema
+    LEFT JOIN fk_info fk
+        ON fk.table_name = t.table_name
+        AND fk.column_name = c.column_name
+    WHERE t.table_schema = 'public'
+    ORDER BY t.table_name, c.ordinal_position;
+"""
+
+DUCKDB_FINGERPRINT_QUERY = """
+    SELECT md5(COALESCE(string_agg(
+        table_name || ':' || column_name || ':' || data_type || ':' || is_nullable,
+        ',' ORDER BY table_name, ordinal_position
+    ), ''))
+    FROM information_schema.columns
+    WHERE table_schema = 'main'
+"""
+
+DUCKDB_INTROSPECTION_QUERY = """
+    SELECT table_name, column_name, data_type, is_nullable = 'NO', NULL, NULL
+    FROM information_schema.columns
+    WHERE table_schema = 'main'
+    ORDER BY table_name, ordinal_position
+"""
+
+
+class QueryHandle:
+    """Lets another thread cancel the statement currently running for a request."""
+
+    def __init__(self):
+        self._cancel = None
+        self._lock = threading.Lock()
+
+    def attach(self, cancel):
+        with self._lock:
+            self._cancel = cancel
+
+    def detach(self):
+        # Must happen before the connection is reused, or a late cancel()
+        # could abort another request's statement.
+        with self._lock:
+            self._cancel = None
+
+    def cancel(self):
+        with self._lock:
+            if self._cancel is not None:
+                self._cancel()
+
+
+def fetch_bounded(cur, max_rows: int, batch_size: int) -> Tuple[List[tuple], bool]:
+    """Fetch at most ``max_rows`` rows in batches; the flag is True if more were available."""
+    logger = logging.getLogger(__name__)
+    rows: List[tuple] = []
+    while True:
+        # Ask for one row past the cap so we can tell "exactly max_rows" from "more".
+        batch = cur.fetchmany(min(batch_size, max_rows + 1 - len(rows)))
+        if not batch:
+            return rows, False
+        rows.extend(batch)
+        if len(rows) > max_rows:
+            del rows[max_rows:]
+            logger.warning(f"Result truncated at {max_rows} rows")
+            return rows, True
+
+
+class PostgresBackend:
+    """PostgreSQL over the shared connection pool, guarded by EXPLAIN and statement_timeout."""
+
+    name = "postgres"
+    dialect = "PostgreSQL"
+    sqlglot_dialect = "postgres"
+
+    def __init__(self, db_config: Dict[str, str]):
+        self.db_config = db_config
+        self.pool = get_pool(db_config)
+        self.guard = QueryGuard()
+        self.logger = logging.getLogger(__name__)
+
+    def connect(self):
+        return psycopg2.connect(**self.db_config)
+
+    def execute(self, query: str, max_rows: int, handle: Optional[QueryHandle] = None) -> QueryResult:
+        """Row-returning statements are checked with EXPLAIN, then read through a
+        named server-side cursor, so rows beyond the cap are never transferred."""
+        with self.pool.connection() as conn:
+            if handle is not None:
+                handle.attach(lambda: conn.closed or conn.cancel())
+            try:
+                row_returning = bool(ROW_RETURNING.match(query))
+                estimate = None
+                with conn.cursor() as cur:
+                    self.guard.apply_timeout(cur)
+                    if row_returning:
+                        query, estimate = self.guard.preflight(cur, query, max_rows + 1)
+
+                if row_returning:
+                    cursor = conn.cursor(name=f"rsa_{uuid.uuid4().hex}")
+                    cursor.itersize = DatabaseConfig.FETCH_BATCH_SIZE
+                else:
+                    cursor = conn.cursor()
+                start = time.perf_counter()
+                with cursor as cur:
+                    cur.execute(query)
+                    if cur.name is None and cur.description is None:
+                        return QueryResult()
+                    rows, truncated = fetch_bounded(cur, max_rows, DatabaseConfig.FETCH_BATCH_SIZE)
+                    # Named cursors only expose their description after the first fetch.
+                    result = QueryResult.from_description(cur.description, rows, truncated)
+                if estimate is not None:
+                    self.logger.info(
+                        f"Query estimate cost={estimate.total_cost:.0f} rows={estimate.plan_rows:.0f}; "
+                        f"actual {(time.perf_counter() - start) * 1000:.1f} ms, {len(result)} rows"
+                    )
+                return result
+            finally:
+                if handle is not None:
+                    handle.detach()
+
+    def run_in_transaction(self, work):
+        """Run ``work(cursor)`` in one committed transaction, without the guard; for maintenance such as rollups."""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                return work(cur)
+
+    def schema_fingerprint(self) -> str:
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(PG_FINGERPRINT_QUERY)
+                return cur.fetchone()[0]
+
+    def schema_rows(self) -> List[tuple]:
+        """(table, column, data type, not null, FK table, FK column) per column."""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(PG_INTROSPECTION_QUERY)
+                return cur.fetchall()
+
+
+class DuckDBBackend:
+    """Embedded DuckDB database file for local/offline deployments, tests and benchmarks."""
+
+    name = "duckdb"
+    dialect = "DuckDB (PostgreSQL-like; use strftime(timestamp_column, '%Y-%m') instead of TO_CHAR)"
+    sqlglot_dialect = "duckdb"
+
+    def __init__(self, path: Optional[str] = None, statement_timeout_ms: Optional[int] = None):
+        import duckdb
+
+        self.path = DatabaseConfig.DUCKDB_PATH if path is None else path
+        self.statement_timeout_ms = (
+            DatabaseConfig.STATEMENT_TIMEOUT_MS if statement_timeout_ms is None else statement_timeout_ms
+        )
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._root = duckdb.connect(self.path)
+        self.logger = logging.getLogger(__name__)
+
+    def connect(self):
+        # Each cursor is an independent connection to the same database, safe to use per thread.
+        return self._root.cursor()
+
+    def execute(self, query: str, max_rows: int, handle: Optional[QueryHandle] = None) -> QueryResult:
+        conn = self.connect()
+        timer = None
+        if handle is not None:
+            handle.attach(conn.interrupt)
+        if self.statement_timeout_ms:
+            timer = threading.Timer(self.statement_timeout_ms / 1000, conn.interrupt)
+            timer.start()
+        try:
+            if ROW_RETURNING.match(query):
+                query = query.strip().rstrip(";")
+                conn.execute(f"SELECT * FROM (\n{query}\n) AS bounded_query LIMIT {int(max_rows) + 1}")
+                rows, truncated = fetch_bounded(conn, max_rows, DatabaseConfig.FETCH_BATCH_SIZE)
+                return QueryResult.from_description(conn.description, rows, truncated)
+            conn.execute(query)
+            return QueryResult()
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if handle is not None:
+                handle.detach()
+            conn.close()
+
+    def run_in_transaction(self, work):
+        """Run ``work(cursor)`` in one committed transaction, without the timeout; for maintenance such as rollups."""
+        conn = self.connect()
+        try:
+            conn.begin()
+            value = work(conn)
+            conn.commit()
+            return value
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def schema_fingerprint(self) -> str:
+        conn = self.connect()
+        try:
+            return conn.execute(DUCKDB_FINGERPRINT_QUERY).fetchone()[0]
+        finally:
+            conn.close()
+
+    def schema_rows(self) -> List[tuple]:
+        conn = self.connect()
+        try:
+            return conn.execute(DUCKDB_INTROSPECTION_QUERY).fetchall()
+        finally:
+            conn.close()
+
+
+_backends: Dict[tuple, object] = {}
+_backends_lock = threading.Lock()
+
+def get_backend(db_config: Optional[Dict[str, str]] = None, backend: Optional[str] = None):
+    """Return the process-wide backend selected by ``DB_BACKEND`` (postgres or duckdb)."""
+    backend = (backend or DatabaseConfig.DB_BACKEND).lower()
+    if backend == "duckdb":
+        key = (backend, DatabaseConfig.DUCKDB_PATH)
+    elif backend == "postgres":
+        db_config = db_config or DatabaseConfig.get_db_config()
+        key = (backend,) + tuple(sorted((k, str(v)) for k, v in db_config.items()))
+    else:
+        raise ValueError(f"Unsupported DB_BACKEND: {backend}")
+
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = DuckDBBackend() if backend == "duckdb" else PostgresBackend(db_config)
+        return _backends[key]
@@ -0,0 +1,297 @@
+# src/database/bulk_loader.py
+"""Stream a SQL dump of single-row INSERTs into PostgreSQL using batched COPY.
+
+Usage:
+    python -m src.database.bulk_loader ParchPosey-database.sql
+    python -m src.database.bulk_loader dump.sql --batch-rows 50000 --foreign-keys
+    python -m src.database.bulk_loader ParchPosey-database.sql --duckdb data/parch.duckdb
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import io
+import logging
+import re
+import time
+import psycopg2
+from config.config import DatabaseConfig
+
+INSERT_PREFIX = re.compile(r"^\s*INSERT\s+INTO\s+(\"[^\"]+\"|[\w.]+)\s*(\([^)]*\))?\s*VALUES\s*", re.I)
+VALUE_TOKEN = re.compile(r"\s*(?:'((?:[^']|'')*)'|([^,()'\s]+))\s*([,)])", re.S)
+SKIPPED_STATEMENTS = re.compile(r"^\s*(CREATE\s+DATABASE|START\s+TRANSACTION|BEGIN|COMMIT)\b", re.I)
+
+def iter_statements(lines: Iterable[str]) -> Iterator[str]:
+    """Yield complete statements from a dump, one buffered statement at a time."""
+    buffer: List[str] = []
+    quotes = 0
+    for line in lines:
+        if not buffer and not line.strip():
+            continue
+        if quotes % 2 == 0 and line.lstrip().startswith("--"):
+            continue  # a comment line, whose apostrophes must not count (inside a string it is data)
+        buffer.append(line)
+        quotes += line.count("'")
+        if quotes % 2 == 0 and line.rstrip().endswith(";"):
+            yield "".join(buffer).strip()
+            buffer, quotes = [], 0
+    if buffer and "".join(buffer).strip():
+        yield "".join(buffer).strip()
+
+def parse_values(text: str) -> List[tuple]:
+    """Parse ``(1,'a',NULL),(2,'b',3.5);`` into Python tuples (strings and None)."""
+    rows = []
+    position = 0
+    length = len(text)
+    while position < length:
+        start = text.find("(", position)
+        if start == -1:
+            break
+        position = start + 1
+        row = []
+        while True:
+            match = VALUE_TOKEN.match(text, position)
+            if match is None:
+                raise ValueError(f"Cannot parse VALUES near: {text[position:position + 60]!r}")
+            quoted, bare, terminator = match.groups()
+            if quoted is not None:
+                row.append(quoted.replace("''", "'"))
+            elif bare.upper() == "NULL":
+                row.append(None)
+            else:
+                row.append(bare)
+            position = match.end()
+            if terminator == ")":
+                break
+        rows.append(tuple(row))
+    return rows
+
+def parse_columns(text: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """``(id, "Name")`` -> ("id", '"Name"'); None when an INSERT has no column list."""
+    if not text:
+        return None
+    return tuple(column.strip() for column in text.strip()[1:-1].split(","))
+
+def iter_dump(path: str) -> Iterator[Tuple[str, str, Optional[List[tuple]], Optional[Tuple[str, ...]]]]:
+    """Yield ("rows", table, rows, columns) for INSERTs and ("sql", statement, None, None) otherwise.
+
+    ``columns`` is None when the INSERT lists no columns (rows are in table order).
+    """
+    with open(path, encoding="utf-8") as handle:
+        for statement in iter_statements(handle):
+            if SKIPPED_STATEMENTS.match(statement):
+                continue
+            match = INSERT_PREFIX.match(statement)
+            if match:
+                yield "rows", match.group(1), parse_values(statement[match.end():]), parse_columns(match.group(2))
+            else:
+                yield "sql", statement, None, None
+
+def copy_escape(value: Optional[str]) -> str:
+    if value is None:
+        return "\\N"
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class BulkLoader:
+    """Buffers parsed rows per table and ships them with ``COPY ... FROM STDIN``."""
+
+    def __init__(self, conn, batch_rows: int = 10000):
+        self.conn = conn
+        self.batch_rows = batch_rows
+        self.logger = logging.getLogger(__name__)
+        # Keyed by (table, columns): INSERTs naming different column lists need separate COPYs.
+        self._buffers: Dict[Tuple[str, Optional[Tuple[str, ...]]], io.StringIO] = {}
+        self._pending: Dict[Tuple[str, Optional[Tuple[str, ...]]], int] = {}
+        self.row_counts: Dict[str, int] = {}
+
+    @staticmethod
+    def _target(table: str, columns: Optional[Tuple[str, ...]]) -> str:
+        return f"{table} ({', '.join(columns)})" if columns else table
+
+    def add_rows(self, table: str, rows: List[tuple], columns: Optional[Tuple[str, ...]] = None):
+        key = (table, columns)
+        buffer = self._buffers.setdefault(key, io.StringIO())
+        for row in rows:
+            buffer.write("\t".join(copy_escape(value) for value in row))
+            buffer.write("\n")
+        self._pending[key] = self._pending.get(key, 0) + len(rows)
+        if self._pending[key] >= self.batch_rows:
+            self.flush(key)
+
+    def flush(self, key: Optional[Tuple[str, Optional[Tuple[str, ...]]]] = None):
+        keys = [key] if key else list(self._buffers)
+        with self.conn.cursor() as cur:
+            for table, columns in keys:
+                buffer = self._buffers.pop((table, columns), None)
+                count = self._pending.pop((table, columns), 0)
+                if buffer is None or not count:
+                    continue
+                buffer.seek(0)
+                cur.copy_expert(f"COPY {self._target(table, columns)} FROM STDIN", buffer)
+                self.row_counts[table] = self.row_counts.get(table, 0) + count
+
+    def execute(self, statement: str):
+        # Earlier rows must land before DDL or other statements that may depend on them.
+        self.flush()
+        with self.conn.cursor() as cur:
+            cur.execute(statement)
+
+    def load(self, path: str) -> Dict[str, int]:
+        for kind, target, rows, columns in iter_dump(path):
+            if kind == "rows":
+                self.add_rows(target, rows, columns)
+            else:
+                self.execute(target)
+        self.flush()
+        return self.row_counts
+
+    def create_keys(self, tables: Iterable[str], foreign_keys: bool = False):
+        """Add ``id`` primary keys, ``*_id`` indexes and optionally FK constraints after loading."""
+        tables = list(tables)
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "SELECT table_name, column_name FROM information_schema.columns "
+                "WHERE table_schema = 'public' AND table_name = ANY(%s)",
+                (tables,)
+            )
+            columns: Dict[str, List[str]] = {}
+            for table_name, column_name in cur.fetchall():
+                columns.setdefault(table_name, []).append(column_name)
+
+        statements = []
+        for table, names in columns.items():
+            if "id" in names:
+                statements.append(f"ALTER TABLE {table} ADD PRIMARY KEY (id)")
+            for column in names:
+                if column.endswith("_id") or column == "occurred_at":
+                    statements.append(f"CREATE INDEX IF NOT EXISTS {table}_{column}_idx ON {table} ({column})")
+        if foreign_keys:
+            for table, names in columns.items():
+                for column in names:
+                    stem = column[:-3] if column.endswith("_id") else None
+                    target = next(
+                        (c for c in (stem, f"{stem}s", f"{stem}es") if stem and c in columns and c != table),
+                        None
+                    )
+                    if target:
+                        statements.append(
+                            f"ALTER TABLE {table} ADD FOREIGN KEY ({column}) REFERENCES {target} (id)"
+                        )
+
+        with self.conn.cursor() as cur:
+            for statement in statements:
+                # A savepoint per statement keeps one bad key from aborting the whole load.
+                cur.execute("SAVEPOINT bulk_loader_key")
+                try:
+                    cur.execute(statement)
+                    cur.execute("RELEASE SAVEPOINT bulk_loader_key")
+                except psycopg2.Error as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT bulk_loader_key")
+                    self.logger.warning(f"Skipped '{statement}': {str(e).strip()}")
+
+
+class DuckDBBulkLoader(BulkLoader):
+    """Same dump parsing, but batches are appended to an embedded DuckDB file as DataFrames."""
+
+    def __init__(self, conn, batch_rows: int = 10000):
+        super().__init__(conn, batch_rows)
+        self._rows: Dict[Tuple[str, Optional[Tuple[str, ...]]], List[tuple]] = {}
+
+    def add_rows(self, table: str, rows: List[tuple], columns: Optional[Tuple[str, ...]] = None):
+        key = (table, columns)
+        self._rows.setdefault(key, []).extend(rows)
+        if len(self._rows[key]) >= self.batch_rows:
+            self.flush(key)
+
+    def flush(self, key: Optional[Tuple[str, Optional[Tuple[str, ...]]]] = None):
+        import pandas as pd
+
+        for table, columns in ([key] if key else list(self._rows)):
+            rows = self._rows.pop((table, columns), None)
+            if not rows:
+                continue
+            # Values are still strings; DuckDB casts them to the column types on insert.
+            batch = pd.DataFrame.from_records(rows, columns=[f"c{i}" for i in range(len(rows[0]))])
+            self.conn.register("bulk_loader_batch", batch)
+            try:
+                self.conn.execute(f"INSERT INTO {self._target(table, columns)} SELECT * FROM bulk_loader_batch")
+            finally:
+                self.conn.unregister("bulk_loader_batch")
+            self.row_counts[table] = self.row_counts.get(table, 0) + len(rows)
+
+    def execute(self, statement: str):
+        self.flush()
+        self.conn.execute(statement)
+
+    def create_keys(self, tables: Iterable[str], foreign_keys: bool = False):
+        # DuckDB prunes scans with per-block min/max zone maps; secondary
+        # indexes only slow the load down for this workload.
+        self.logger.info("DuckDB target: skipping primary keys and indexes")
+
+
+def load_duckdb(path: str, database: str, batch_rows: int) -> Tuple[Dict[str, int], float]:
+    import duckdb
+
+    conn = duckdb.connect(database)
+    try:
+        start = time.perf_counter()
+        conn.execute("BEGIN TRANSACTION")
+        row_counts = DuckDBBulkLoader(conn, batch_rows=batch_rows).load(path)
+        conn.execute("COMMIT")
+        return row_counts, time.perf_counter() - start
+    finally:
+        conn.close()
+
+
+def load_postgres(path: str, batch_rows: int, keys: bool, foreign_keys: bool) -> Tuple[Dict[str, int], float, float]:
+    conn = psycopg2.connect(**DatabaseConfig.get_db_config())
+    try:
+        loader = BulkLoader(conn, batch_rows=batch_rows)
+        start = time.perf_counter()
+        row_counts = loader.load(path)
+        load_seconds = time.perf_counter() - start
+        if keys:
+            loader.create_keys(row_counts, foreign_keys=foreign_keys)
+        conn.commit()
+        return row_counts, load_seconds, time.perf_counter() - start
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="SQL dump to load")
+    parser.add_argument("--batch-rows", type=int, default=10000, help="rows per COPY batch and table")
+    parser.add_argument("--no-keys", action="store_true", help="skip primary keys and indexes")
+    parser.add_argument("--foreign-keys", action="store_true", help="add *_id foreign key constraints")
+    parser.add_argument("--duckdb", metavar="FILE", help="load into this DuckDB file instead of PostgreSQL")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if args.duckdb:
+        row_counts, load_seconds = load_duckdb(args.path, args.duckdb, args.batch_rows)
+        total_seconds = load_seconds
+    else:
+        row_counts, load_seconds, total_seconds = load_postgres(
+            args.path, args.batch_rows, not args.no_keys, args.foreign_keys
+        )
+
+    total_rows = sum(row_counts.values())
+    for table, count in row_counts.items():
+        print(f"{table:>12}: {count:>9,} rows")
+    print(
+        f"Loaded {total_rows:,} rows in {load_seconds:.2f}s "
+        f"({total_rows / max(load_seconds, 1e-9):,.0f} rows/s); "
+        f"{total_seconds:.2f}s including keys and indexes"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+import logging
+import threading
+import time
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+from config.config import DatabaseConfig
+
+class ConnectionPool:
+    """Thread-safe, bounded PostgreSQL pool with health checks and reconnects.
+
+    Callers block when all ``max_size`` connections are checked out instead of
+    failing, and connections idle for longer than ``health_check_interval``
+    seconds are pinged before being handed out.
+    """
+
+    def __init__(
+        self,
+        db_config: Dict[str, str],
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        health_check_interval: Optional[float] = None
+    ):
+        self.db_config = db_config
+        self.min_size = DatabaseConfig.POOL_MIN_SIZE if min_size is None else min_size
+        self.max_size = DatabaseConfig.POOL_MAX_SIZE if max_size is None else max_size
+        self.health_check_interval = (
+            DatabaseConfig.POOL_HEALTH_CHECK_INTERVAL
+            if health_check_interval is None else health_check_interval
+        )
+        self.logger = logging.getLogger(__name__)
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._init_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()  # guards _last_used and stats, which every worker thread updates
+        self._last_used: Dict[Any, float] = {}  # keyed by the connection itself: ids are reused after GC
+        self.stats = {"checkouts": 0, "health_checks": 0, "reconnects": 0}
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        if self._pool is None:
+            with self._init_lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(
+                        self.min_size, self.max_size, **self.db_config
+                    )
+        return self._pool
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        with self._lock:
+            last_used = self._last_used.get(conn, 0.0)
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        self._count("health_checks")
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _checkout(self):
+        pool = self._get_pool()
+        # Every idle connection may have died together (e.g. a server restart), so keep
+        # discarding until the pool hands out a healthy or freshly opened one.
+        attempts = self.max_size + 1
+        for _ in range(attempts):
+            conn = pool.getconn()
+            if self._is_healthy(conn):
+                self._count("checkouts")
+                return conn
+            self._count("reconnects")
+            self.logger.warning("Discarding broken pooled connection and reconnecting")
+            self._discard(conn)
+        raise psycopg2.OperationalError(
+            f"No healthy database connection after {attempts} attempts"
+        )
+
+    def _discard(self, conn):
+        with self._lock:
+            self._last_used.pop(conn, None)
+        self._get_pool().putconn(conn, close=True)
+
+    @contextmanager
+    def connection(self):
+        """Yield a pooled connection, committing on success and rolling back on error."""
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                if not conn.closed:
+                    try:
+                        conn.rollback()
+                    except psycopg2.Error:
+                        pass
+                raise
+        finally:
+            if conn is not None:
+                if conn.closed:
+                    self._discard(conn)
+                else:
+                    with self._lock:
+                        self._last_used[conn] = time.monotonic()
+                    self._get_pool().putconn(conn)
+            self._slots.release()
+
+    def close(self):
+        with self._init_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+            with self._lock:
+                self._last_used.clear()
+
+
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_config: Optional[Dict[str, str]] = None) -> ConnectionPool:
+    """Return the process-wide pool for ``db_config`` (defaults to DatabaseConfig)."""
+    db_config = db_config or DatabaseConfig.get_db_config()
+    key = tuple(sorted((k, str(v)) for k, v in db_config.items()))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(db_config)
+        return _pools[key]
+
+def close_all_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
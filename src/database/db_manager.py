@@ -1,33 +1,120 @@
-from typing import Dict, List, Any
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import functools
 import logging
 from config.config import DatabaseConfig
+from src.utils.metrics import span
+from .backends import QueryHandle, ROW_RETURNING, get_backend
+from .query_result import QueryResult
+from .result_cache import ResultCache, written_tables
+from .rollups import RollupManager
+
+def _cacheable_read(query: str) -> bool:
+    # WITH ... also starts writable CTEs such as "WITH d AS (DELETE FROM orders RETURNING *) SELECT ...".
+    return bool(ROW_RETURNING.match(query)) and not written_tables(query)
 
 class DatabaseManager:
-    def __init__(self):
+    def __init__(self, backend=None):
         self.config = DatabaseConfig()
         self.logger = logging.getLogger(__name__)
+        self.backend = backend or get_backend(self.config.get_db_config())
+        self.result_cache = ResultCache()
+        # Refreshed rollups invalidate cached results that read them directly.
+        self.rollups = RollupManager(self.backend, on_refresh=self.result_cache.invalidate_table)
+        # One worker per pooled connection so async callers never wait on the pool inside a thread.
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.config.POOL_MAX_SIZE, thread_name_prefix="db"
+        )
         
     def get_connection(self):
         try:
-            return psycopg2.connect(
-                dbname=self.config.DB_NAME,
-                user=self.config.DB_USER,
-                password=self.config.DB_PASSWORD,
-                host=self.config.DB_HOST,
-                port=self.config.DB_PORT
-            )
+            return self.backend.connect()
         except Exception as e:
             self.logger.error(f"Database connection error: {str(e)}")
             raise
 
     def execute_query(self, query: str) -> List[Dict[str, Any]]:
+        return self.execute_query_columnar(query).to_dicts()
+
+    def execute_query_columnar(
+        self,
+        query: str,
+        max_rows: Optional[int] = None,
+        handle: Optional[QueryHandle] = None,
+        probed: bool = False
+    ) -> QueryResult:
+        """Run ``query`` keeping at most ``max_rows`` rows in memory.
+
+        Results of read-only statements are served from the result cache
+        when possible (pass ``probed`` if ``cached_result`` already missed),
+        and otherwise may be answered from a rollup table (see
+        RollupManager.route); ``truncated`` is set when the row cap was hit.
+        """
+        max_rows = self.config.MAX_RESULT_ROWS if max_rows is None else max_rows
+        cache_key = None
+        executed = query
+        if _cacheable_read(query):
+            cache_key = ResultCache.make_key(query, max_rows)
+            cached = None if probed else self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            executed, _ = self.rollups.route(query)
+
+        with span("db_execute") as stage:
+            try:
+                result = self.backend.execute(executed, max_rows, handle)
+            except Exception as e:
+                self.logger.error(f"Query execution error: {str(e)}")
+                raise
+            stage.set("rows", len(result))
+            if stage.recording:
+                stage.set("bytes", result.estimated_bytes())
+
+        if cache_key is not None:
+            self.result_cache.put(cache_key, query, result)
+        else:
+            for table in written_tables(query):
+                self.result_cache.invalidate_table(table)
+                self.rollups.source_written(table)
+        return result
+
+    def cached_result(self, query: str, max_rows: Optional[int] = None) -> Optional[QueryResult]:
+        """The cached result of ``query``, if any; cheap enough to call on the event loop."""
+        if not _cacheable_read(query):
+            return None
+        max_rows = self.config.MAX_RESULT_ROWS if max_rows is None else max_rows
+        return self.result_cache.get(ResultCache.make_key(query, max_rows))
+
+    def refresh_rollups(self, full: bool = False) -> Dict[str, Any]:
+        """Create missing rollup tables and bring the others up to date."""
+        return self.rollups.refresh(full=full)
+
+    def invalidate_table(self, table: str) -> int:
+        """Hook for writers outside this process: drop cached results reading ``table``."""
+        return self.result_cache.invalidate_table(table)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return {"result": self.result_cache.get_stats(), "rollups": self.rollups.get_stats()}
+
+    async def _run_in_executor(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        # run_in_executor does not carry contextvars over (unlike asyncio.to_thread),
+        # so copy them explicitly to keep the request ID on database log records.
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, fn, *args))
+
+    async def aexecute_query(self, query: str) -> List[Dict[str, Any]]:
+        return await self._run_in_executor(self.execute_query, query)
+
+    async def aexecute_query_columnar(
+        self, query: str, max_rows: Optional[int] = None, probed: bool = False
+    ) -> QueryResult:
+        handle = QueryHandle()
         try:
-            with self.get_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                    cur.execute(query)
-                    return cur.fetchall()
-        except Exception as e:
-            self.logger.error(f"Query execution error: {str(e)}")
-            raise 
\ No newline at end of file
+            return await self._run_in_executor(self.execute_query_columnar, query, max_rows, handle, probed)
+        except asyncio.CancelledError:
+            # The worker thread keeps running; ask the database to abort the statement.
+            handle.cancel()
+            raise
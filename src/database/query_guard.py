@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import logging
+import re
+from config.config import DatabaseConfig
+
+TRAILING_LIMIT = re.compile(r"\blimit\s+(\d+|all)(\s+offset\s+\d+)?\s*$", re.I)
+
+class QueryRejectedError(Exception):
+    """Raised when a query's planner estimate exceeds the configured cost limit."""
+
+
+@dataclass
+class PlanEstimate:
+    total_cost: float
+    plan_rows: float
+
+
+class QueryGuard:
+    """EXPLAIN-based pre-flight checks and statement timeouts for generated SQL."""
+
+    def __init__(
+        self,
+        max_cost: Optional[float] = None,
+        max_rows: Optional[float] = None,
+        statement_timeout_ms: Optional[int] = None
+    ):
+        self.max_cost = DatabaseConfig.QUERY_MAX_COST if max_cost is None else max_cost
+        self.max_rows = DatabaseConfig.QUERY_MAX_ESTIMATED_ROWS if max_rows is None else max_rows
+        self.statement_timeout_ms = (
+            DatabaseConfig.STATEMENT_TIMEOUT_MS if statement_timeout_ms is None else statement_timeout_ms
+        )
+        self.logger = logging.getLogger(__name__)
+
+    def apply_timeout(self, cur):
+        # SET LOCAL only lasts for the current transaction, so pooled connections stay clean.
+        if self.statement_timeout_ms:
+            cur.execute("SET LOCAL statement_timeout = %s", (int(self.statement_timeout_ms),))
+
+    def estimate(self, cur, query: str) -> PlanEstimate:
+        cur.execute(f"EXPLAIN (FORMAT JSON) {query}")
+        plan = cur.fetchone()[0][0]["Plan"]
+        return PlanEstimate(total_cost=plan["Total Cost"], plan_rows=plan["Plan Rows"])
+
+    def preflight(self, cur, query: str, row_limit: int) -> Tuple[str, PlanEstimate]:
+        """Return the (possibly rewritten) query to run and the planner estimate.
+
+        Raises QueryRejectedError when the estimated cost is over ``max_cost``;
+        queries expected to return more than ``max_rows`` rows and that have no
+        LIMIT of their own are wrapped with ``LIMIT row_limit``.
+        """
+        query = query.strip().rstrip(";").strip()
+        estimate = self.estimate(cur, query)
+        if self.max_cost and estimate.total_cost > self.max_cost:
+            raise QueryRejectedError(
+                f"estimated cost {estimate.total_cost:,.0f} exceeds the limit of {self.max_cost:,.0f}; "
+                f"try narrowing the question (filters, date ranges or fewer joins)"
+            )
+        if self.max_rows and estimate.plan_rows > self.max_rows and not TRAILING_LIMIT.search(query):
+            self.logger.info(
+                f"Adding LIMIT {row_limit} to query estimated at {estimate.plan_rows:,.0f} rows"
+            )
+            query = f"SELECT * FROM (\n{query}\n) AS guarded_query LIMIT {int(row_limit)}"
+        return query, estimate
@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+import sys
+
+# PostgreSQL type OIDs grouped into the coarse kinds charts and formatting care about.
+NUMERIC_TYPE_CODES = {20, 21, 23, 26, 700, 701, 790, 1700}
+TEMPORAL_TYPE_CODES = {1082, 1083, 1114, 1184, 1186, 1266}
+BOOLEAN_TYPE_CODES = {16}
+
+# DuckDB reports type names (e.g. "DECIMAL(10,2)", "TIMESTAMP WITH TIME ZONE") instead of OIDs.
+NUMERIC_TYPE_NAMES = {
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+    "UINTEGER", "UBIGINT", "UHUGEINT", "FLOAT", "DOUBLE", "DECIMAL", "NUMBER"
+}
+TEMPORAL_TYPE_NAMES = {"DATE", "TIME", "TIMESTAMP", "INTERVAL", "DATETIME"}
+
+def classify_type_code(type_code: Any) -> str:
+    if isinstance(type_code, int):
+        if type_code in NUMERIC_TYPE_CODES:
+            return "numeric"
+        if type_code in TEMPORAL_TYPE_CODES:
+            return "temporal"
+        if type_code in BOOLEAN_TYPE_CODES:
+            return "boolean"
+        return "text"
+
+    words = str(type_code).upper().split("(")[0].split() if type_code is not None else []
+    base = words[0] if words else ""
+    if base in NUMERIC_TYPE_NAMES:
+        return "numeric"
+    if base.startswith("TIMESTAMP") or base in TEMPORAL_TYPE_NAMES:
+        return "temporal"
+    if base in ("BOOLEAN", "BOOL"):
+        return "boolean"
+    return "text"
+
+
+@dataclass
+class QueryResult:
+    """Column-oriented query result: one tuple per row plus column metadata."""
+
+    columns: List[str] = field(default_factory=list)
+    rows: List[tuple] = field(default_factory=list)
+    column_types: List[str] = field(default_factory=list)
+    truncated: bool = False
+
+    @classmethod
+    def from_description(cls, description, rows: List[tuple], truncated: bool = False) -> "QueryResult":
+        if description is None:
+            return cls(rows=[], truncated=False)
+        return cls(
+            columns=[col[0] for col in description],
+            rows=rows,
+            column_types=[classify_type_code(col[1]) for col in description],
+            truncated=truncated
+        )
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def column(self, name: str) -> List[Any]:
+        index = self.columns.index(name)
+        return [row[index] for row in self.rows]
+
+    def to_columns(self) -> Dict[str, List[Any]]:
+        """Column name -> values, without building a dict per row."""
+        if not self.rows:
+            return {name: [] for name in self.columns}
+        return {name: list(values) for name, values in zip(self.columns, zip(*self.rows))}
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+    def estimated_bytes(self) -> int:
+        """Approximate in-memory size of the rows (used for cache budgets and metrics)."""
+        size = sys.getsizeof(self.rows)
+        for row in self.rows:
+            size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+        return size
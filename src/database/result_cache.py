@@ -0,0 +1,260 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+import hashlib
+import logging
+import re
+import threading
+import time
+from config.config import CacheConfig
+from .query_result import QueryResult
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<ws>\s+)
+    | (?P<comment>--[^\n]*|/\*.*?\*/)
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<qident>"(?:[^"]|"")*")
+    | (?P<number>\d+(?:\.\d+)?)
+    | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+    | (?P<op>::|<=|>=|<>|!=|\|\||.)
+""", re.X | re.S)
+
+# Words that can follow a table reference but are never a table alias.
+CLAUSE_KEYWORDS = {
+    "where", "join", "inner", "left", "right", "full", "outer", "cross", "natural",
+    "on", "using", "group", "order", "limit", "offset", "having", "union", "except",
+    "intersect", "window", "fetch", "for", "lateral", "tablesample", "returning",
+    "set", "values", "select"
+}
+
+# Keyword sequences that put a table being written next, with optional words in brackets.
+WRITE_PREFIXES = [
+    ("insert", "into"), ("update",), ("delete", "from"), ("merge", "into"), ("truncate", "[table]"),
+    ("alter", "table", "[if]", "[exists]"), ("drop", "table", "[if]", "[exists]"),
+    ("refresh", "materialized", "view", "[concurrently]"), ("copy",),
+]
+# UPDATE after these is a row lock or an ON CONFLICT action, not an UPDATE statement.
+NOT_UPDATE_STATEMENT = {"for", "key", "do", "on"}
+
+def _tokens(sql: str) -> List[Tuple[str, str]]:
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(sql):
+        kind = match.lastgroup
+        if kind in ("ws", "comment"):
+            continue
+        value = match.group()
+        if kind == "word":
+            value = value.lower()
+        tokens.append((kind, value))
+    while tokens and tokens[-1] == ("op", ";"):
+        tokens.pop()
+    return tokens
+
+def _identifier(token: Tuple[str, str]) -> str:
+    kind, value = token
+    return value[1:-1].replace('""', '"') if kind == "qident" else value
+
+def _table_references(tokens: List[Tuple[str, str]]) -> Tuple[Set[str], Dict[int, str]]:
+    """Return (tables, token index -> alias) for FROM/JOIN clauses."""
+    tables: Set[str] = set()
+    alias_positions: Dict[int, str] = {}
+    cte_names = {
+        tokens[i][1] for i in range(len(tokens) - 2)
+        if tokens[i][0] == "word" and tokens[i + 1] == ("word", "as") and tokens[i + 2] == ("op", "(")
+    }
+
+    # One entry per open parenthesis: True for subqueries, False for function
+    # calls such as EXTRACT(YEAR FROM ...), whose FROM is not a table clause.
+    paren_stack: List[bool] = []
+    i = 0
+    while i < len(tokens):
+        if tokens[i] == ("op", "("):
+            paren_stack.append(
+                i + 1 < len(tokens) and tokens[i + 1] in (("word", "select"), ("word", "with"), ("word", "values"))
+            )
+        elif tokens[i] == ("op", ")") and paren_stack:
+            paren_stack.pop()
+        in_query = not paren_stack or paren_stack[-1]
+        if not in_query or tokens[i] not in (("word", "from"), ("word", "join")):
+            i += 1
+            continue
+        allow_list = tokens[i][1] == "from"
+        j = i + 1
+        while j < len(tokens) and tokens[j][0] in ("word", "qident") and tokens[j][1] not in CLAUSE_KEYWORDS:
+            name = _identifier(tokens[j])
+            j += 1
+            while j + 1 < len(tokens) and tokens[j] == ("op", ".") and tokens[j + 1][0] in ("word", "qident"):
+                name = _identifier(tokens[j + 1])
+                j += 2
+            if name not in cte_names:
+                tables.add(name)
+            if j < len(tokens) and tokens[j] == ("word", "as"):
+                j += 1
+            if j < len(tokens) and tokens[j][0] in ("word", "qident") and tokens[j][1] not in CLAUSE_KEYWORDS:
+                alias_positions[j] = _identifier(tokens[j])
+                j += 1
+            if allow_list and j < len(tokens) and tokens[j] == ("op", ","):
+                j += 1
+                continue
+            break
+        i = max(j, i + 1)
+    return tables, alias_positions
+
+def _match_prefix(tokens: List[Tuple[str, str]], i: int, prefix: Tuple[str, ...]) -> Optional[int]:
+    """Index just past ``prefix`` (and an optional ONLY) starting at token ``i``, or None."""
+    for word in prefix:
+        if word.startswith("["):
+            if i < len(tokens) and tokens[i] == ("word", word[1:-1]):
+                i += 1
+        elif i < len(tokens) and tokens[i] == ("word", word):
+            i += 1
+        else:
+            return None
+    if i < len(tokens) and tokens[i] == ("word", "only"):
+        i += 1
+    return i
+
+def _table_name(tokens: List[Tuple[str, str]], i: int) -> Optional[str]:
+    """The (possibly schema-qualified) table name starting at token ``i``, without its schema."""
+    if i >= len(tokens) or tokens[i][0] not in ("word", "qident"):
+        return None
+    if tokens[i][0] == "word" and (tokens[i][1] in CLAUSE_KEYWORDS or tokens[i][1] == "from"):
+        return None  # a column that happens to be called copy/update, as in "SELECT copy FROM t"
+    name = _identifier(tokens[i])
+    while i + 2 < len(tokens) and tokens[i + 1] == ("op", ".") and tokens[i + 2][0] in ("word", "qident"):
+        name = _identifier(tokens[i + 2])
+        i += 2
+    return name.lower()
+
+def referenced_tables(sql: str) -> Set[str]:
+    return {name.lower() for name in _table_references(_tokens(sql))[0]}
+
+def written_tables(sql: str) -> Set[str]:
+    """Tables modified by INSERT/UPDATE/DELETE/MERGE/TRUNCATE/ALTER/DROP/COPY statements.
+
+    Works on tokens, so words inside string literals and comments never count.
+    """
+    tokens = _tokens(sql)
+    tables = set()
+    for i, (kind, value) in enumerate(tokens):
+        if kind != "word":
+            continue
+        if value == "update" and i > 0 and tokens[i - 1][0] == "word" and tokens[i - 1][1] in NOT_UPDATE_STATEMENT:
+            continue
+        for prefix in WRITE_PREFIXES:
+            if prefix[0] != value:
+                continue
+            end = _match_prefix(tokens, i, prefix)
+            name = _table_name(tokens, end) if end is not None else None
+            if name is not None:
+                tables.add(name)
+    return tables
+
+def canonicalize_sql(sql: str) -> str:
+    """Normalize whitespace, comments, keyword/identifier case and table aliases.
+
+    Table aliases are renamed to t1, t2, ... in order of appearance so that
+    ``FROM orders o`` and ``FROM orders AS ord`` produce the same key.
+    """
+    tokens = _tokens(sql)
+    _, alias_positions = _table_references(tokens)
+    renames: Dict[str, str] = {}
+    for position in sorted(alias_positions):
+        renames.setdefault(alias_positions[position], f"t{len(renames) + 1}")
+
+    parts = []
+    for index, (kind, value) in enumerate(tokens):
+        if kind == "word" and value == "as" and index + 1 in alias_positions:
+            continue
+        name = _identifier((kind, value)) if kind in ("word", "qident") else None
+        is_qualifier = index + 1 < len(tokens) and tokens[index + 1] == ("op", ".")
+        if name in renames and (index in alias_positions or is_qualifier):
+            value = renames[name]
+        parts.append(value)
+    return " ".join(parts)
+
+
+class ResultCache:
+    """TTL + byte-bounded LRU of query results with per-table invalidation."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.ttl_seconds = CacheConfig.RESULT_CACHE_TTL if ttl_seconds is None else ttl_seconds
+        self.max_bytes = CacheConfig.RESULT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.logger = logging.getLogger(__name__)
+        self._entries: "OrderedDict[str, Tuple[QueryResult, Set[str], int, float]]" = OrderedDict()
+        self._by_table: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def make_key(sql: str, max_rows: Optional[int] = None) -> str:
+        raw = f"{canonicalize_sql(sql)}\x00{max_rows}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[QueryResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if entry[3] <= time.monotonic():
+                self._remove(key)
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key: str, sql: str, result: QueryResult):
+        size = result.estimated_bytes()
+        if size > self.max_bytes:
+            return
+        tables = referenced_tables(sql)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, tables, size, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            self.stats["stores"] += 1
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def invalidate_table(self, table: str) -> int:
+        """Drop every cached result that read from ``table``."""
+        with self._lock:
+            keys = list(self._by_table.get(table.lower(), ()))
+            for key in keys:
+                self._remove(key)
+            self.stats["invalidations"] += len(keys)
+        if keys:
+            self.logger.info(f"Invalidated {len(keys)} cached results for table {table}")
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        _, tables, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_ratio": self.stats["hits"] / lookups if lookups else 0.0
+            }
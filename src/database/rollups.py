@@ -0,0 +1,596 @@
+"""Pre-aggregated rollup tables over the fact tables, their incremental refresh, and rewriting SQL onto them.
+
+Rollups are ordinary tables (``rollup_*``) grouped by month, sales rep and
+region (and channel for web events), created by ``python -m src.cli rollups``.
+``rollup_state`` records the highest source id folded into each one; a refresh
+recomputes only the months touched by rows above that watermark, so source
+tables are assumed to be append-only with increasing ids. In-process writes
+mark a rollup for a full rebuild; after edits made elsewhere run
+``python -m src.cli rollups --full``.
+
+sqlglot is imported on first rewrite.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import hashlib
+import logging
+import re
+import threading
+import time
+from config.config import RollupConfig
+from src.utils.metrics import metrics
+from .result_cache import referenced_tables
+
+STATE_TABLE = "rollup_state"
+
+# Dimension tables a fact row reaches through accounts: table -> (parent table or None for the fact, parent column, key).
+DIMENSION_JOINS = {
+    "accounts": (None, "account_id", "id"),
+    "sales_reps": ("accounts", "sales_rep_id", "id"),
+    "region": ("sales_reps", "region_id", "id"),
+}
+# Joins a rewritable query may use; accounts only carries the sales rep, so it never comes alone.
+JOIN_PATHS = (frozenset(), frozenset({"accounts", "sales_reps"}), frozenset({"accounts", "sales_reps", "region"}))
+# (table, column) -> (rollup column, table that must be joined for the values to match).
+DIMENSION_COLUMNS = {
+    ("accounts", "sales_rep_id"): ("sales_rep_id", None),
+    ("sales_reps", "id"): ("sales_rep_id", None),
+    ("sales_reps", "name"): ("sales_rep_name", None),
+    ("sales_reps", "region_id"): ("region_id", "region"),
+    ("region", "id"): ("region_id", None),
+    ("region", "name"): ("region_name", None),
+}
+# Rollups keep facts without a rep/region (LEFT JOINs); an inner join to these tables excludes them.
+JOIN_FILTERS = {"sales_reps": "sales_rep_id", "region": "region_id"}
+
+TIME_COLUMN = "occurred_at"
+MONTH_STABLE_UNITS = {"MONTH", "QUARTER", "YEAR"}
+STRFTIME_DIRECTIVES = re.compile(r"%[YymbB]|[-/ .]")
+TO_CHAR_PATTERNS = re.compile(r"YYYY|YY|MONTH|Month|month|MON|Mon|mon|MM|Q|[-/ .]")
+
+
+@dataclass(frozen=True)
+class Rollup:
+    name: str
+    source: str
+    count_column: str
+    measures: Tuple[str, ...] = ()
+    dimensions: Tuple[str, ...] = ()
+    description: str = ""
+
+    @property
+    def columns(self) -> List[str]:
+        return (
+            ["month", "region_id", "region_name", "sales_rep_id", "sales_rep_name"]
+            + list(self.dimensions) + [self.count_column] + list(self.measures)
+        )
+
+    def select_sql(self, where: str = "") -> str:
+        group_size = 5 + len(self.dimensions)
+        select_list = ",\n    ".join(
+            [
+                f"DATE_TRUNC('month', f.{TIME_COLUMN}) AS month",
+                "r.id AS region_id", "r.name AS region_name", "s.id AS sales_rep_id", "s.name AS sales_rep_name",
+            ]
+            + [f"f.{column} AS {column}" for column in self.dimensions]
+            + [f"COUNT(*) AS {self.count_column}"]
+            + [f"SUM(f.{column}) AS {column}" for column in self.measures]
+        )
+        return (
+            f"SELECT\n    {select_list}\n"
+            f"FROM {self.source} f\n"
+            "LEFT JOIN accounts a ON f.account_id = a.id\n"
+            "LEFT JOIN sales_reps s ON a.sales_rep_id = s.id\n"
+            "LEFT JOIN region r ON s.region_id = r.id\n"
+            + (f"WHERE {where}\n" if where else "")
+            + f"GROUP BY {', '.join(str(i) for i in range(1, group_size + 1))}"
+        )
+
+    def definition_hash(self) -> str:
+        return hashlib.sha1(self.select_sql().encode("utf-8")).hexdigest()[:16]
+
+
+ROLLUPS = (
+    Rollup(
+        name="rollup_orders_monthly",
+        source="orders",
+        count_column="order_count",
+        measures=(
+            "standard_qty", "gloss_qty", "poster_qty", "total",
+            "standard_amt_usd", "gloss_amt_usd", "poster_amt_usd", "total_amt_usd",
+        ),
+        description=(
+            "Pre-aggregated orders: one row per month, region and sales rep, with order_count and summed "
+            "quantities/amounts. Prefer it over joining orders, accounts, sales_reps and region for totals or "
+            "counts by month, year, region or sales rep: COUNT(*) of orders is SUM(order_count), revenue is "
+            "SUM(total_amt_usd)."
+        ),
+    ),
+    Rollup(
+        name="rollup_web_events_monthly",
+        source="web_events",
+        count_column="event_count",
+        dimensions=("channel",),
+        description=(
+            "Pre-aggregated web events: one row per month, region, sales rep and channel. Prefer it over "
+            "joining web_events, accounts, sales_reps and region for event counts by those dimensions: "
+            "COUNT(*) of web events is SUM(event_count)."
+        ),
+    ),
+)
+
+def table_description(table_name: str) -> Optional[str]:
+    return next((rollup.description for rollup in ROLLUPS if rollup.name == table_name), None)
+
+def _month_start(value) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+def _next_month(value: datetime) -> datetime:
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+def _timestamp(value: datetime) -> str:
+    return f"TIMESTAMP '{value:%Y-%m-%d %H:%M:%S}'"
+
+
+class _Ineligible(Exception):
+    pass
+
+
+def _month_aligned(node) -> bool:
+    """True for a date/timestamp literal at midnight on the first of a month."""
+    from sqlglot import exp
+
+    if isinstance(node, exp.Cast):
+        if not node.is_type("date", "timestamp", "timestamptz"):
+            return False
+        node = node.this
+    if not (isinstance(node, exp.Literal) and node.is_string):
+        return False
+    try:
+        value = datetime.fromisoformat(node.this)
+    except ValueError:
+        return False
+    return value.day == 1 and value.time() == dt_time.min
+
+def _month_stable(column) -> bool:
+    """Whether this use of the fact timestamp gives the same answer on the month-truncated value."""
+    from sqlglot import exp
+
+    parent = column.parent
+    if isinstance(parent, (exp.TimestampTrunc, exp.DateTrunc)):
+        return column.arg_key == "this" and parent.args["unit"].name.upper() in MONTH_STABLE_UNITS
+    if isinstance(parent, exp.Extract):
+        return column.arg_key == "expression" and parent.this.name.upper() in MONTH_STABLE_UNITS
+    if isinstance(parent, (exp.Year, exp.Month, exp.Quarter)):
+        return True
+    if isinstance(parent, (exp.TimeToStr, exp.ToChar)):
+        pattern = STRFTIME_DIRECTIVES if isinstance(parent, exp.TimeToStr) else TO_CHAR_PATTERNS
+        fmt = parent.args.get("format")
+        return isinstance(fmt, exp.Literal) and not pattern.sub("", fmt.this)
+    if isinstance(parent, exp.Anonymous) and parent.name.upper() in ("DATE_PART", "DATEPART"):
+        unit = parent.expressions[0] if parent.expressions else None
+        return (
+            len(parent.expressions) == 2 and parent.expressions[1] is column
+            and isinstance(unit, exp.Literal) and unit.this.upper() in MONTH_STABLE_UNITS
+        )
+    # ts >= first-of-month and ts < first-of-month hold exactly when they hold for the month.
+    if isinstance(parent, (exp.GTE, exp.LT)) and column.arg_key == "this":
+        return _month_aligned(parent.expression)
+    if isinstance(parent, (exp.LTE, exp.GT)) and column.arg_key == "expression":
+        return _month_aligned(parent.this)
+    return False
+
+def rewrite_sql(sql: str, rollups: Iterable[Rollup], source_columns: Dict[str, Set[str]],
+                dialect: Optional[str] = None) -> Optional[Tuple[str, Rollup]]:
+    """Rewrite an aggregate query over a fact table onto its rollup, or return None.
+
+    Eligible: one SELECT (no CTEs, subqueries, windows or set operations)
+    over the fact table, optionally INNER JOINed to accounts/sales_reps/region
+    on their keys, that groups, aggregates or is DISTINCT, and uses only rollup
+    dimensions, SUM of a measure, COUNT(*), MIN/MAX of dimensions, and the
+    timestamp through month-stable functions (DATE_TRUNC to month or coarser,
+    EXTRACT of year/quarter/month, >= or < a first-of-month literal). Bare
+    columns keep their output names; other unnamed expressions are named by
+    the database from the rewritten expression.
+    """
+    import sqlglot
+
+    by_source = {rollup.source: rollup for rollup in rollups}
+    try:
+        tree = sqlglot.parse_one(sql, read=dialect)
+        rollup = by_source.get(_fact_table(tree))
+        if rollup is None:
+            return None
+        return _rewrite(tree, rollup, source_columns, dialect).sql(dialect=dialect), rollup
+    except _Ineligible as e:
+        logging.getLogger(__name__).debug(f"Not rewritten onto a rollup: {e}")
+        return None
+    except Exception as e:
+        logging.getLogger(__name__).debug(f"Not rewritten onto a rollup, could not parse: {e}")
+        return None
+
+def _fact_table(tree) -> Optional[str]:
+    from sqlglot import exp
+
+    source = _from_clause(tree) if isinstance(tree, exp.Select) else None
+    if source is None or not isinstance(source.this, exp.Table):
+        return None
+    return source.this.name.lower()
+
+def _from_clause(tree):
+    # sqlglot 30 renamed the arg to "from_".
+    return tree.args.get("from_") or tree.args.get("from")
+
+def _rewrite(tree, rollup: Rollup, source_columns: Dict[str, Set[str]], dialect: Optional[str]):
+    import sqlglot
+    from sqlglot import exp
+
+    if tree.find(exp.With) or any(node is not tree for node in tree.find_all(exp.Select)):
+        raise _Ineligible("CTEs and subqueries are not rewritten")
+    if tree.find(exp.Window):
+        raise _Ineligible("window functions need the raw rows")
+    if any(not isinstance(star.parent, exp.Count) for star in tree.find_all(exp.Star)):
+        raise _Ineligible("SELECT * needs the raw columns")
+    distinct = tree.args.get("distinct")
+    if distinct is not None and distinct.args.get("on"):
+        raise _Ineligible("DISTINCT ON is not rewritten")
+    if not (tree.args.get("group") or distinct is not None or tree.find(exp.AggFunc)):
+        raise _Ineligible("only aggregate or DISTINCT queries can be answered from a rollup")
+
+    fact = _from_clause(tree).this
+    aliases = {fact.alias_or_name.lower(): rollup.source}
+    joins = tree.args.get("joins") or []
+    for join in joins:
+        table = join.this
+        if join.side or join.kind not in ("", "INNER") or join.args.get("using") or not isinstance(table, exp.Table):
+            raise _Ineligible("only INNER JOINs on key columns are rewritten")
+        name = table.name.lower()
+        if name not in DIMENSION_JOINS or name in aliases.values() or table.alias_or_name.lower() in aliases:
+            raise _Ineligible(f"join to {name} is not covered by {rollup.name}")
+        aliases[table.alias_or_name.lower()] = name
+    joined = frozenset(aliases.values()) - {rollup.source}
+    if joined not in JOIN_PATHS:
+        raise _Ineligible(f"joined tables {sorted(joined)} are not a rollup join path")
+
+    in_scope = list(aliases.values())
+    output_aliases = {e.alias.lower(): e for e in tree.expressions if isinstance(e, exp.Alias)}
+
+    def resolve(column) -> Optional[Tuple[str, str]]:
+        name = column.name.lower()
+        if column.table:
+            if column.table.lower() not in aliases:
+                raise _Ineligible(f"unknown qualifier {column.table}")
+            return aliases[column.table.lower()], name
+        owners = [table for table in in_scope if name in source_columns.get(table, ())]
+        if name in output_aliases:
+            if owners:
+                raise _Ineligible(f"{name} is both an output alias and a column")
+            return None
+        if len(owners) != 1:
+            raise _Ineligible(f"cannot resolve column {name}")
+        return owners[0], name
+
+    for join in joins:
+        on = join.args.get("on")
+        name = aliases[join.this.alias_or_name.lower()]
+        parent, parent_column, key = DIMENSION_JOINS[name]
+        expected = {(parent or rollup.source, parent_column), (name, key)}
+        if not (isinstance(on, exp.EQ) and isinstance(on.this, exp.Column) and isinstance(on.expression, exp.Column)
+                and {resolve(on.this), resolve(on.expression)} == expected):
+            raise _Ineligible(f"join to {name} is not on {parent or rollup.source}.{parent_column} = {name}.{key}")
+
+    for alias, node in output_aliases.items():
+        if alias not in rollup.columns:
+            continue
+        source = node.this
+        same_month = (
+            alias == "month" and isinstance(source, (exp.TimestampTrunc, exp.DateTrunc))
+            and source.args["unit"].name.upper() == "MONTH"
+        )
+        same_column = isinstance(source, exp.Column) and _rollup_column(resolve(source), rollup, joined) == alias
+        if not (same_month or same_column):
+            raise _Ineligible(f"output alias {alias} would shadow the rollup column")
+
+    replacements = []
+    for column in tree.find_all(exp.Column):
+        if any(isinstance(ancestor, exp.Join) for ancestor in _ancestors(column, tree)):
+            continue
+        reference = resolve(column)
+        if reference is None:
+            continue
+        table, name = reference
+        if table == rollup.source and name == TIME_COLUMN:
+            if not _month_stable(column):
+                raise _Ineligible(f"{TIME_COLUMN} is used at finer than month grain")
+            replacements.append((column, "month"))
+        elif table == rollup.source and name in rollup.measures:
+            parent = column.parent
+            if not (isinstance(parent, exp.Sum) and parent.this is column):
+                raise _Ineligible(f"measure {name} is only available as SUM({name})")
+            replacements.append((column, name))
+        elif table == rollup.source and name == "id" and isinstance(column.parent, exp.Count):
+            continue  # COUNT(id) is replaced with the whole aggregate below
+        else:
+            target = _rollup_column(reference, rollup, joined)
+            if target is None:
+                raise _Ineligible(f"{table}.{name} is not a column of {rollup.name}")
+            replacements.append((column, target))
+
+    counts = []
+    for aggregate in tree.find_all(exp.AggFunc):
+        if isinstance(aggregate, exp.Count):
+            if isinstance(aggregate.this, exp.Distinct):
+                continue
+            if not (isinstance(aggregate.this, exp.Star) or (
+                    isinstance(aggregate.this, exp.Column) and resolve(aggregate.this) == (rollup.source, "id"))):
+                raise _Ineligible("only COUNT(*), COUNT(id) and COUNT(DISTINCT dimension) are rewritten")
+            counts.append(aggregate)
+        elif isinstance(aggregate, exp.Sum):
+            if isinstance(aggregate.this, exp.Distinct):
+                raise _Ineligible("SUM(DISTINCT ...) needs the raw rows")
+        elif not isinstance(aggregate, (exp.Min, exp.Max)):
+            raise _Ineligible(f"{aggregate.key.upper()} cannot be computed from a rollup")
+
+    for column, target in replacements:
+        node = exp.column(target)
+        if column.parent is tree and column.arg_key == "expressions" and column.name.lower() != target:
+            node = exp.alias_(node, column.name)
+        column.replace(node)
+    for count in counts:
+        # SUM over no rows is NULL where COUNT gives 0.
+        count.replace(sqlglot.parse_one(f"COALESCE(CAST(SUM({rollup.count_column}) AS BIGINT), 0)", read=dialect))
+
+    tree.set("joins", None)
+    tree.from_(rollup.name, copy=False)
+    for table in ("sales_reps", "region"):
+        if table in joined:
+            tree.where(f"{JOIN_FILTERS[table]} IS NOT NULL", append=True, copy=False, dialect=dialect)
+    return tree
+
+def _ancestors(node, root):
+    node = node.parent
+    while node is not None and node is not root:
+        yield node
+        node = node.parent
+
+def _rollup_column(reference: Optional[Tuple[str, str]], rollup: Rollup, joined) -> Optional[str]:
+    if reference is None:
+        return None
+    table, name = reference
+    if table == rollup.source:
+        return name if name in rollup.dimensions else None
+    mapped = DIMENSION_COLUMNS.get((table, name))
+    if mapped is None or (mapped[1] is not None and mapped[1] not in joined):
+        return None
+    return mapped[0]
+
+
+class RollupManager:
+    """Builds and incrementally refreshes rollups and routes eligible queries onto them."""
+
+    def __init__(self, backend, rollups: Iterable[Rollup] = ROLLUPS, check_seconds: Optional[float] = None,
+                 rewrite: Optional[bool] = None, on_refresh: Optional[Callable[[str], Any]] = None):
+        self.backend = backend
+        self.on_refresh = on_refresh
+        self.rollups = list(rollups)
+        self.check_seconds = RollupConfig.CHECK_SECONDS if check_seconds is None else check_seconds
+        self.rewrite_enabled = RollupConfig.REWRITE if rewrite is None else rewrite
+        self.logger = logging.getLogger(__name__)
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._source_columns: Optional[Dict[str, Set[str]]] = None
+        self._checked_at: Optional[float] = None
+        self._behind: Set[str] = set()
+        self._dirty: Set[str] = set()
+        self._refreshing: Set[str] = set()
+        self._pending: Set[str] = set()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._lock = threading.RLock()  # guards the fields above; never held while a rollup is rebuilt
+        self._refresh_lock = threading.Lock()  # one refresh at a time
+        self.stats = {"rewrites": 0, "refreshes": 0, "probes": 0}
+
+    def refresh(self, full: bool = False, names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Create missing rollups and bring the others up to date; returns what was done per rollup."""
+        wanted = set(names) if names is not None else None
+        report = {}
+        with self._refresh_lock:
+            self.backend.run_in_transaction(self._create_state_table)
+            for rollup in self.rollups:
+                if wanted is not None and rollup.name not in wanted:
+                    continue
+                with self._lock:
+                    # Writes landing while this runs mark the rollup dirty again.
+                    rebuild = full or rollup.name in self._dirty
+                    self._dirty.discard(rollup.name)
+                    self._refreshing.add(rollup.name)
+                try:
+                    report[rollup.name] = self.backend.run_in_transaction(
+                        lambda cur, rollup=rollup: self._refresh_one(cur, rollup, rebuild)
+                    )
+                except Exception:
+                    if rebuild:
+                        with self._lock:
+                            self._dirty.add(rollup.name)
+                    raise
+                finally:
+                    with self._lock:
+                        self._refreshing.discard(rollup.name)
+                with self._lock:
+                    self._behind.discard(rollup.name)
+                if self.on_refresh is not None:
+                    self.on_refresh(rollup.name)
+            with self._lock:
+                self._checked_at = None
+        return report
+
+    def refresh_in_background(self, names: Iterable[str]) -> threading.Thread:
+        """Queue ``names`` for a refresh on the maintenance thread, starting it if needed."""
+        with self._lock:
+            self._pending.update(names)
+            if self._refresh_thread is None or not self._refresh_thread.is_alive():
+                self._refresh_thread = threading.Thread(
+                    target=self._refresh_pending, name="rollup-refresh", daemon=True
+                )
+                self._refresh_thread.start()
+            return self._refresh_thread
+
+    def _refresh_pending(self):
+        while True:
+            with self._lock:
+                names, self._pending = self._pending, set()
+                if not names:
+                    self._refresh_thread = None
+                    return
+            try:
+                self.refresh(names=names)
+            except Exception as e:
+                self.logger.warning(f"Background rollup refresh failed: {str(e)}")
+
+    @staticmethod
+    def _create_state_table(cur):
+        cur.execute(
+            f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} (name VARCHAR PRIMARY KEY, source_max_id BIGINT, "
+            "definition VARCHAR, row_count BIGINT, refreshed_at TIMESTAMP)"
+        )
+
+    def _refresh_one(self, cur, rollup: Rollup, full: bool) -> Dict[str, Any]:
+        start = time.perf_counter()
+        cur.execute(f"SELECT source_max_id, definition FROM {STATE_TABLE} WHERE name = '{rollup.name}'")
+        state = cur.fetchone()
+        cur.execute(f"SELECT MAX(id) FROM {rollup.source}")
+        high = cur.fetchone()[0] or 0
+        rebuild = full or state is None or state[1] != rollup.definition_hash()
+        stats: Dict[str, Any] = {"mode": "unchanged"}
+
+        if not rebuild and high != state[0]:
+            low = state[0] or 0
+            cur.execute(
+                f"SELECT MIN({TIME_COLUMN}), MAX({TIME_COLUMN}), COUNT(*) - COUNT({TIME_COLUMN}) "
+                f"FROM {rollup.source} WHERE id > {int(low)} AND id <= {int(high)}"
+            )
+            first, last, undated = cur.fetchone()
+            if high < low or undated:
+                rebuild = True  # ids went backwards or the NULL month changed; recompute everything
+            elif first is not None:
+                begin, end = _month_start(first), _next_month(_month_start(last))
+                cur.execute(f"DELETE FROM {rollup.name} WHERE month >= {_timestamp(begin)} AND month < {_timestamp(end)}")
+                where = f"f.{TIME_COLUMN} >= {_timestamp(begin)} AND f.{TIME_COLUMN} < {_timestamp(end)}"
+                cur.execute(f"INSERT INTO {rollup.name} {rollup.select_sql(where)}")
+                stats = {"mode": "incremental", "from": f"{begin:%Y-%m}", "to": f"{end:%Y-%m}"}
+        if rebuild:
+            cur.execute(f"DROP TABLE IF EXISTS {rollup.name}")
+            cur.execute(f"CREATE TABLE {rollup.name} AS {rollup.select_sql()}")
+            stats = {"mode": "full"}
+
+        cur.execute(f"SELECT COUNT(*) FROM {rollup.name}")
+        row_count = cur.fetchone()[0]
+        cur.execute(f"DELETE FROM {STATE_TABLE} WHERE name = '{rollup.name}'")
+        cur.execute(
+            f"INSERT INTO {STATE_TABLE} VALUES ('{rollup.name}', {int(high)}, '{rollup.definition_hash()}', "
+            f"{int(row_count)}, CURRENT_TIMESTAMP)"
+        )
+        with self._lock:
+            self._state[rollup.name] = {"source_max_id": high, "definition": rollup.definition_hash()}
+            self.stats["refreshes"] += 1
+        stats.update(rows=row_count, source_max_id=high, seconds=round(time.perf_counter() - start, 3))
+        if metrics.enabled:
+            metrics.registry.inc(
+                "rsa_rollup_refreshes_total", help_text="Rollup refreshes by rollup and mode.",
+                rollup=rollup.name, mode=stats["mode"]
+            )
+        self.logger.info(f"Rollup {rollup.name} refreshed ({stats['mode']}): {row_count} rows")
+        return stats
+
+    def _probe(self, cur) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int]]:
+        cur.execute(
+            "SELECT COUNT(*) FROM information_schema.tables "
+            f"WHERE table_name = '{STATE_TABLE}' AND table_schema = current_schema()"
+        )
+        if not cur.fetchone()[0]:
+            return {}, {}
+        cur.execute(f"SELECT name, source_max_id, definition FROM {STATE_TABLE}")
+        state = {name: {"source_max_id": high, "definition": definition} for name, high, definition in cur.fetchall()}
+        heads = {}
+        for source in {rollup.source for rollup in self.rollups if rollup.name in state}:
+            cur.execute(f"SELECT MAX(id) FROM {source}")
+            heads[source] = cur.fetchone()[0] or 0
+        return state, heads
+
+    def _check(self):
+        """Re-read rollup_state and the source watermarks at most every ``check_seconds``."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_seconds:
+            return
+        state, heads = self.backend.run_in_transaction(self._probe)
+        self.stats["probes"] += 1
+        self._state = state
+        self._behind = {
+            rollup.name for rollup in self.rollups
+            if rollup.name in state and (
+                state[rollup.name]["source_max_id"] != heads.get(rollup.source)
+                or state[rollup.name]["definition"] != rollup.definition_hash()
+            )
+        }
+        if self._source_columns is None and state:
+            self._source_columns = {}
+            for table, column, *_ in self.backend.schema_rows():
+                self._source_columns.setdefault(table.lower(), set()).add(column.lower())
+        self._checked_at = now
+
+    def fresh_rollups(self, names: Iterable[str]) -> List[Rollup]:
+        """The named rollups that are built and up to date; stale ones are refreshed in the background."""
+        with self._lock:
+            self._check()
+            built = [rollup for rollup in self.rollups if rollup.name in names and rollup.name in self._state]
+            stale = {
+                rollup.name for rollup in built
+                if rollup.name in self._behind or rollup.name in self._dirty or rollup.name in self._refreshing
+            }
+            if stale - self._refreshing:
+                self.refresh_in_background(stale - self._refreshing)
+        return [rollup for rollup in built if rollup.name not in stale]
+
+    def source_written(self, table: str):
+        """A statement in this process wrote ``table``: its rollups are not used again until rebuilt."""
+        with self._lock:
+            for rollup in self.rollups:
+                if rollup.source == table.lower():
+                    self._dirty.add(rollup.name)
+
+    def route(self, sql: str) -> Tuple[str, Optional[str]]:
+        """Return (SQL to run, rollup used) for a read query.
+
+        An eligible query over a fact table is rewritten onto its rollup when
+        that rollup is up to date. Refreshing never happens here: a stale
+        rollup is queued for the maintenance thread and the query runs as
+        written meanwhile. Rollup problems never fail the query either.
+        """
+        tables = referenced_tables(sql)
+        relevant = {rollup.name for rollup in self.rollups if rollup.name in tables or rollup.source in tables}
+        if not relevant:
+            return sql, None
+        try:
+            usable = self.fresh_rollups(relevant)
+            if not self.rewrite_enabled or tables & {rollup.name for rollup in self.rollups}:
+                return sql, None
+            rewritten = rewrite_sql(
+                sql, usable, self._source_columns or {}, getattr(self.backend, "sqlglot_dialect", None)
+            )
+        except Exception as e:
+            self.logger.warning(f"Rollup routing skipped: {str(e)}")
+            return sql, None
+        if rewritten is None:
+            return sql, None
+        rewritten_sql, rollup = rewritten
+        self.stats["rewrites"] += 1
+        if metrics.enabled:
+            metrics.registry.inc(
+                "rsa_rollup_rewrites_total", help_text="Queries answered from a rollup table.", rollup=rollup.name
+            )
+        self.logger.info(f"Query rewritten onto {rollup.name}")
+        return rewritten_sql, rollup.name
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "built": sorted(self._state), "stale": sorted(self._behind | self._dirty)}
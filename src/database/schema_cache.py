@@ -0,0 +1,151 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import threading
+import time
+from config.config import CacheConfig
+from src.utils.metrics import traced
+from .backends import get_backend
+from .rollups import STATE_TABLE, table_description
+
+@dataclass
+class ColumnInfo:
+    name: str
+    data_type: str
+    not_null: bool = False
+    foreign_table: Optional[str] = None
+    foreign_column: Optional[str] = None
+
+    def describe(self) -> str:
+        text = f"{self.name} {self.data_type}"
+        if self.not_null:
+            text += " NOT NULL"
+        if self.foreign_table:
+            text += f" (FK -> {self.foreign_table}.{self.foreign_column})"
+        return text
+
+
+@dataclass
+class TableInfo:
+    name: str
+    columns: List[ColumnInfo] = field(default_factory=list)
+    description: Optional[str] = None
+
+
+@dataclass
+class SchemaSnapshot:
+    tables: Dict[str, TableInfo]
+    fingerprint: str
+    version: int
+    loaded_at: float
+
+    def foreign_keys(self, table_name: str) -> List[Tuple[str, str]]:
+        """Return (column, referenced table) pairs, including ``<name>_id`` conventions.
+
+        Many dumps (Parch & Posey included) declare no constraints, so a column
+        such as ``account_id`` is treated as a reference to ``accounts``.
+        """
+        references = []
+        for col in self.tables[table_name].columns:
+            if col.foreign_table:
+                references.append((col.name, col.foreign_table))
+            elif col.name.endswith("_id"):
+                stem = col.name[:-3]
+                for candidate in (stem, f"{stem}s", f"{stem}es"):
+                    if candidate in self.tables and candidate != table_name:
+                        references.append((col.name, candidate))
+                        break
+        return references
+
+    def neighbours(self, table_name: str) -> Set[str]:
+        """Tables joined to ``table_name`` through a foreign key in either direction."""
+        related = {target for _, target in self.foreign_keys(table_name)}
+        for other in self.tables:
+            if other != table_name and any(
+                target == table_name for _, target in self.foreign_keys(other)
+            ):
+                related.add(other)
+        return related
+
+    def to_prompt_text(self, table_names: Optional[Iterable[str]] = None) -> str:
+        selected = self.tables.values()
+        if table_names is not None:
+            wanted = set(table_names)
+            selected = [table for table in selected if table.name in wanted]
+
+        schema_text = "Database Schema:\n"
+        for table in selected:
+            schema_text += f"\nTable: {table.name}\n"
+            if table.description:
+                schema_text += f"Note: {table.description}\n"
+            schema_text += "Columns:\n"
+            for col in table.columns:
+                schema_text += f"  - {col.describe()}\n"
+        return schema_text
+
+
+class SchemaCache:
+    """Keeps an in-memory schema snapshot, re-introspecting only on change."""
+
+    def __init__(self, db_config: Dict[str, str], ttl_seconds: Optional[float] = None, backend=None):
+        self.backend = backend or get_backend(db_config)
+        self.ttl_seconds = CacheConfig.SCHEMA_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.logger = logging.getLogger(__name__)
+        self._snapshot: Optional[SchemaSnapshot] = None
+        self._validated_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "fingerprint_checks": 0}
+
+    @traced("schema_fetch")
+    def get_snapshot(self) -> SchemaSnapshot:
+        with self._lock:
+            now = time.monotonic()
+            if self._snapshot is not None and now - self._validated_at < self.ttl_seconds:
+                self.stats["hits"] += 1
+                return self._snapshot
+
+            self.stats["misses"] += 1
+            self.stats["fingerprint_checks"] += 1
+            fingerprint = self.backend.schema_fingerprint()
+            if self._snapshot is None or fingerprint != self._snapshot.fingerprint:
+                self._snapshot = self._introspect(fingerprint)
+            self._validated_at = time.monotonic()
+            return self._snapshot
+
+    def peek(self) -> Optional[SchemaSnapshot]:
+        """The current snapshot without revalidating it (None before the first fetch)."""
+        return self._snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._validated_at = 0.0
+
+    def _introspect(self, fingerprint: str) -> SchemaSnapshot:
+        rows = self.backend.schema_rows()
+
+        tables: Dict[str, TableInfo] = {}
+        for table_name, column_name, data_type, not_null, fk_table, fk_column in rows:
+            if table_name == STATE_TABLE:
+                continue  # rollup bookkeeping, not something to query
+            table = tables.setdefault(
+                table_name, TableInfo(name=table_name, description=table_description(table_name))
+            )
+            table.columns.append(ColumnInfo(
+                name=column_name,
+                data_type=data_type,
+                not_null=bool(not_null),
+                foreign_table=fk_table,
+                foreign_column=fk_column
+            ))
+
+        version = self._snapshot.version + 1 if self._snapshot else 1
+        self.stats["refreshes"] += 1
+        self.logger.info(
+            f"Schema snapshot v{version} loaded: {len(tables)} tables, fingerprint {fingerprint}"
+        )
+        return SchemaSnapshot(
+            tables=tables,
+            fingerprint=fingerprint,
+            version=version,
+            loaded_at=time.time()
+        )
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from config.config import IndexConfig, LLMConfig
+from src.utils.metrics import span
+from .query_cache import normalize_question
+from .vector_index import sync_collection
+
+def example_id(question: str) -> str:
+    return "example:" + hashlib.sha1(normalize_question(question).encode("utf-8")).hexdigest()[:16]
+
+def load_examples(path: Optional[str] = None) -> List[Dict[str, str]]:
+    """Read curated ``{"question", "sql"}`` pairs from a JSONL file (missing file: none)."""
+    path = IndexConfig.EXAMPLES_PATH if path is None else path
+    if not path or not os.path.exists(path):
+        return []
+    examples = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                examples.append({"question": record["question"].strip(), "sql": record["sql"].strip()})
+    return examples
+
+
+class ExampleStore:
+    """Question→SQL pairs embedded by question, for retrieving few-shot examples.
+
+    Curated pairs come from ``path``; pairs learned from successful executions
+    are tagged with their schema fingerprint and capped at ``max_learned``
+    (oldest dropped first).
+    """
+
+    def __init__(self, embeddings, client, path: Optional[str] = None, max_learned: Optional[int] = None):
+        self.path = IndexConfig.EXAMPLES_PATH if path is None else path
+        self.max_learned = LLMConfig.FEW_SHOT_MAX_LEARNED if max_learned is None else max_learned
+        self.logger = logging.getLogger(__name__)
+        from langchain_chroma import Chroma
+
+        self.store = Chroma(
+            embedding_function=embeddings,
+            client=client,
+            collection_name="sql_examples",
+            collection_metadata={"hnsw:space": "cosine"}
+        )
+        self._count: Optional[int] = None
+        self._learned: Optional["OrderedDict[str, float]"] = None  # id -> added_at, oldest first
+        self._lock = threading.Lock()
+
+    def index(self, examples: Optional[List[Dict[str, str]]] = None, force: bool = False) -> Dict[str, int]:
+        """Sync the collection with the curated examples; unchanged pairs are not re-embedded."""
+        examples = load_examples(self.path) if examples is None else examples
+        items = {
+            example_id(example["question"]): (example["question"], {"sql": example["sql"], "source": "curated"})
+            for example in examples
+        }
+        with self._lock:
+            stats = sync_collection(self.store, items, force=force, where={"source": "curated"})
+            self._count = None
+        self.logger.info(
+            f"Example index: {stats['embedded']} embedded, {stats['unchanged']} unchanged, {stats['deleted']} deleted"
+        )
+        return stats
+
+    def _learned_ids(self) -> "OrderedDict[str, float]":
+        if self._learned is None:
+            stored = self.store.get(where={"source": "execution"}, include=["metadatas"])
+            pairs = sorted(
+                zip(stored["ids"], (metadata.get("added_at", 0.0) for metadata in stored["metadatas"])),
+                key=lambda pair: pair[1]
+            )
+            self._learned = OrderedDict(pairs)
+        return self._learned
+
+    def add(self, question: str, sql: str, fingerprint: str) -> bool:
+        """Keep a pair whose SQL executed successfully; returns False if the question is already known."""
+        if self.max_learned <= 0:
+            return False
+        doc_id = example_id(question)
+        with self._lock:
+            learned = self._learned_ids()
+            if doc_id in learned or self.store.get(ids=[doc_id], include=[])["ids"]:
+                return False
+            added_at = time.time()
+            self.store.add_texts(
+                [question],
+                metadatas=[{"sql": sql, "source": "execution", "schema_fingerprint": fingerprint, "added_at": added_at}],
+                ids=[doc_id]
+            )
+            learned[doc_id] = added_at
+            evicted = []
+            while len(learned) > self.max_learned:
+                evicted.append(learned.popitem(last=False)[0])
+            if evicted:
+                self.store.delete(ids=evicted)
+            self._count = None
+            return True
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = len(self.store.get(include=[])["ids"])
+        return self._count
+
+    def search(self, question: str, k: int = 3, fingerprint: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The ``k`` most similar examples as ``{"question", "sql", "score"}``, best first.
+
+        With ``fingerprint``, learned pairs from other schema versions are skipped.
+        ``score`` is cosine similarity (1 - cosine distance).
+        """
+        if k <= 0 or not len(self):
+            return []
+        where = None
+        if fingerprint is not None:
+            where = {"$or": [{"source": "curated"}, {"schema_fingerprint": fingerprint}]}
+        with span("example_retrieval"):
+            results = self.store.similarity_search_with_score(question, k=min(k, len(self)), filter=where)
+        return [
+            {"question": document.page_content, "sql": document.metadata["sql"], "score": 1.0 - distance}
+            for document, distance in results
+        ]
@@ -1,21 +1,171 @@
-from typing import Dict, Any
-from langchain_community.llms import Ollama
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+from typing import Dict, Any, Optional, Tuple
+import asyncio
 import logging
 from .query_generator import QueryGenerator
-from config.config import DatabaseConfig
+from .query_cache import QueryCache, normalize_question
+from .scheduler import SingleFlight
+from config.config import DatabaseConfig, LLMConfig
+from src.utils.timeline import Timeline
+
+def _found(result: Optional[str]) -> str:
+    return "hit" if result else "miss"
 
 class LLMHandler:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.query_generator = QueryGenerator(DatabaseConfig.get_db_config())
+        self.query_cache = QueryCache()
+        self.in_flight = SingleFlight() if LLMConfig.SINGLE_FLIGHT else None
+
+    def _cache_key(self, question: str, schema_version: Optional[str] = None) -> str:
+        schema_version = schema_version or self.query_generator.schema_cache.get_snapshot().fingerprint
+        return QueryCache.make_key(question, LLMConfig.MODEL_NAME, schema_version)
+
+    def _cached_query(self, question: str) -> Optional[str]:
+        cached_sql = self.query_cache.get(self._cache_key(question))
+        if cached_sql:
+            self.logger.info(f"Query cache hit: {cached_sql}")
+        return cached_sql
 
     def generate_sql_query(self, question: str) -> str:
         try:
-            sql_query = self.query_generator.generate_sql_query(question)
+            cached_sql = self._cached_query(question)
+            if cached_sql:
+                return cached_sql
+
+            if self.in_flight is None:
+                sql_query = self.query_generator.generate_sql_query(question)
+            else:
+                sql_query = self.in_flight.do(
+                    normalize_question(question), lambda: self.query_generator.generate_sql_query(question)
+                )
             self.logger.info(f"Generated SQL query: {sql_query}")
             return sql_query.strip()
         except Exception as e:
             self.logger.error(f"Error generating SQL query: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def agenerate_sql_query(self, question: str) -> str:
+        try:
+            sql_query, _ = await self.aresolve_sql(question)
+            return sql_query
+        except Exception as e:
+            self.logger.error(f"Error generating SQL query: {str(e)}")
+            raise
+
+    async def aresolve_sql(
+        self, question: str, timeline: Optional[Timeline] = None, speculate: bool = True
+    ) -> Tuple[str, str]:
+        """SQL for ``question`` and where it came from: "query_cache", "semantic_cache" or "llm".
+
+        Schema validation, both cache lookups, prompt building and an Ollama
+        keep-alive ping start together against the last known schema. The
+        first cache hit cancels the work that is no longer needed; if the
+        schema turns out to have changed, the speculative results are dropped
+        and the lookups run once more, this time after validation. Failures
+        come back as an "Error generating SQL query: ..." message.
+        """
+        timeline = timeline or Timeline()
+        generator = self.query_generator
+        known = generator.schema_cache.peek() if speculate else None
+        schema = timeline.start("schema", asyncio.to_thread(generator.schema_cache.get_snapshot))
+        if known is None:
+            # Nothing to speculate against before the first snapshot (or after the schema changed).
+            try:
+                known = await schema
+            except Exception as e:
+                self.logger.error(f"Error fetching schema: {str(e)}")
+                return f"Error generating SQL query: {str(e)}", "llm"
+        keep_alive = None
+        if generator.keep_alive_due():
+            keep_alive = timeline.start("keep_alive", generator.akeep_alive(), blocking=False)
+        memo = timeline.start(
+            "query_cache",
+            asyncio.to_thread(self.query_cache.get, self._cache_key(question, known.fingerprint)),
+            outcome=_found
+        )
+        semantic = timeline.start(
+            "semantic_cache",
+            asyncio.to_thread(generator._lookup_semantic_cache, question, known.fingerprint),
+            outcome=_found
+        )
+        prompt = timeline.start("prompt_build", asyncio.to_thread(generator.build_prompt, question, known))
+        try:
+            sql_query, source, winner = None, "llm", None
+            lookups = {memo: "query_cache", semantic: "semantic_cache"}
+            while lookups and winner is None:
+                done, _ = await asyncio.wait(lookups, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = lookups.pop(task)
+                    if task.exception() is not None:
+                        self.logger.warning(f"{name} lookup failed: {str(task.exception())}")
+                    elif task.result() and winner is None:
+                        sql_query, source, winner = task.result(), name, task
+            if winner is not None:
+                timeline.cancel(*(task for task in (memo, semantic, prompt, keep_alive) if task is not winner))
+
+            try:
+                validated = await schema
+            except Exception as e:
+                if sql_query is None:
+                    self.logger.error(f"Error fetching schema: {str(e)}")
+                    return f"Error generating SQL query: {str(e)}", source
+                # The hit is keyed to the last snapshot that did validate.
+                self.logger.warning(f"Schema check failed, using {source} hit for the last known schema: {str(e)}")
+                validated = known
+            if validated.fingerprint != known.fingerprint:
+                self.logger.info("Schema changed during lookup; discarding speculative results")
+                timeline.cancel(memo, semantic, prompt, keep_alive)
+                return await self.aresolve_sql(question, timeline, speculate=False)
+
+            if sql_query is not None:
+                self.logger.info(f"{source} hit: {sql_query}")
+                return sql_query, source
+
+            try:
+                prompt_text = await prompt
+            except Exception as e:
+                self.logger.error(f"Error building prompt: {str(e)}")
+                return f"Error generating SQL query: {str(e)}", source
+            if self.in_flight is None:
+                generation = generator.agenerate_from_prompt(question, prompt_text)
+            else:
+                # Identical questions asked while one is generating wait for it instead of queueing another;
+                # the fingerprint keeps callers on a new schema from joining a prompt built for the old one.
+                generation = self.in_flight.run(
+                    (normalize_question(question), known.fingerprint),
+                    lambda: generator.agenerate_from_prompt(question, prompt_text)
+                )
+            sql_query = await timeline.start("llm", generation)
+            self.logger.info(f"Generated SQL query: {sql_query}")
+            return sql_query.strip(), source
+        finally:
+            # Only matters when something above raised or was cancelled.
+            timeline.cancel(*(task for task in (memo, semantic, prompt) if not task.done()))
+
+    async def arepair_sql_query(self, question: str, sql_query: str, error: str) -> str:
+        """Ask the model to fix SQL that failed against the database."""
+        repaired = await self.query_generator.arepair_sql_query(question, sql_query, error)
+        self.logger.info(f"Repaired SQL query: {repaired}")
+        return repaired.strip()
+
+    def record_success(self, question: str, sql_query: str):
+        """Cache SQL that executed successfully in both the memo and semantic tiers."""
+        try:
+            self.query_cache.put(self._cache_key(question), sql_query)
+        except Exception as e:
+            self.logger.warning(f"Could not store query cache entry: {str(e)}")
+        self.query_generator.record_success(question, sql_query)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return {
+            "schema": dict(self.query_generator.schema_cache.stats),
+            # Reading the semantic_cache property would load the embedding model just to report on it.
+            "semantic": (
+                self.query_generator._semantic_cache.get_stats()
+                if self.query_generator.vector_components_ready else {}
+            ),
+            "query": self.query_cache.get_stats(),
+            "in_flight": self.in_flight.get_stats() if self.in_flight else {},
+            "llm_scheduler": self.query_generator.scheduler.get_stats()
+        }
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from config.config import CacheConfig
+
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16,
+    "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20,
+    "thirty": 30, "forty": 40, "fifty": 50, "hundred": 100
+}
+
+def _canonical_number(token: str) -> str:
+    if token in NUMBER_WORDS:
+        return str(NUMBER_WORDS[token])
+    try:
+        value = float(token.replace(",", ""))
+    except ValueError:
+        return token
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def normalize_question(question: str) -> str:
+    """Canonicalize case, whitespace, punctuation and numbers in a question."""
+    text = question.lower().replace("'s", "s")
+    tokens = re.findall(r"\d[\d,]*(?:\.\d+)?|[a-z0-9]+", text)
+    return " ".join(_canonical_number(token) for token in tokens)
+
+
+class QueryCache:
+    """Bounded in-memory LRU of question -> SQL with an optional SQLite tier."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        path: Optional[str] = None,
+        disk_max_entries: Optional[int] = None
+    ):
+        self.max_entries = CacheConfig.QUERY_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.disk_max_entries = (
+            CacheConfig.QUERY_CACHE_DISK_MAX_ENTRIES if disk_max_entries is None else disk_max_entries
+        )
+        self.path = CacheConfig.QUERY_CACHE_PATH if path is None else path
+        self.logger = logging.getLogger(__name__)
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = self._open_disk_tier(self.path) if self.path else None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def _open_disk_tier(self, path: str):
+        try:
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS query_cache ("
+                "key TEXT PRIMARY KEY, sql TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            db.commit()
+            return db
+        except sqlite3.Error as e:
+            self.logger.warning(f"Persistent query cache disabled ({path}): {str(e)}")
+            return None
+
+    @staticmethod
+    def make_key(question: str, model_name: str, schema_version: str) -> str:
+        raw = f"{model_name}\x00{schema_version}\x00{normalize_question(question)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT sql FROM query_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    self._db.execute(
+                        "UPDATE query_cache SET last_used = ? WHERE key = ?", (time.time(), key)
+                    )
+                    self._db.commit()
+                    self._remember(key, row[0])
+                    self.stats["disk_hits"] += 1
+                    return row[0]
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, sql: str):
+        with self._lock:
+            self._remember(key, sql)
+            self.stats["stores"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_cache (key, sql, last_used) VALUES (?, ?, ?)",
+                    (key, sql, time.time())
+                )
+                self._db.execute(
+                    "DELETE FROM query_cache WHERE key IN ("
+                    "SELECT key FROM query_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.disk_max_entries,)
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, sql: str):
+        self._memory[key] = sql
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._memory),
+                "hit_rate": hits / lookups if lookups else 0.0
+            }
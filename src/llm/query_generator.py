@@ -2,188 +2,478 @@
 
 from langchain_ollama import OllamaLLM
 from langchain_core.prompts import PromptTemplate
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-import chromadb
-from config.config import LLMConfig
-import psycopg2
+from config.config import AppConfig, LLMConfig
+from src.database.schema_cache import SchemaCache
+from src.utils.logger import log_payload
+from src.utils.metrics import estimate_tokens, metrics, span, traced
+from src.utils.startup import startup_timer
+from .scheduler import llm_scheduler
+from .sql_validator import extract_sql, validate_sql
+from .streaming import MarkerScanner
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
 import logging
+import threading
+import time
+
+FULL_PROMPT = PromptTemplate(
+    input_variables=["schema", "query", "dialect"],
+    template="""
+            Given the following database schema:
+            {schema}
+            
+            SQL dialect: {dialect}
+            
+            Task: Convert the following natural language query to a valid SQL query.
+            
+            Requirements:
+            1. Use only the tables and columns that exist in the schema above
+            2. Use proper table aliases and column references
+            3. For aggregations, make sure to include proper GROUP BY clauses
+            4. Always qualify column names with table aliases
+            5. For temporal queries (involving dates/months/years):
+               - Use DATE_TRUNC('month', timestamp_column) for monthly aggregation
+               - Use EXTRACT(YEAR FROM timestamp_column) for yearly aggregation
+               - Use TO_CHAR(timestamp_column, 'YYYY-MM') for month-year formatting
+            6. For sales/revenue queries:
+               - Use total_amt_usd or total columns depending on context
+               - Always specify the aggregation function (SUM, AVG, etc.)
+            7. If the query cannot be answered with the available schema, explain why and respond with:
+               "Unable to generate query with available schema because: [reason]"
+            
+            User Query: {query}
+            
+            Analysis Steps:
+            1. Identify required tables and their relationships
+            2. Identify relevant columns for:
+               - Measures (amounts, quantities)
+               - Dimensions (dates, categories, regions)
+               - Join conditions
+            3. Determine appropriate aggregations and groupings
+            4. Consider date/time handling if temporal analysis is needed
+            
+            If you can generate a valid query, format it as:
+            SQL_QUERY_START
+            [your SQL query here]
+            SQL_QUERY_END
+            
+            If you cannot generate a query, format as:
+            ERROR_START
+            Unable to generate query with available schema because: [detailed explanation]
+            ERROR_END
+            """
+)
+
+# Few-shot examples do the work of most of FULL_PROMPT's instructions in far fewer tokens.
+COMPACT_PROMPT = PromptTemplate(
+    input_variables=["schema", "query", "dialect", "examples"],
+    template="""Write one {dialect} query for this database schema:
+{schema}
+
+Use only these tables and columns, alias every table and qualify every column.
+Reply with the query between SQL_QUERY_START and SQL_QUERY_END and nothing else.
+If the schema cannot answer the question, reply ERROR_START <reason> ERROR_END.
+{examples}
+User Query: {query}
+"""
+)
+
+REPAIR_PROMPT = PromptTemplate(
+    input_variables=["schema", "dialect", "query", "sql", "problems"],
+    template="""This {dialect} query does not work against the database schema below.
+{schema}
+
+User Query: {query}
+
+Query:
+{sql}
+
+Problems:
+{problems}
+
+Reply with the corrected query between SQL_QUERY_START and SQL_QUERY_END and nothing else.
+"""
+)
+
+def format_examples(examples: List[Dict[str, Any]]) -> str:
+    if not examples:
+        return ""
+    blocks = [
+        f"User Query: {example['question']}\nSQL_QUERY_START\n{example['sql']}\nSQL_QUERY_END"
+        for example in examples
+    ]
+    return "\nExamples:\n" + "\n\n".join(blocks) + "\n"
+
 
 class QueryGenerator:
     def __init__(self, db_config):
-        self.llm = OllamaLLM(model=LLMConfig.MODEL_NAME)
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="BAAI/bge-small-en-v1.5",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': False}
-        )
-        self.vector_store = self._initialize_vector_store()
+        self.llm = OllamaLLM(model=LLMConfig.MODEL_NAME, num_predict=LLMConfig.MAX_TOKENS)
+        self.scheduler = llm_scheduler
         self.db_config = db_config
-        
-    def _initialize_vector_store(self):
-        client = chromadb.Client()
-        return Chroma(
-            embedding_function=self.embeddings, 
-            client=client, 
-            collection_name="sales_data_store"
-        )
+        self.schema_cache = SchemaCache(db_config)
+        self._vector_lock = threading.Lock()
+        self._vector_ready = threading.Event()
+        self._semantic_cache = None
+        self._schema_retriever = None
+        self._example_store = None
+        self._warm_up_thread: Optional[threading.Thread] = None
+        self._warm_up_lock = threading.Lock()
+        self._last_keep_alive = float("-inf")
+        self._keep_alive_lock = threading.Lock()
+        if AppConfig.STARTUP_MODE == "eager":
+            self.warm_up()
 
-    def get_table_info(self) -> str:
+    def _warm_schema_cache(self):
         try:
-            conn = psycopg2.connect(**self.db_config)
-            cursor = conn.cursor()
-            
-            # Enhanced query to get table information including foreign keys
-            schema_query = """
-                WITH fk_info AS (
-                    SELECT
-                        tc.table_name,
-                        kcu.column_name,
-                        ccu.table_name AS foreign_table_name,
-                        ccu.column_name AS foreign_column_name
-                    FROM information_schema.table_constraints tc
-                    JOIN information_schema.key_column_usage kcu
-                        ON tc.constraint_name = kcu.constraint_name
-                    JOIN information_schema.constraint_column_usage ccu
-                        ON ccu.constraint_name = tc.constraint_name
-                    WHERE tc.constraint_type = 'FOREIGN KEY'
+            with startup_timer.phase("schema snapshot"):
+                self.schema_cache.get_snapshot()
+        except Exception as e:
+            logging.warning(f"Schema snapshot not loaded at startup: {str(e)}")
+
+    def _load_vector_components(self):
+        """Import the embedding/Chroma stack, load bge-small and open the persisted collections."""
+        with self._vector_lock:
+            if self._vector_ready.is_set():
+                return
+            with startup_timer.phase("import langchain_huggingface/chromadb"):
+                from langchain_chroma import Chroma
+                from .example_store import ExampleStore
+                from .semantic_cache import SemanticCache
+                from .schema_retriever import SchemaRetriever
+                from .vector_index import load_embeddings, open_client
+            with startup_timer.phase("load embedding model"):
+                self.embeddings = load_embeddings()
+            with startup_timer.phase("open Chroma collections"):
+                self.chroma_client = open_client()
+                self.vector_store = Chroma(
+                    embedding_function=self.embeddings,
+                    client=self.chroma_client,
+                    collection_name="sales_data_store",
+                    collection_metadata={"hnsw:space": "cosine"}
                 )
-                SELECT 
-                    t.table_name,
-                    array_agg(
-                        c.column_name || ' ' || c.data_type || 
-                        CASE 
-                            WHEN c.is_nullable = 'NO' THEN ' NOT NULL'
-                            ELSE ''
-                        END ||
-                        COALESCE(
-                            ' (FK -> ' || fk.foreign_table_name || '.' || fk.foreign_column_name || ')',
-                            ''
-                        )
-                    ) as columns
-                FROM information_schema.tables t
-                JOIN information_schema.columns c 
-                    ON c.table_name = t.table_name
-                LEFT JOIN fk_info fk
-                    ON fk.table_name = t.table_name
-                    AND fk.column_name = c.column_name
-                WHERE t.table_schema = 'public'
-                GROUP BY t.table_name;
-            """
-            
-            cursor.execute(schema_query)
-            tables_info = cursor.fetchall()
-            
-            # Format the schema information with more details
-            schema_text = "Database Schema:\n"
-            for table_name, columns in tables_info:
-                schema_text += f"\nTable: {table_name}\nColumns:\n"
-                for col in columns:
-                    schema_text += f"  - {col}\n"
-            
-            return schema_text
-            
+                self._semantic_cache = SemanticCache(self.vector_store)
+                self._semantic_cache.restore()
+                self._schema_retriever = SchemaRetriever(self.embeddings, self.chroma_client)
+                self._example_store = ExampleStore(self.embeddings, self.chroma_client)
+            self._vector_ready.set()
+
+    @property
+    def semantic_cache(self):
+        self._load_vector_components()
+        return self._semantic_cache
+
+    @property
+    def schema_retriever(self):
+        self._load_vector_components()
+        return self._schema_retriever
+
+    @property
+    def example_store(self):
+        self._load_vector_components()
+        return self._example_store
+
+    @property
+    def vector_components_ready(self) -> bool:
+        return self._vector_ready.is_set()
+
+    def _warm_llm(self):
+        """Ask Ollama to load the model; a generate call with an empty prompt only loads it."""
+        try:
+            import ollama
+
+            with startup_timer.phase(f"load Ollama model {LLMConfig.MODEL_NAME}"):
+                ollama.Client(host=self.llm.base_url).generate(model=LLMConfig.MODEL_NAME, prompt="")
+        except Exception as e:
+            logging.warning(f"Ollama warm-up failed: {str(e)}")
+
+    def warm_up(self):
+        """Load everything the first request would otherwise pay for."""
+        self._warm_schema_cache()
+        with startup_timer.phase("import sqlglot"):
+            import sqlglot  # noqa: F401
+        try:
+            self._load_vector_components()
+        except Exception as e:
+            logging.warning(f"Embedding model not loaded during warm-up: {str(e)}")
+        self._warm_llm()
+
+    def start_background_warm_up(self) -> threading.Thread:
+        with self._warm_up_lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(
+                    target=self._warm_up_and_report, name="warm-up", daemon=True
+                )
+                self._warm_up_thread.start()
+            return self._warm_up_thread
+
+    def _warm_up_and_report(self):
+        self.warm_up()
+        startup_timer.log_report("warm-up")
+
+    def keep_alive_due(self) -> bool:
+        """Whether a keep-alive ping should be sent; a True answer claims the ping for this caller."""
+        if LLMConfig.KEEP_ALIVE_PING_SECONDS <= 0:
+            return False
+        with self._keep_alive_lock:
+            now = time.monotonic()
+            if now - self._last_keep_alive < LLMConfig.KEEP_ALIVE_PING_SECONDS:
+                return False
+            self._last_keep_alive = now
+            return True
+
+    async def akeep_alive(self):
+        """Ask Ollama to load the model (or keep it loaded) while the caches are still being consulted."""
+        try:
+            import ollama
+
+            await ollama.AsyncClient(host=self.llm.base_url).generate(model=LLMConfig.MODEL_NAME, prompt="")
+        except Exception as e:
+            logging.debug(f"Ollama keep-alive ping failed: {str(e)}")
+
+    def get_table_info(self) -> str:
+        try:
+            return self.schema_cache.get_snapshot().to_prompt_text()
         except Exception as e:
             logging.error(f"Error fetching schema information: {str(e)}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
 
-    def generate_sql_query(self, user_query: str) -> str:
+    def record_success(self, user_query: str, sql_query: str):
+        """Remember SQL that executed successfully so similar questions can reuse it."""
+        if not self.vector_components_ready:
+            # Still warming up; caching this one is not worth blocking on the model load.
+            logging.debug(f"Embeddings not loaded yet; not caching successful query for: {user_query}")
+            return
         try:
-            schema_info = self.get_table_info()
-            logging.info(f"Retrieved schema information:\n{schema_info}")
-            
-            prompt = PromptTemplate(
-                input_variables=["schema", "query"],
-                template="""
-                Given the following database schema:
-                {schema}
-                
-                Task: Convert the following natural language query to a valid SQL query.
-                
-                Requirements:
-                1. Use only the tables and columns that exist in the schema above
-                2. Use proper table aliases and column references
-                3. For aggregations, make sure to include proper GROUP BY clauses
-                4. Always qualify column names with table aliases
-                5. For temporal queries (involving dates/months/years):
-                   - Use DATE_TRUNC('month', timestamp_column) for monthly aggregation
-                   - Use EXTRACT(YEAR FROM timestamp_column) for yearly aggregation
-                   - Use TO_CHAR(timestamp_column, 'YYYY-MM') for month-year formatting
-                6. For sales/revenue queries:
-                   - Use total_amt_usd or total columns depending on context
-                   - Always specify the aggregation function (SUM, AVG, etc.)
-                7. If the query cannot be answered with the available schema, explain why and respond with:
-                   "Unable to generate query with available schema because: [reason]"
-                
-                User Query: {query}
-                
-                Analysis Steps:
-                1. Identify required tables and their relationships
-                2. Identify relevant columns for:
-                   - Measures (amounts, quantities)
-                   - Dimensions (dates, categories, regions)
-                   - Join conditions
-                3. Determine appropriate aggregations and groupings
-                4. Consider date/time handling if temporal analysis is needed
-                
-                If you can generate a valid query, format it as:
-                SQL_QUERY_START
-                [your SQL query here]
-                SQL_QUERY_END
-                
-                If you cannot generate a query, format as:
-                ERROR_START
-                Unable to generate query with available schema because: [detailed explanation]
-                ERROR_END
-                """
+            fingerprint = self.schema_cache.get_snapshot().fingerprint
+            self.semantic_cache.store(user_query, sql_query, fingerprint)
+            self.example_store.add(user_query, sql_query, fingerprint)
+        except Exception as e:
+            logging.warning(f"Could not store successful query for reuse: {str(e)}")
+
+    def _lookup_semantic_cache(self, user_query: str, fingerprint: str):
+        if not self.vector_components_ready:
+            self.start_background_warm_up()
+            return None
+        try:
+            return self.semantic_cache.lookup(user_query, fingerprint)
+        except Exception as e:
+            logging.warning(f"Semantic cache lookup failed: {str(e)}")
+            return None
+
+    def _few_shot_examples(self, user_query: str, fingerprint: str) -> List[Dict[str, Any]]:
+        if LLMConfig.FEW_SHOT_K <= 0 or not self.vector_components_ready:
+            return []  # the compact prompt still works without examples while warming up
+        try:
+            return self.example_store.search(user_query, k=LLMConfig.FEW_SHOT_K, fingerprint=fingerprint)
+        except Exception as e:
+            logging.warning(f"Few-shot example retrieval failed: {str(e)}")
+            return []
+
+    def _schema_text(self, user_query: str, snapshot, schema_mode: Optional[str] = None) -> str:
+        schema_mode = schema_mode or LLMConfig.SCHEMA_MODE
+        if schema_mode == "pruned" and not self.vector_components_ready:
+            logging.info("Embedding model still loading; using the full schema")
+        elif schema_mode == "pruned":
+            try:
+                tables = self.schema_retriever.select_tables(user_query, snapshot)
+                logging.info(f"Pruned schema to tables: {', '.join(tables)}")
+                return snapshot.to_prompt_text(tables)
+            except Exception as e:
+                logging.warning(f"Schema pruning failed, using full schema: {str(e)}")
+        return snapshot.to_prompt_text()
+
+    @traced("prompt_build")
+    def build_prompt(self, user_query: str, snapshot=None, schema_mode: Optional[str] = None,
+                     template: Optional[str] = None) -> str:
+        snapshot = snapshot or self.schema_cache.get_snapshot()
+        schema_info = self._schema_text(user_query, snapshot, schema_mode)
+        log_payload(logging.getLogger(__name__), "Schema for prompt", schema_info)
+
+        dialect = getattr(self.schema_cache.backend, "dialect", "PostgreSQL")
+        template = template or LLMConfig.PROMPT_TEMPLATE
+        if template == "full":
+            return FULL_PROMPT.format(schema=schema_info, query=user_query, dialect=dialect)
+
+        examples = self._few_shot_examples(user_query, snapshot.fingerprint)
+        return COMPACT_PROMPT.format(
+            schema=schema_info, query=user_query, dialect=dialect, examples=format_examples(examples)
+        )
+
+    def _stream_response(self, prompt: str) -> str:
+        """Stream the completion and hang up as soon as an end marker is seen."""
+        scanner = MarkerScanner()
+        with self.scheduler.slot(), span("llm_generate") as stage:
+            stream = self.llm.stream(prompt)
+            try:
+                for chunk in stream:
+                    if scanner.feed(chunk):
+                        break
+            finally:
+                # Closing the generator closes the HTTP stream, which stops Ollama generating.
+                stream.close()
+            stage.set("prompt_tokens", estimate_tokens(prompt))
+            stage.set("completion_tokens", estimate_tokens(scanner.text))
+        logging.info(
+            f"LLM stream finished after {scanner.chunks} chunks"
+            f"{' (stopped at end marker)' if scanner.stopped_early else ''}"
+        )
+        return scanner.text
+
+    async def _astream_response(self, prompt: str) -> str:
+        scanner = MarkerScanner()
+        async with self.scheduler.aslot():
+            with span("llm_generate") as stage:
+                stream = self.llm.astream(prompt)
+                try:
+                    async for chunk in stream:
+                        if scanner.feed(chunk):
+                            break
+                finally:
+                    await stream.aclose()
+                stage.set("prompt_tokens", estimate_tokens(prompt))
+                stage.set("completion_tokens", estimate_tokens(scanner.text))
+        logging.info(
+            f"LLM stream finished after {scanner.chunks} chunks"
+            f"{' (stopped at end marker)' if scanner.stopped_early else ''}"
+        )
+        return scanner.text
+
+    def _sql_dialect(self) -> str:
+        return getattr(self.schema_cache.backend, "sqlglot_dialect", "postgres")
+
+    @traced("sql_parse")
+    def _parse_response(self, response: str) -> str:
+        if "SQL_QUERY_START" not in response and "ERROR_START" in response and "ERROR_END" in response:
+            error_msg = response.split("ERROR_START")[1].split("ERROR_END")[0].strip()
+            return f"Unable to generate query: {error_msg}"
+        sql = extract_sql(response, self._sql_dialect())
+        return sql or "Unable to generate a valid SQL query from the response"
+
+    def _check(self, sql_query: str, snapshot) -> List[str]:
+        """Local problems with generated SQL; an explicit refusal from the model is not repaired."""
+        if sql_query.startswith("Unable to generate query:"):
+            return []
+        if sql_query.startswith("Unable to generate"):
+            return ["The response did not contain a SQL query between SQL_QUERY_START and SQL_QUERY_END"]
+        with span("sql_validate") as stage:
+            problems = validate_sql(sql_query, snapshot, self._sql_dialect())
+            stage.set("problems", len(problems))
+        return problems
+
+    def build_repair_prompt(self, user_query: str, sql_query: str, problems: List[str], snapshot=None) -> str:
+        snapshot = snapshot or self.schema_cache.get_snapshot()
+        # The full schema: the problem may be a table that pruning left out.
+        return REPAIR_PROMPT.format(
+            schema=snapshot.to_prompt_text(),
+            dialect=getattr(self.schema_cache.backend, "dialect", "PostgreSQL"),
+            query=user_query,
+            sql=sql_query if not sql_query.startswith("Unable to generate") else "(no query)",
+            problems="\n".join(f"- {problem}" for problem in problems)
+        )
+
+    @staticmethod
+    def _count_repair(source: str):
+        if metrics.enabled:
+            metrics.registry.inc(
+                "rsa_sql_repairs_total", help_text="LLM repair calls by the check that failed.", source=source
             )
-            
-            chain = prompt | self.llm
-            response = chain.invoke({"schema": schema_info, "query": user_query})
-            logging.info(f"LLM Response: {response}")
-            
-            # Extract SQL query using more reliable method
-            if "SQL_QUERY_START" in response and "SQL_QUERY_END" in response:
-                # Get everything between SQL_QUERY_START and SQL_QUERY_END
-                sql_parts = response.split("SQL_QUERY_START")[1].split("SQL_QUERY_END")[0].strip()
-                
-                # Extract only the SQL query part (ignore analysis)
-                sql_lines = []
-                capture = False
-                for line in sql_parts.split('\n'):
-                    if line.strip().upper().startswith('SELECT'):
-                        capture = True
-                    if capture and line.strip():
-                        sql_lines.append(line.strip())
-                
-                if sql_lines:
-                    return '\n'.join(sql_lines)
-                
-            elif "ERROR_START" in response and "ERROR_END" in response:
-                error_msg = response.split("ERROR_START")[1].split("ERROR_END")[0].strip()
-                return f"Unable to generate query: {error_msg}"
-                
-            # Fallback: try to extract SQL directly
-            if "SELECT" in response and "FROM" in response:
-                sql_lines = []
-                capture = False
-                for line in response.split('\n'):
-                    line = line.strip()
-                    if line.upper().startswith('SELECT'):
-                        capture = True
-                    if capture and any(keyword in line.upper() for keyword in 
-                        ['SELECT', 'FROM', 'WHERE', 'GROUP BY', 'ORDER BY', 'HAVING']):
-                        sql_lines.append(line)
-                if sql_lines:
-                    return '\n'.join(sql_lines)
-                
-            return "Unable to generate a valid SQL query from the response"
-            
+
+    @staticmethod
+    def _count_outcome(sql_query: str) -> str:
+        """Count parse outcomes per prompt template so templates can be compared in /metrics."""
+        if metrics.enabled:
+            if sql_query.startswith("Unable to generate query:"):
+                outcome = "refused"
+            elif sql_query.startswith("Unable to generate"):
+                outcome = "unparsed"
+            else:
+                outcome = "sql"
+            metrics.registry.inc(
+                "rsa_sql_generation_total", help_text="LLM completions by prompt template and parse outcome.",
+                template=LLMConfig.PROMPT_TEMPLATE, outcome=outcome
+            )
+        return sql_query
+
+    def _prepare(self, user_query: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return (cached SQL, None) on a semantic cache hit, else (None, prompt)."""
+        snapshot = self.schema_cache.get_snapshot()
+        cached_sql = self._lookup_semantic_cache(user_query, snapshot.fingerprint)
+        if cached_sql:
+            return cached_sql, None
+        return None, self.build_prompt(user_query, snapshot)
+
+    def _complete(self, prompt: str) -> str:
+        response = self._stream_response(prompt)
+        log_payload(logging.getLogger(__name__), "LLM response", response)
+        return self._parse_response(response)
+
+    async def _acomplete(self, prompt: str) -> str:
+        response = await self._astream_response(prompt)
+        log_payload(logging.getLogger(__name__), "LLM response", response)
+        return self._parse_response(response)
+
+    def _repair_prompt_if_needed(self, user_query: str, sql_query: str, attempt: int) -> Optional[str]:
+        snapshot = self.schema_cache.get_snapshot()
+        problems = self._check(sql_query, snapshot)
+        if not problems:
+            return None
+        logging.info(f"Generated SQL failed local checks (repair {attempt}): {'; '.join(problems)}")
+        self._count_repair("validation")
+        return self.build_repair_prompt(user_query, sql_query, problems, snapshot)
+
+    def generate_sql_query(self, user_query: str) -> str:
+        try:
+            cached_sql, prompt = self._prepare(user_query)
+            if cached_sql:
+                return cached_sql
+
+            sql_query = self._count_outcome(self._complete(prompt))
+            # Problems the parser can see are fed back to the model before any database round trip.
+            for attempt in range(1, LLMConfig.SQL_REPAIR_ATTEMPTS + 1):
+                repair_prompt = self._repair_prompt_if_needed(user_query, sql_query, attempt)
+                if repair_prompt is None:
+                    break
+                sql_query = self._complete(repair_prompt)
+            return sql_query
+
         except Exception as e:
             logging.error(f"Error generating SQL query: {str(e)}")
-            return f"Error generating SQL query: {str(e)}"
\ No newline at end of file
+            return f"Error generating SQL query: {str(e)}"
+
+    async def agenerate_sql_query(self, user_query: str) -> str:
+        """Async variant: cache/schema work runs in a thread, the LLM is streamed natively."""
+        try:
+            cached_sql, prompt = await asyncio.to_thread(self._prepare, user_query)
+            if cached_sql:
+                return cached_sql
+
+            return await self.agenerate_from_prompt(user_query, prompt)
+
+        except Exception as e:
+            logging.error(f"Error generating SQL query: {str(e)}")
+            return f"Error generating SQL query: {str(e)}"
+
+    async def agenerate_from_prompt(self, user_query: str, prompt: str) -> str:
+        """Complete a prompt from ``build_prompt``, then run the local repair loop."""
+        try:
+            sql_query = self._count_outcome(await self._acomplete(prompt))
+            for attempt in range(1, LLMConfig.SQL_REPAIR_ATTEMPTS + 1):
+                repair_prompt = await asyncio.to_thread(self._repair_prompt_if_needed, user_query, sql_query, attempt)
+                if repair_prompt is None:
+                    break
+                sql_query = await self._acomplete(repair_prompt)
+            return sql_query
+
+        except Exception as e:
+            logging.error(f"Error generating SQL query: {str(e)}")
+            return f"Error generating SQL query: {str(e)}"
+
+    async def arepair_sql_query(self, user_query: str, sql_query: str, error: str) -> str:
+        """One repair round for SQL the database rejected, with its error message as the problem."""
+        try:
+            self._count_repair("database")
+            prompt = await asyncio.to_thread(self.build_repair_prompt, user_query, sql_query, [error])
+            return await self._acomplete(prompt)
+        except Exception as e:
+            logging.error(f"Error repairing SQL query: {str(e)}")
+            return f"Error generating SQL query: {str(e)}"
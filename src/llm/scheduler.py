@@ -0,0 +1,256 @@
+"""Admission control in front of Ollama.
+
+``SingleFlight`` lets concurrent callers asking the same (normalized) question
+share one generation. ``LLMScheduler`` bounds how many generations reach the
+model at once and hands free slots to interactive requests before batch work.
+"""
+
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from config.config import LLMConfig
+from src.utils.metrics import metrics
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# Read when a slot is requested; batch jobs set it to "batch" for their tasks.
+llm_priority: ContextVar[str] = ContextVar("llm_priority", default="interactive")
+
+def set_llm_priority(priority: str):
+    """Set the scheduling class for LLM calls from the current task/thread context; returns a reset token."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority: {priority}")
+    return llm_priority.set(priority)
+
+
+class _Waiter:
+    __slots__ = ("priority", "state", "event", "loop", "future")
+
+    def __init__(self, priority: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.state = "waiting"  # -> "granted" or "cancelled", changed under the scheduler lock
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class LLMScheduler:
+    """At most ``limit`` concurrent LLM calls; queued calls are served by priority, then arrival.
+
+    Thread-safe: sync callers block on an event, async callers await a future
+    on their own loop. ``limit <= 0`` disables queueing.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.limit = LLMConfig.MAX_CONCURRENCY if limit is None else limit
+        self._active = 0
+        self._queue = []  # heap of (priority rank, sequence, waiter)
+        self._depth = {priority: 0 for priority in PRIORITIES}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "queued": 0, "max_depth": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    def _try_acquire(self, waiter: _Waiter) -> bool:
+        """Take a slot now or enqueue ``waiter``; returns True if the slot was taken."""
+        with self._lock:
+            self.stats["calls"] += 1
+            if self.limit <= 0 or (self._active < self.limit and not self._queue):
+                self._active += 1
+                self._publish()
+                return True
+            heapq.heappush(self._queue, (PRIORITIES[waiter.priority], next(self._sequence), waiter))
+            self._depth[waiter.priority] += 1
+            self.stats["queued"] += 1
+            self.stats["max_depth"] = max(self.stats["max_depth"], len(self._queue))
+            self._publish()
+            return False
+
+    def _release(self):
+        with self._lock:
+            self._active -= 1
+            while self._queue and self._active < self.limit:
+                _, _, waiter = heapq.heappop(self._queue)
+                if waiter.state != "waiting":
+                    continue  # cancelled while queued
+                waiter.state = "granted"
+                self._depth[waiter.priority] -= 1
+                self._active += 1
+                waiter.wake()
+            self._publish()
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Withdraw a queued waiter; returns True if it had already been granted a slot."""
+        with self._lock:
+            if waiter.state == "granted":
+                return True
+            waiter.state = "cancelled"
+            self._depth[waiter.priority] -= 1
+            self._publish()
+            return False
+
+    def _publish(self):
+        if not metrics.enabled:
+            return
+        for priority, depth in self._depth.items():
+            metrics.registry.set(
+                "rsa_llm_queue_depth", depth, help_text="LLM calls waiting for a slot.", priority=priority
+            )
+        metrics.registry.set("rsa_llm_active", self._active, help_text="LLM calls holding a slot.")
+
+    def _record_wait(self, priority: str, waited: float):
+        with self._lock:
+            self.stats["wait_seconds"] += waited
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], waited)
+        if metrics.enabled:
+            metrics.registry.observe(
+                "rsa_llm_queue_wait_seconds", waited,
+                help_text="Time LLM calls spent queued for a slot.", priority=priority
+            )
+
+    @contextmanager
+    def slot(self, priority: Optional[str] = None):
+        waiter = _Waiter(priority or llm_priority.get())
+        start = time.perf_counter()
+        if not self._try_acquire(waiter):
+            waiter.event.wait()
+        self._record_wait(waiter.priority, time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def aslot(self, priority: Optional[str] = None):
+        waiter = _Waiter(priority or llm_priority.get(), asyncio.get_running_loop())
+        start = time.perf_counter()
+        if not self._try_acquire(waiter):
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if self._abandon(waiter):
+                    self._release()  # granted just as we were cancelled: pass the slot on
+                raise
+        self._record_wait(waiter.priority, time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "limit": self.limit,
+                "active": self._active,
+                "depth": dict(self._depth),
+            }
+
+
+class _Flight:
+    __slots__ = ("task", "event", "result", "error", "waiters")
+
+    def __init__(self, task: Optional[asyncio.Task] = None):
+        self.task = task
+        self.event = None if task else threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key share its result.
+
+    Callers only share with others of the same ``llm_priority``, so an
+    interactive request never waits on a batch-priority generation. Async
+    flights run as their own task so a cancelled caller does not cancel the
+    others; the task is cancelled once every caller has gone away.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._flights: Dict[Tuple[Any, str, Hashable], _Flight] = {}  # (loop, priority, key)
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    def _joined(self, key: Hashable):
+        self.stats["coalesced"] += 1
+        self.logger.info(f"Joined in-flight generation for: {key}")
+        if metrics.enabled:
+            metrics.registry.inc(
+                "rsa_llm_coalesced_total", help_text="LLM calls answered by an identical in-flight call."
+            )
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        flight_key = (None, llm_priority.get(), key)
+        with self._lock:
+            flight = self._flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[flight_key] = _Flight()
+                self.stats["leaders"] += 1
+        if not leader:
+            self._joined(key)
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[flight_key]
+            flight.event.set()
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, llm_priority.get(), key)
+        with self._lock:
+            flight = self._flights.get(flight_key)
+            if flight is None:
+                flight = self._flights[flight_key] = _Flight(loop.create_task(factory()))
+                flight.task.add_done_callback(lambda _: self._finish(flight_key, flight))
+                self.stats["leaders"] += 1
+            else:
+                self._joined(key)
+            flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _finish(self, flight_key, flight: _Flight):
+        with self._lock:
+            if self._flights.get(flight_key) is flight:
+                del self._flights[flight_key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
+
+# One slot pool per process, shared by every QueryGenerator talking to the same Ollama server.
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional, Tuple
+import logging
+import threading
+from config.config import LLMConfig
+from src.database.schema_cache import SchemaSnapshot
+from src.utils.metrics import span
+from .vector_index import sync_collection
+
+class SchemaRetriever:
+    """Keeps schema-element embeddings in sync with the schema and picks the tables a question needs."""
+
+    def __init__(self, embeddings, client, top_k: Optional[int] = None, index_columns: Optional[bool] = None):
+        self.top_k = LLMConfig.SCHEMA_TOP_K if top_k is None else top_k
+        self.index_columns = LLMConfig.SCHEMA_INDEX_COLUMNS if index_columns is None else index_columns
+        self.logger = logging.getLogger(__name__)
+        from langchain_chroma import Chroma
+
+        self.store = Chroma(
+            embedding_function=embeddings,
+            client=client,
+            collection_name="schema_store",
+            collection_metadata={"hnsw:space": "cosine"}
+        )
+        self._indexed_fingerprint: Optional[str] = None
+        self._indexed_ids: List[str] = []
+        self._lock = threading.Lock()
+
+    def index(self, snapshot: SchemaSnapshot, force: bool = False) -> Dict[str, int]:
+        """Sync the collection with ``snapshot``; only new or changed elements are embedded."""
+        with self._lock:
+            if snapshot.fingerprint == self._indexed_fingerprint and not force:
+                return {"embedded": 0, "unchanged": len(self._indexed_ids), "deleted": 0}
+
+            items: Dict[str, Tuple[str, Dict[str, str]]] = {}
+            for table in snapshot.tables.values():
+                column_names = ", ".join(col.name for col in table.columns)
+                description = f" ({table.description})" if table.description else ""
+                items[f"table:{table.name}"] = (
+                    f"Table {table.name}{description} with columns {column_names}",
+                    {"table": table.name, "kind": "table"}
+                )
+                if self.index_columns:
+                    for col in table.columns:
+                        items[f"column:{table.name}.{col.name}"] = (
+                            f"{table.name}.{col.name}: {col.describe()}", {"table": table.name, "kind": "column"}
+                        )
+
+            stats = sync_collection(self.store, items, force=force)
+            self._indexed_ids = list(items)
+            self._indexed_fingerprint = snapshot.fingerprint
+            self.logger.info(
+                f"Schema index for fingerprint {snapshot.fingerprint}: {stats['embedded']} embedded, "
+                f"{stats['unchanged']} unchanged, {stats['deleted']} deleted"
+            )
+            return stats
+
+    def select_tables(self, question: str, snapshot: SchemaSnapshot) -> List[str]:
+        """Top-k tables for ``question`` plus their foreign-key neighbours, in schema order."""
+        self.index(snapshot)
+        if not self._indexed_ids:
+            return list(snapshot.tables)
+        fetch_k = self.top_k * 4 if self.index_columns else self.top_k
+        with span("schema_retrieval"):
+            documents = self.store.similarity_search(question, k=min(fetch_k, len(self._indexed_ids)))
+
+        selected: List[str] = []
+        for document in documents:
+            table_name = document.metadata["table"]
+            if table_name in snapshot.tables and table_name not in selected:
+                selected.append(table_name)
+            if len(selected) >= self.top_k:
+                break
+
+        related = set(selected)
+        for table_name in selected:
+            related |= snapshot.neighbours(table_name)
+        return [name for name in snapshot.tables if name in related]
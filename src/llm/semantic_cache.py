@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import hashlib
+import logging
+import threading
+from config.config import CacheConfig
+
+class SemanticCache:
+    """Maps question embeddings to SQL that has already executed successfully.
+
+    Entries live in the QueryGenerator's Chroma collection and are tagged with
+    the schema fingerprint they were generated against, so a schema change
+    drops every entry built for the old schema. With a persistent collection,
+    ``restore`` picks up the entries from earlier runs.
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        self.vector_store = vector_store
+        self.threshold = CacheConfig.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.max_entries = CacheConfig.SEMANTIC_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.logger = logging.getLogger(__name__)
+        self._entries: "OrderedDict[str, str]" = OrderedDict()  # id -> schema fingerprint, LRU order
+        self._fingerprint: Optional[str] = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def _entry_id(question: str, fingerprint: str) -> str:
+        key = f"{fingerprint}:{' '.join(question.lower().split())}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def lookup(self, question: str, fingerprint: str) -> Optional[str]:
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            if not self._entries:
+                self.stats["misses"] += 1
+                return None
+
+        results = self.vector_store.similarity_search_with_relevance_scores(
+            question, k=1, filter={"schema_fingerprint": fingerprint}
+        )
+        with self._lock:
+            if results:
+                document, score = results[0]
+                entry_id = document.metadata.get("entry_id")
+                if score >= self.threshold and entry_id in self._entries:
+                    self._entries.move_to_end(entry_id)
+                    self.stats["hits"] += 1
+                    self.logger.info(f"Semantic cache hit (score {score:.3f}) for: {question}")
+                    return document.metadata["sql"]
+            self.stats["misses"] += 1
+            return None
+
+    def restore(self) -> int:
+        """Adopt entries a previous process left in a persistent collection.
+
+        Stale fingerprints are dropped on the next lookup; beyond ``max_entries``
+        the surplus is evicted.
+        """
+        stored = self.vector_store.get(include=["metadatas"])
+        with self._lock:
+            for entry_id, metadata in zip(stored["ids"], stored["metadatas"]):
+                self._entries[entry_id] = (metadata or {}).get("schema_fingerprint")
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            if evicted:
+                self.vector_store.delete(ids=evicted)
+            if self._entries:
+                self.logger.info(f"Restored {len(self._entries)} semantic cache entries")
+            return len(self._entries)
+
+    def store(self, question: str, sql: str, fingerprint: str):
+        entry_id = self._entry_id(question, fingerprint)
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            if entry_id in self._entries:
+                self._entries.move_to_end(entry_id)
+                return
+            self.vector_store.add_texts(
+                [question],
+                metadatas=[{"sql": sql, "schema_fingerprint": fingerprint, "entry_id": entry_id}],
+                ids=[entry_id]
+            )
+            self._entries[entry_id] = fingerprint
+            self.stats["stores"] += 1
+
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            if evicted:
+                self.vector_store.delete(ids=evicted)
+                self.stats["evictions"] += len(evicted)
+
+    def _check_fingerprint(self, fingerprint: str):
+        if fingerprint == self._fingerprint:
+            return
+        stale = [entry_id for entry_id, fp in self._entries.items() if fp != fingerprint]
+        if stale:
+            self.vector_store.delete(ids=stale)
+            for entry_id in stale:
+                del self._entries[entry_id]
+            self.stats["invalidations"] += len(stale)
+            self.logger.info(f"Schema changed; dropped {len(stale)} semantic cache entries")
+        self._fingerprint = fingerprint
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0
+            }
@@ -0,0 +1,128 @@
+"""Local SQL extraction and validation with sqlglot, so bad queries are caught before a DB round trip.
+
+sqlglot is imported on first use; it adds ~150 ms to a cold import.
+"""
+
+from typing import Dict, List, Optional
+import re
+from src.database.schema_cache import SchemaSnapshot
+
+SQL_START = re.compile(r"\b(WITH|SELECT)\b", re.IGNORECASE)
+TOKEN_REPR = re.compile(r"<Token token_type: [\w.]+, text: (.*?), line: .*?>")
+MAX_LISTED_COLUMNS = 20
+
+def _first_statement(text: str, dialect: Optional[str]) -> str:
+    """Cut ``text`` at the first top-level semicolon (sqlglot's tokenizer skips quoted ones)."""
+    import sqlglot
+    from sqlglot.tokens import TokenType
+
+    try:
+        tokens = sqlglot.tokenize(text, read=dialect)
+    except Exception:
+        return text
+    for token in tokens:
+        if token.token_type == TokenType.SEMICOLON:
+            return text[:token.start]
+    return text
+
+def _is_prose(line: str, dialect: Optional[str]) -> bool:
+    """A line that reads as a sentence: two bare words, or a word and a colon, to start with."""
+    import sqlglot
+    from sqlglot.tokens import TokenType
+
+    try:
+        tokens = sqlglot.tokenize(line, read=dialect)
+    except Exception:
+        return True  # e.g. an unbalanced apostrophe in "Here's why"
+    return (
+        len(tokens) >= 2 and tokens[0].token_type == TokenType.VAR
+        and tokens[1].token_type in (TokenType.VAR, TokenType.COLON)
+    )
+
+def extract_sql(response: str, dialect: Optional[str] = None) -> Optional[str]:
+    """Pull one SQL query out of an LLM response.
+
+    Uses the text between SQL_QUERY_START/SQL_QUERY_END when present, drops
+    code fences and any analysis before the first SELECT/WITH, cuts at the
+    first semicolon and removes trailing lines that read as prose. Anything
+    else is kept even when it does not parse, so a truncated query (a dangling
+    AND or LIMIT) reaches validation as a syntax error instead of running with
+    a clause missing. Returns None when the response contains no query at all.
+    """
+    body = response
+    if "SQL_QUERY_START" in response:
+        body = response.split("SQL_QUERY_START", 1)[1].split("SQL_QUERY_END", 1)[0]
+    body = "\n".join(line for line in body.splitlines() if not line.strip().startswith("```"))
+    match = SQL_START.search(body)
+    if not match:
+        return None
+
+    lines = _first_statement(body[match.start():], dialect).strip().splitlines()
+    while len(lines) > 1 and (not lines[-1].strip() or _is_prose(lines[-1], dialect)):
+        lines.pop()
+    return "\n".join(lines).strip()
+
+def _describe_columns(table) -> str:
+    names = [column.name for column in table.columns]
+    listed = ", ".join(names[:MAX_LISTED_COLUMNS])
+    return listed + (", ..." if len(names) > MAX_LISTED_COLUMNS else "")
+
+def validate_sql(sql: str, snapshot: SchemaSnapshot, dialect: Optional[str] = None) -> List[str]:
+    """Problems found without touching the database: syntax, statement type, unknown tables/columns.
+
+    Columns are only checked where they can be resolved for certain (a known
+    table alias, or every table in scope is a real table); anything coming
+    from CTEs, subqueries or table functions is left to the database.
+    """
+    import sqlglot
+    from sqlglot import exp
+    from sqlglot.errors import ParseError
+
+    try:
+        statements = [statement for statement in sqlglot.parse(sql, read=dialect) if statement is not None]
+    except ParseError as e:
+        detail = e.errors[0] if e.errors else {}
+        description = TOKEN_REPR.sub(r"'\1'", detail.get("description", str(e).splitlines()[0]))
+        return [f"Syntax error at line {detail.get('line', '?')}, column {detail.get('col', '?')}: {description}"]
+    if len(statements) != 1:
+        return [f"Expected exactly one SQL statement, found {len(statements)}"]
+    tree = statements[0]
+    if not isinstance(tree, exp.Query):
+        return [f"Only SELECT queries are allowed, got {tree.key.upper()}"]
+
+    known = {name.lower(): table for name, table in snapshot.tables.items()}
+    cte_names = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+    problems: List[str] = []
+    scope: Dict[str, Optional[object]] = {}  # alias -> TableInfo, or None when the columns are unknown
+
+    for table in tree.find_all(exp.Table):
+        name = table.name.lower()
+        alias = table.alias_or_name.lower()
+        if not name or name in cte_names:
+            scope[alias] = None
+        elif name in known:
+            scope[alias] = known[name]
+        else:
+            problems.append(f"Unknown table {table.name}; available tables: {', '.join(snapshot.tables)}")
+            scope[alias] = None
+    for subquery in tree.find_all(exp.Subquery):
+        if subquery.alias:
+            scope[subquery.alias.lower()] = None
+
+    output_aliases = {alias.alias.lower() for alias in tree.find_all(exp.Alias)}
+    fully_known = all(table is not None for table in scope.values())
+    for column in tree.find_all(exp.Column):
+        if isinstance(column.this, exp.Star):
+            continue
+        name = column.name.lower()
+        qualifier = column.table.lower()
+        if qualifier:
+            if qualifier not in scope:
+                problems.append(f"Unknown table alias {column.table} in {column.sql()}")
+            elif scope[qualifier] is not None and name not in {c.name.lower() for c in scope[qualifier].columns}:
+                table = scope[qualifier]
+                problems.append(f"Unknown column {column.sql()}; {table.name} has: {_describe_columns(table)}")
+        elif fully_known and scope and name not in output_aliases:
+            if not any(name in {c.name.lower() for c in table.columns} for table in scope.values()):
+                problems.append(f"Unknown column {column.name} in tables {', '.join(t.name for t in scope.values())}")
+    return list(dict.fromkeys(problems))
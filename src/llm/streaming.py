@@ -0,0 +1,32 @@
+from typing import Iterable
+
+END_MARKERS = ("SQL_QUERY_END", "ERROR_END")
+
+class MarkerScanner:
+    """Accumulates streamed LLM text and reports when an end marker has arrived."""
+
+    def __init__(self, markers: Iterable[str] = END_MARKERS):
+        self.markers = tuple(markers)
+        self._longest = max(len(marker) for marker in self.markers)
+        self._text = ""
+        self.chunks = 0
+        self.stopped_early = False
+
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk; return True once the response can be cut off."""
+        self.chunks += 1
+        search_from = max(0, len(self._text) - self._longest)
+        self._text += chunk
+        window = self._text[search_from:]
+        for marker in self.markers:
+            position = window.find(marker)
+            if position != -1:
+                # Drop whatever the model emitted after the marker.
+                self._text = self._text[:search_from + position + len(marker)]
+                self.stopped_early = True
+                return True
+        return False
+
+    @property
+    def text(self) -> str:
+        return self._text
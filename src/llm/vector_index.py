@@ -0,0 +1,66 @@
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+from config.config import IndexConfig
+
+def content_hash(text: str, metadata: Dict[str, Any]) -> str:
+    """Digest of everything that ends up in the collection for one item."""
+    payload = json.dumps([text, metadata], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def load_embeddings(model_name: Optional[str] = None):
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=model_name or IndexConfig.EMBEDDING_MODEL,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True, 'batch_size': IndexConfig.EMBED_BATCH_SIZE}
+    )
+
+def open_client(path: Optional[str] = None):
+    """Chroma client persisted under ``path`` (IndexConfig.CHROMA_PATH); in-memory when empty."""
+    import chromadb
+
+    path = IndexConfig.CHROMA_PATH if path is None else path
+    if not path:
+        return chromadb.Client()
+    return chromadb.PersistentClient(path=path)
+
+def sync_collection(
+    store,
+    items: Dict[str, Tuple[str, Dict[str, Any]]],
+    batch_size: Optional[int] = None,
+    force: bool = False,
+    where: Optional[Dict[str, Any]] = None
+) -> Dict[str, int]:
+    """Make a Chroma collection hold exactly ``items`` ({id: (text, metadata)}).
+
+    Each document carries a ``content_hash`` of its text and metadata, so only
+    new or changed items are embedded (in batches); ids no longer present are
+    deleted. ``where`` limits the sync to documents matching a metadata filter.
+    ``force`` re-embeds everything.
+    """
+    batch_size = batch_size or IndexConfig.EMBED_BATCH_SIZE
+    existing = store.get(where=where, include=["metadatas"])
+    stored_hashes = {
+        doc_id: (metadata or {}).get("content_hash")
+        for doc_id, metadata in zip(existing["ids"], existing["metadatas"])
+    }
+
+    pending = []
+    for doc_id, (text, metadata) in items.items():
+        digest = content_hash(text, metadata)
+        if force or stored_hashes.get(doc_id) != digest:
+            pending.append((doc_id, text, {**metadata, "content_hash": digest}))
+    stale = [doc_id for doc_id in stored_hashes if doc_id not in items]
+
+    if stale:
+        store.delete(ids=stale)
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        store.add_texts(
+            [text for _, text, _ in batch],
+            metadatas=[metadata for _, _, metadata in batch],
+            ids=[doc_id for doc_id, _, _ in batch]
+        )
+    return {"embedded": len(pending), "unchanged": len(items) - len(pending), "deleted": len(stale)}
@@ -1,24 +1,116 @@
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+import atexit
+import hashlib
+import json
 import logging
 import os
-from datetime import datetime
+import queue
+import random
+from datetime import datetime, timezone
+from config.config import LogConfig
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+def set_request_id(request_id: str):
+    """Tag log records from the current task/thread context; returns a token for ``reset_request_id``."""
+    return request_id_var.set(request_id)
+
+def reset_request_id(token):
+    request_id_var.reset(token)
+
+def truncate_payload(text: str, max_chars: Optional[int] = None) -> str:
+    """Shorten large payloads (schema, prompt, LLM output) to a prefix plus length and digest."""
+    max_chars = LogConfig.PAYLOAD_MAX_CHARS if max_chars is None else max_chars
+    if text is None or len(text) <= max_chars:
+        return text
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+    return f"{text[:max_chars]}... [{len(text) - max_chars} more chars, {len(text)} total, sha1 {digest}]"
+
+def log_payload(logger: logging.Logger, label: str, text: str):
+    """Log a large payload truncated: at DEBUG when enabled, otherwise only for a sample of calls."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"{label}: {truncate_payload(text)}")
+    elif LogConfig.PAYLOAD_SAMPLE_RATE and random.random() < LogConfig.PAYLOAD_SAMPLE_RATE:
+        logger.info(f"{label} (sampled): {truncate_payload(text)}")
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with timestamp, level, logger, request ID and message."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
 
 class Logger:
+    _listener: Optional[QueueListener] = None
+
     @staticmethod
     def setup_logging():
-        log_dir = "logs"
+        """Route all records through a queue so request paths never block on file or console I/O.
+
+        A background QueueListener writes JSON lines to a size-rotated file and
+        plain text to the console. Safe to call more than once.
+        """
+        if Logger._listener is not None:
+            return
+
+        log_dir = LogConfig.LOG_DIR
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
-            
-        log_file = os.path.join(
-            log_dir, 
-            f"app_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+
+        file_handler = RotatingFileHandler(
+            os.path.join(log_dir, "app.log"),
+            maxBytes=LogConfig.MAX_BYTES,
+            backupCount=LogConfig.BACKUP_COUNT,
+            encoding="utf-8"
         )
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
-        ) 
\ No newline at end of file
+        file_handler.setFormatter(
+            JsonFormatter() if LogConfig.FORMAT == "json"
+            else logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s')
+        )
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(
+            logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s')
+        )
+
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        queue_handler = QueueHandler(log_queue)
+        # The filter runs on the caller's thread, where the request ID context is still set.
+        queue_handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        root.setLevel(LogConfig.LEVEL)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+
+        Logger._listener = QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
+        )
+        Logger._listener.start()
+        atexit.register(Logger.shutdown)
+
+    @staticmethod
+    def shutdown():
+        """Flush queued records and stop the background writer."""
+        if Logger._listener is not None:
+            Logger._listener.stop()
+            Logger._listener = None
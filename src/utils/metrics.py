@@ -0,0 +1,278 @@
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+import functools
+import inspect
+import logging
+import threading
+import time
+from config.config import MetricsConfig
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_PREFIX = "rsa"
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for prompts and completions."""
+    return max(1, len(text) // 4) if text else 0
+
+def _label_text(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe store of labelled histograms, counters and gauges, rendered as Prometheus text."""
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[Tuple, Histogram]] = {}
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._gauges: Dict[str, Dict[Tuple, float]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, help_text: str = "", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+            if help_text:
+                self._help.setdefault(name, help_text)
+
+    def inc(self, name: str, value: float = 1, help_text: str = "", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+            if help_text:
+                self._help.setdefault(name, help_text)
+
+    def set(self, name: str, value: float, help_text: str = "", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+            if help_text:
+                self._help.setdefault(name, help_text)
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def counter(self, name: str, **labels) -> float:
+        return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def gauge(self, name: str, **labels) -> Optional[float]:
+        return self._gauges.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name in sorted(self._histograms):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        bucket_labels = _label_text(labels, f'le="{bound}"')
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    bucket_labels = _label_text(labels, 'le="+Inf"')
+                    lines.append(f"{name}_bucket{bucket_labels} {histogram.count}")
+                    lines.append(f"{name}_sum{_label_text(labels)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_label_text(labels)} {histogram.count}")
+            for name in sorted(self._counters):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_label_text(labels)} {_format_value(value)}")
+            for name in sorted(self._gauges):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in sorted(self._gauges[name].items()):
+                    lines.append(f"{name}{_label_text(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class _NoopSpan:
+    recording = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def set(self, key: str, value: Any):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Times one pipeline stage; numeric attributes are summed into ``<prefix>_stage_<key>_total``."""
+
+    recording = True
+    __slots__ = ("_metrics", "stage", "attributes", "_start", "_otel_span")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self._metrics = metrics
+        self.stage = stage
+        self.attributes: Dict[str, Any] = {}
+        self._otel_span = None
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        if self._metrics._otel_tracer is not None:
+            self._otel_span = self._metrics._otel_tracer.start_span(self.stage)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._metrics._finish(self, time.perf_counter() - self._start, exc)
+        return False
+
+
+class Metrics:
+    """Entry point for spans. When disabled, ``span()`` returns a shared no-op object."""
+
+    def __init__(self, enabled: Optional[bool] = None, registry: Optional[MetricsRegistry] = None):
+        self.enabled = MetricsConfig.ENABLED if enabled is None else enabled
+        self.registry = registry or MetricsRegistry()
+        self.logger = logging.getLogger(__name__)
+        self._otel_tracer = None
+
+    def span(self, stage: str):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, stage)
+
+    def traced(self, stage: str):
+        """Decorator form of ``span()`` for sync and async functions."""
+        def decorator(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await fn(*args, **kwargs)
+                    with Span(self, stage):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with Span(self, stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def enable_otel(self) -> bool:
+        """Mirror spans to OpenTelemetry, exporting over OTLP when the SDK is installed."""
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            self.logger.warning("opentelemetry-api is not installed; OpenTelemetry export disabled")
+            return False
+        try:
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            # Endpoint and headers come from the standard OTEL_EXPORTER_OTLP_* variables.
+            provider = TracerProvider()
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+            trace.set_tracer_provider(provider)
+        except ImportError:
+            self.logger.info("OpenTelemetry SDK/OTLP exporter not installed; using the global tracer provider")
+        self._otel_tracer = trace.get_tracer("rag-sql-assistant")
+        return True
+
+    def _finish(self, span: Span, duration: float, exc: Optional[BaseException]):
+        labels = {"stage": span.stage}
+        self.registry.observe(
+            f"{METRIC_PREFIX}_stage_duration_seconds", duration,
+            help_text="Time spent in each pipeline stage.", **labels
+        )
+        if exc is not None:
+            self.registry.inc(
+                f"{METRIC_PREFIX}_stage_errors_total", help_text="Pipeline stages that raised.", **labels
+            )
+        for key, value in span.attributes.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.registry.inc(
+                    f"{METRIC_PREFIX}_stage_{key}_total", value,
+                    help_text=f"Sum of {key} reported by pipeline stages.", **labels
+                )
+
+        if span._otel_span is not None:
+            span._otel_span.set_attributes(
+                {key: value for key, value in span.attributes.items() if isinstance(value, (bool, int, float, str))}
+            )
+            if exc is not None:
+                span._otel_span.record_exception(exc)
+            span._otel_span.end()
+
+
+metrics = Metrics()
+span = metrics.span
+traced = metrics.traced
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = metrics.registry
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format % args)
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None,
+                         registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """Serve ``GET /metrics`` in Prometheus text format from a daemon thread."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry or metrics.registry})
+    server = ThreadingHTTPServer(
+        (MetricsConfig.HOST if host is None else host, MetricsConfig.PORT if port is None else port), handler
+    )
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    address, bound_port = server.server_address[:2]
+    logging.getLogger(__name__).info(f"Serving metrics on http://{address}:{bound_port}/metrics")
+    return server
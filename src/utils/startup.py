@@ -0,0 +1,44 @@
+from contextlib import contextmanager
+from typing import List, Tuple
+import logging
+import threading
+import time
+
+class StartupTimer:
+    """Collects named startup phases and renders a breakdown in the style of ``-X importtime``."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, str, float]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.phases.append((threading.current_thread().name, name, seconds))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def report(self, title: str = "startup") -> str:
+        with self._lock:
+            phases = list(self.phases)
+        lines = [f"{title}: {'ms':>9} | thread       | phase"]
+        for thread, name, seconds in phases:
+            lines.append(f"{title}: {seconds * 1000:9.1f} | {thread[:12]:<12} | {name}")
+        lines.append(f"{title}: {self.elapsed() * 1000:9.1f} | {'':<12} | total since process start")
+        return "\n".join(lines)
+
+    def log_report(self, title: str = "startup"):
+        logging.getLogger(__name__).info("\n" + self.report(title))
+
+
+# Created on first import, which main.py does before anything heavy.
+startup_timer = StartupTimer()
@@ -0,0 +1,147 @@
+"""Per-request stage timeline: when each stage of a query started and ended, and which ones it waited on."""
+
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+from config.config import LogConfig
+from src.utils.metrics import metrics
+
+
+class StageRecord:
+    __slots__ = ("name", "start", "end", "status", "blocking")
+
+    def __init__(self, name: str, start: float, blocking: bool = True):
+        self.name = name
+        self.start = start
+        self.end: Optional[float] = None
+        self.status = "running"
+        self.blocking = blocking  # False for stages nothing waits on, which never join the critical path
+
+    def close(self, end: float, status: str):
+        self.end = end
+        self.status = status
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "start_ms": round(self.start * 1000, 1),
+            "blocking": self.blocking,
+            "end_ms": round(self.end * 1000, 1) if self.end is not None else None,
+            "status": self.status,
+        }
+
+
+class Timeline:
+    """Records stages of one request relative to its start.
+
+    ``start`` runs an awaitable as a task (for stages that overlap); ``stage``
+    times a block inline. Cancelled stages stay on the timeline marked as such.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._origin = time.perf_counter()
+        self.stages: List[StageRecord] = []
+        self._records: Dict[asyncio.Future, StageRecord] = {}
+
+    def _now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def _open(self, name: str, blocking: bool = True) -> StageRecord:
+        record = StageRecord(name, self._now(), blocking)
+        self.stages.append(record)
+        return record
+
+    def start(self, name: str, awaitable: Awaitable, outcome: Optional[Callable[[Any], str]] = None,
+              blocking: bool = True) -> asyncio.Task:
+        """Run ``awaitable`` as stage ``name``; ``outcome`` maps its result to a status such as "hit"."""
+        record = self._open(name, blocking)
+
+        async def run():
+            try:
+                result = await awaitable
+            except asyncio.CancelledError:
+                if record.end is None:
+                    record.close(self._now(), "cancelled")
+                raise
+            except Exception:
+                record.close(self._now(), "error")
+                raise
+            record.close(self._now(), outcome(result) if outcome else "done")
+            return result
+
+        task = asyncio.ensure_future(run())
+        self._records[task] = record
+        return task
+
+    @contextmanager
+    def stage(self, name: str):
+        record = self._open(name)
+        try:
+            yield record
+        except asyncio.CancelledError:
+            record.close(self._now(), "cancelled")
+            raise
+        except Exception:
+            record.close(self._now(), "error")
+            raise
+        record.close(self._now(), "done" if record.status == "running" else record.status)
+
+    def cancel(self, *tasks: Optional[asyncio.Task]):
+        """Drop stages whose answer is no longer needed: running ones are cancelled and marked so
+        right away, finished ones leave the critical path."""
+        for task in tasks:
+            record = self._records.get(task)
+            if task is None or record is None:
+                continue
+            if not task.done():
+                task.cancel()
+                if record.end is None:
+                    record.close(self._now(), "cancelled")
+            else:
+                record.blocking = False
+
+    def critical_path(self) -> List[StageRecord]:
+        """Walk back from the last stage to finish, each time to the latest stage that ended before it started."""
+        finished = [
+            record for record in self.stages
+            if record.blocking and record.end is not None and record.status != "cancelled"
+        ]
+        path = []
+        current = max(finished, key=lambda record: record.end, default=None)
+        while current is not None:
+            path.append(current)
+            current = max(
+                (record for record in finished if record.end <= current.start and record is not current),
+                key=lambda record: record.end, default=None
+            )
+        return path[::-1]
+
+    def render(self) -> str:
+        stages = " | ".join(
+            f"{record.name} {record.start * 1000:.0f}-{record.end * 1000:.0f}ms {record.status}"
+            if record.end is not None else f"{record.name} {record.start * 1000:.0f}ms- running"
+            for record in sorted(self.stages, key=lambda record: record.start)
+        )
+        path = " > ".join(record.name for record in self.critical_path())
+        return f"{self._now() * 1000:.0f}ms total | {stages} | critical path: {path or '-'}"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total_ms": round(self._now() * 1000, 1),
+            "stages": [record.as_dict() for record in self.stages],
+            "critical_path": [record.name for record in self.critical_path()],
+        }
+
+    def finish(self):
+        """Log the timeline and count time spent on the critical path per stage."""
+        if LogConfig.TIMELINE:
+            self.logger.info(f"Request timeline: {self.render()}")
+        if metrics.enabled:
+            for record in self.critical_path():
+                metrics.registry.observe(
+                    "rsa_critical_path_seconds", record.end - record.start,
+                    help_text="Time each stage spent on a request's critical path.", stage=record.name
+                )
@@ -1,111 +1,185 @@
-from typing import Dict, List, Any
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple, Union
 import logging
+from config.config import ChartConfig
+from src.database.query_result import QueryResult
+from src.utils.metrics import NOOP_SPAN, span
+from src.utils.startup import startup_timer
+
+# Name patterns that break ties between columns of the same type.
+MEASURE_PATTERNS = ['total', 'sum', 'avg', 'count', 'amount', 'revenue', 'sales', 'profit']
+DIMENSION_PATTERNS = ['name', 'category', 'region', 'date', 'month', 'year', 'id']
+
+def _value_kind(values: List[Any]) -> str:
+    """Classify a column of Python values the way QueryResult classifies cursor types."""
+    sample = next((value for value in values if value is not None), None)
+    if isinstance(sample, bool):
+        return "boolean"
+    if isinstance(sample, (int, float, Decimal)):
+        return "numeric"
+    if isinstance(sample, (date, datetime, time)):
+        return "temporal"
+    return "text"
+
+def _is_identifier(column: str) -> bool:
+    name = column.lower()
+    return name == "id" or name.endswith("_id")
+
+def payload_bytes(fig) -> int:
+    """Size of the Plotly JSON that is sent to the browser."""
+    return len(fig.to_json().encode("utf-8"))
+
 
 class ChartGenerator:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
 
-    def _get_axis_labels(self, df: pd.DataFrame) -> Dict[str, str]:
-        """Determine appropriate axis labels based on column names."""
-        columns = list(df.columns)
-        
-        # Common patterns for measures (usually numeric columns)
-        measure_patterns = ['total', 'sum', 'avg', 'count', 'amount', 'revenue', 'sales', 'profit']
-        # Common patterns for dimensions (usually categorical or time-based columns)
-        dimension_patterns = ['name', 'category', 'region', 'date', 'month', 'year', 'id']
-        
-        y_axis = None
-        x_axis = None
-        
-        # Find measure column (y-axis)
-        for col in columns:
-            col_lower = col.lower()
-            if any(pattern in col_lower for pattern in measure_patterns):
-                y_axis = col
-                break
-        
-        # Find dimension column (x-axis)
-        for col in columns:
-            col_lower = col.lower()
-            if any(pattern in col_lower for pattern in dimension_patterns):
-                x_axis = col
-                break
-        
-        # Fallback: if no patterns matched
-        if not y_axis and len(columns) >= 2:
-            # Assume last column is measure if numeric
-            if pd.api.types.is_numeric_dtype(df[columns[-1]]):
-                y_axis = columns[-1]
-                x_axis = columns[0]
-        
-        # Final fallback
-        if not y_axis:
-            y_axis = columns[-1]
-        if not x_axis:
-            x_axis = columns[0]
-            
+    def warm_up(self):
+        """Import pandas/plotly ahead of the first chart (about half a second cold)."""
+        with startup_timer.phase("import pandas/plotly"):
+            import pandas  # noqa: F401
+            import plotly.express  # noqa: F401
+
+    def _to_columns(self, data: Union[QueryResult, List[Dict[str, Any]]]) -> Tuple[Dict[str, List[Any]], List[str]]:
+        """Column name -> values plus a kind per column, from a QueryResult or (legacy) row dicts."""
+        if isinstance(data, QueryResult):
+            return data.to_columns(), list(data.column_types)
+        columns = list(data[0].keys())
+        values = {column: [row.get(column) for row in data] for column in columns}
+        return values, [_value_kind(values[column]) for column in columns]
+
+    def _get_axis_labels(self, columns: List[str], column_types: List[str]) -> Dict[str, str]:
+        """Pick axes from column types: y is a numeric measure, x a temporal, then categorical, column."""
+        kinds = dict(zip(columns, column_types))
+
+        numeric = [col for col in columns if kinds[col] == "numeric"]
+        measures = [col for col in numeric if not _is_identifier(col)] or numeric
+        y_axis = next(
+            (col for col in measures if any(pattern in col.lower() for pattern in MEASURE_PATTERNS)),
+            measures[-1] if measures else columns[-1]
+        )
+
+        candidates = [col for col in columns if col != y_axis]
+        temporal = [col for col in candidates if kinds[col] == "temporal"]
+        categorical = [col for col in candidates if kinds[col] in ("text", "boolean")]
+        dimensions = temporal or categorical or candidates or columns
+        x_axis = next(
+            (col for col in dimensions if any(pattern in col.lower() for pattern in DIMENSION_PATTERNS)),
+            dimensions[0]
+        )
         return {"x": x_axis, "y": y_axis}
 
-    def generate_chart(self, data: List[Dict[str, Any]], chart_type: str):
+    def generate_chart(self, data: Union[QueryResult, List[Dict[str, Any]]], chart_type: str):
+        with span("chart_render") as stage:
+            stage.set("points", len(data) if data else 0)
+            chart = self._generate_chart(data, chart_type, stage)
+            if stage.recording and not isinstance(chart, str):
+                stage.set("payload_bytes", payload_bytes(chart))
+            return chart
+
+    def _reduce(self, df, axis_labels: Dict[str, str], kinds: Dict[str, str], chart_type: str):
+        """Downsample or aggregate ``df`` for ``chart_type``; returns (frame, note for the title, mode)."""
+        from .downsample import bin_sum, downsample_line, top_n_with_other
+
+        x, y = axis_labels["x"], axis_labels["y"]
+        rows = len(df)
+        ordered_x = kinds[x] in ("temporal", "numeric")
+        if kinds[y] != "numeric":
+            return df, "", "plain"
+
+        if chart_type == "line" and ordered_x:
+            reduced = downsample_line(df, x, y, ChartConfig.MAX_LINE_POINTS)
+            note = f"{len(reduced):,} of {rows:,} points (LTTB)" if len(reduced) < rows else ""
+            return reduced, note, "plain"
+
+        if chart_type == "bar" and df[x].nunique(dropna=False) > ChartConfig.MAX_BAR_CATEGORIES:
+            if ordered_x:
+                reduced = bin_sum(df, x, y, ChartConfig.MAX_BAR_CATEGORIES)
+                return reduced, f"sum over {len(reduced)} ranges of {x}", "plain"
+            reduced, folded = top_n_with_other(df, x, y, ChartConfig.MAX_BAR_CATEGORIES)
+            return reduced, f"top {len(reduced) - 1} + {folded:,} others", "plain"
+
+        if chart_type == "scatter" and rows > ChartConfig.MAX_SCATTER_SVG_POINTS:
+            if rows > ChartConfig.MAX_SCATTER_POINTS and ordered_x:
+                return df, f"density of {rows:,} points", "density"
+            if rows > ChartConfig.MAX_SCATTER_POINTS:
+                sample = df.sample(ChartConfig.MAX_SCATTER_POINTS, random_state=0)
+                return sample, f"random {len(sample):,} of {rows:,} points", "webgl"
+            return df, "", "webgl"
+        return df, "", "plain"
+
+    def _generate_chart(self, data: Union[QueryResult, List[Dict[str, Any]]], chart_type: str, stage=NOOP_SPAN):
+        # Heavy imports are deferred to the first chart (or the background warm-up).
+        import pandas as pd
+        import plotly.express as px
+
         try:
-            # If data is empty list
+            # If data is empty
             if not data:
                 return "No data available to generate chart."
-                
-            df = pd.DataFrame(data)
-            
-            # Check if dataframe is empty
-            if df.empty:
-                return "No data available to generate chart."
-                
+
+            values, column_types = self._to_columns(data)
+            columns = list(values)
+            kinds = dict(zip(columns, column_types))
+
             # Ensure we have at least two columns for meaningful visualization
-            if len(df.columns) < 2:
+            if len(columns) < 2:
                 return "Insufficient columns for visualization. Need at least 2 columns."
-                
+
             try:
                 # Get appropriate axis labels
-                axis_labels = self._get_axis_labels(df)
-                
+                axis_labels = self._get_axis_labels(columns, column_types)
+                x, y = axis_labels["x"], axis_labels["y"]
+                # Only the plotted columns become a DataFrame; Decimal/object columns are made numeric.
+                df = pd.DataFrame({x: values[x], y: values[y]} if x != y else {x: values[x]})
+                for col in (x, y):
+                    if kinds[col] == "numeric":
+                        df[col] = pd.to_numeric(df[col], errors="coerce")
+                    elif kinds[col] == "temporal":
+                        try:
+                            df[col] = pd.to_datetime(df[col])
+                        except (TypeError, ValueError):
+                            pass  # e.g. TIME or INTERVAL values; plotted as they are
+
+                df, note, mode = self._reduce(df, axis_labels, kinds, chart_type)
+                stage.set("rendered_points", len(df))
+                suffix = f" ({note})" if note else ""
+
                 if chart_type == "bar":
-                    fig = px.bar(
-                        df,
-                        x=axis_labels["x"],
-                        y=axis_labels["y"],
-                        title=f"{axis_labels['y']} by {axis_labels['x']}"
-                    )
+                    fig = px.bar(df, x=x, y=y, title=f"{y} by {x}{suffix}")
                 elif chart_type == "line":
-                    fig = px.line(
-                        df,
-                        x=axis_labels["x"],
-                        y=axis_labels["y"],
-                        title=f"{axis_labels['y']} over {axis_labels['x']}"
+                    fig = px.line(df, x=x, y=y, title=f"{y} over {x}{suffix}")
+                elif chart_type == "scatter" and mode == "density":
+                    import plotly.graph_objects as go
+                    from .downsample import histogram_2d
+
+                    x_centres, y_centres, counts = histogram_2d(df, x, y, ChartConfig.DENSITY_BINS)
+                    fig = go.Figure(
+                        go.Heatmap(x=x_centres, y=y_centres, z=counts, colorscale="Blues", colorbar={"title": "rows"}),
+                        layout={"title": f"{y} vs {x}{suffix}"}
                     )
                 elif chart_type == "scatter":
                     fig = px.scatter(
-                        df,
-                        x=axis_labels["x"],
-                        y=axis_labels["y"],
-                        title=f"{axis_labels['y']} vs {axis_labels['x']}"
+                        df, x=x, y=y, title=f"{y} vs {x}{suffix}",
+                        render_mode="webgl" if mode == "webgl" else "svg"
                     )
                 else:
                     return f"Unsupported chart type: {chart_type}"
-                
+
                 # Update layout for better readability
                 fig.update_layout(
-                    xaxis_title=axis_labels["x"].replace('_', ' ').title(),
-                    yaxis_title=axis_labels["y"].replace('_', ' ').title(),
+                    xaxis_title=x.replace('_', ' ').title(),
+                    yaxis_title=y.replace('_', ' ').title(),
                     template="plotly_white"
                 )
-                
+
                 return fig
-                
+
             except Exception as e:
                 self.logger.error(f"Error creating chart: {str(e)}")
                 return f"Could not create chart: {str(e)}"
-                
+
         except Exception as e:
             self.logger.error(f"Error generating chart: {str(e)}")
-            return f"Error generating chart: {str(e)}" 
\ No newline at end of file
+            return f"Error generating chart: {str(e)}"
@@ -0,0 +1,81 @@
+"""Reduce large result sets to what a chart can usefully show before they are serialized for the browser."""
+
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+def as_float(series: "pd.Series") -> np.ndarray:
+    """Numeric view of a column for arithmetic: timestamps become epoch nanoseconds."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype("int64").to_numpy(dtype=float)
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=float)
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: ``threshold`` row indices that keep the visual shape of a series.
+
+    ``x`` must be sorted. The first and last points are always kept; each
+    bucket in between contributes the point forming the largest triangle
+    with the previously kept point and the average of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    kept = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        areas = np.abs(
+            (x[kept] - avg_x) * (y[start:end] - y[kept]) - (x[kept] - x[start:end]) * (avg_y - y[kept])
+        )
+        kept = start + int(np.argmax(areas))
+        indices[bucket + 1] = kept
+    return indices
+
+def downsample_line(frame: "pd.DataFrame", x: str, y: str, max_points: int) -> "pd.DataFrame":
+    frame = frame.dropna(subset=[x, y]).sort_values(x, kind="stable")
+    if len(frame) <= max_points:
+        return frame
+    indices = lttb_indices(as_float(frame[x]), as_float(frame[y]), max_points)
+    return frame.iloc[indices]
+
+def top_n_with_other(frame: "pd.DataFrame", x: str, y: str, max_categories: int,
+                     other_label: str = "Other") -> Tuple["pd.DataFrame", int]:
+    """Sum ``y`` per category, keep the ``max_categories - 1`` largest and fold the rest into one bar.
+
+    Returns the reduced frame and how many categories were folded.
+    """
+    totals = frame.groupby(x, sort=False, dropna=False)[y].sum().sort_values(ascending=False)
+    if len(totals) <= max_categories:
+        return totals.reset_index(), 0
+    kept = totals.iloc[:max_categories - 1]
+    folded = totals.iloc[max_categories - 1:]
+    other = pd.Series([folded.sum()], index=[other_label])
+    reduced = pd.concat([kept.rename(index=str), other]).rename_axis(x).rename(y).reset_index()
+    return reduced, len(folded)
+
+def bin_sum(frame: "pd.DataFrame", x: str, y: str, bins: int) -> "pd.DataFrame":
+    """Sum ``y`` over ``bins`` equal-width ranges of a numeric or temporal ``x`` (labelled by range start)."""
+    frame = frame.dropna(subset=[x])
+    edges = pd.cut(frame[x], bins=bins)
+    summed = frame.groupby(edges, observed=True)[y].sum()
+    return pd.DataFrame({x: [interval.left for interval in summed.index], y: summed.to_numpy()})
+
+def histogram_2d(frame: "pd.DataFrame", x: str, y: str, bins: int):
+    """Count points on a ``bins`` x ``bins`` grid; returns (x centres, y centres, counts[y][x]).
+
+    Binning happens here so the browser receives the grid rather than every point.
+    """
+    frame = frame.dropna(subset=[x, y])
+    counts, x_edges, y_edges = np.histogram2d(as_float(frame[x]), as_float(frame[y]), bins=bins)
+    x_centres = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centres = (y_edges[:-1] + y_edges[1:]) / 2
+    if pd.api.types.is_datetime64_any_dtype(frame[x]):
+        x_centres = pd.to_datetime(x_centres.astype("int64"), unit=np.datetime_data(frame[x].dtype)[0])
+    return x_centres, y_centres, counts.T
@@ -0,0 +1,47 @@
+import asyncio
+import unittest
+from unittest import mock
+from main import DataAnalysisApp
+from src.utils.logger import Logger
+
+class FakeLLMHandler:
+    def __init__(self, sql):
+        self.sql = sql
+        self.repairs = 0
+
+    async def aresolve_sql(self, question, timeline=None):
+        return self.sql, "llm"
+
+    async def arepair_sql_query(self, question, sql_query, error):
+        self.repairs += 1
+        return sql_query
+
+class FakeDatabaseManager:
+    def __init__(self):
+        self.queries = []
+
+    def cached_result(self, query):
+        self.queries.append(query)
+        return None
+
+    async def aexecute_query_columnar(self, query, probed=False):
+        raise RuntimeError(f'syntax error at or near "{query.split()[0]}"')
+
+
+class TestProcessQuery(unittest.TestCase):
+    def test_generation_failures_are_not_executed(self):
+        for message in (
+            "Unable to generate query: no such data",
+            "Unable to generate a valid SQL query from the response",
+            "Error generating SQL query: connection refused",
+        ):
+            with self.subTest(message=message):
+                llm_handler, db_manager = FakeLLMHandler(message), FakeDatabaseManager()
+                with mock.patch.object(Logger, "setup_logging"):
+                    app = DataAnalysisApp(db_manager=db_manager, llm_handler=llm_handler, chart_generator=object())
+                self.assertEqual(asyncio.run(app.process_query("total sales", "bar")), (None, message))
+                self.assertEqual(db_manager.queries, [])
+                self.assertEqual(llm_handler.repairs, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from src.batch import BatchRunner, read_questions
+from src.database.backends import DuckDBBackend
+from src.database.db_manager import DatabaseManager
+
+SQL = {
+    "Regions by name": "SELECT name, id FROM region ORDER BY name",
+    "Region count": "SELECT COUNT(*) AS regions FROM region",
+    "Broken question": "SELECT missing_column FROM region",
+}
+
+class FakeLLMHandler:
+    def __init__(self):
+        self.calls = []
+        self.recorded = []
+
+    async def agenerate_sql_query(self, question):
+        self.calls.append(question)
+        await asyncio.sleep(0)
+        return SQL.get(question, "Unable to generate query: unknown question")
+
+    def record_success(self, question, sql):
+        self.recorded.append(question)
+
+class FakeFigure:
+    def write_image(self, path, format=None):
+        with open(path, "wb") as handle:
+            handle.write(b"png")
+
+class FakeChartGenerator:
+    def generate_chart(self, data, chart_type):
+        return FakeFigure()
+
+class TestReadQuestions(unittest.TestCase):
+    def test_deduplicates_normalized_questions(self):
+        items = read_questions([
+            '{"id": "a", "question": "Region count"}',
+            '{"id": "b", "question": "  region COUNT? "}',
+            "",
+            "Regions by name",
+        ])
+        self.assertEqual([item.question for item in items], ["Region count", "Regions by name"])
+        self.assertEqual(items[0].ids, ["a", "b"])
+        self.assertEqual(items[1].ids, ["4"])
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        backend = DuckDBBackend(":memory:", statement_timeout_ms=0)
+        conn = backend.connect()
+        conn.execute("CREATE TABLE region (id integer, name varchar)")
+        conn.execute("INSERT INTO region VALUES (1, 'West'), (2, 'Midwest')")
+        conn.close()
+        self.db_manager = DatabaseManager(backend=backend)
+        self.output = tempfile.TemporaryDirectory()
+        self.items = read_questions(list(SQL) + ["Unknown question"])
+
+    def tearDown(self):
+        self.output.cleanup()
+
+    def runner(self, llm_handler):
+        return BatchRunner(
+            self.output.name, llm_handler=llm_handler, db_manager=self.db_manager,
+            chart_generator=FakeChartGenerator(), llm_workers=2
+        )
+
+    def test_writes_results_charts_and_manifest(self):
+        llm = FakeLLMHandler()
+        summary = self.runner(llm).run(self.items)
+        self.assertEqual((summary["done"], summary["failed"]), (2, 2))
+        entries = self.runner(llm).manifest_entries()
+        by_question = {entry["question"]: entry for entry in entries.values()}
+
+        regions = by_question["Regions by name"]
+        with open(os.path.join(self.output.name, regions["result_path"]), encoding="utf-8") as handle:
+            self.assertEqual(handle.read().splitlines(), ["name,id", "Midwest,2", "West,1"])
+        self.assertTrue(os.path.exists(os.path.join(self.output.name, regions["chart_path"])))
+        self.assertNotIn("chart_path", by_question["Region count"])
+        self.assertEqual(by_question["Unknown question"]["status"], "failed")
+        self.assertEqual(sorted(llm.recorded), ["Region count", "Regions by name"])
+
+    def test_resume_skips_completed_and_retries_failures(self):
+        self.runner(FakeLLMHandler()).run(self.items)
+        llm = FakeLLMHandler()
+        summary = self.runner(llm).run(self.items)
+        self.assertEqual(summary["skipped"], 2)
+        self.assertEqual(sorted(llm.calls), ["Broken question", "Unknown question"])
+
+        llm = FakeLLMHandler()
+        summary = self.runner(llm).run(self.items, retry_failed=False)
+        self.assertEqual(summary["skipped"], 4)
+        self.assertEqual(llm.calls, [])
+
+    def test_torn_manifest_line_is_ignored(self):
+        self.runner(FakeLLMHandler()).run(self.items[:1])
+        with open(os.path.join(self.output.name, "manifest.jsonl"), "a", encoding="utf-8") as handle:
+            handle.write('{"key": "trunc')
+        self.assertEqual(len(self.runner(FakeLLMHandler()).completed_keys()), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from src.database.bulk_loader import BulkLoader, copy_escape, iter_statements, parse_values
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, sql, buffer):
+        self.conn.copies.append((sql, buffer.read()))
+
+    def execute(self, sql):
+        self.conn.statements.append(sql)
+
+class FakeConnection:
+    def __init__(self):
+        self.copies = []
+        self.statements = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+class TestDumpParsing(unittest.TestCase):
+    def test_iter_statements_joins_multiline_ddl(self):
+        lines = [
+            "-- comment\n",
+            "CREATE TABLE region (\n",
+            "\tid integer,\n",
+            "\tname varchar (250)\n",
+            ");\n",
+            "INSERT INTO region VALUES (1,'Northeast');\n",
+            "INSERT INTO region VALUES (2,'semi;colon\n",
+            "continued');\n",
+        ]
+        statements = list(iter_statements(lines))
+        self.assertEqual(len(statements), 3)
+        self.assertTrue(statements[0].startswith("CREATE TABLE region"))
+        self.assertIn("semi;colon\ncontinued", statements[2])
+
+    def test_comment_apostrophes_do_not_join_statements(self):
+        lines = [
+            "-- region's rows\n",
+            "INSERT INTO region VALUES (1,'Northeast');\n",
+            "  -- don't split here\n",
+            "INSERT INTO region VALUES (2,'a\n",
+            "-- kept: inside a string\n",
+            "b');\n",
+        ]
+        statements = list(iter_statements(lines))
+        self.assertEqual(statements[0], "INSERT INTO region VALUES (1,'Northeast');")
+        self.assertEqual(statements[1], "INSERT INTO region VALUES (2,'a\n-- kept: inside a string\nb');")
+
+    def test_parse_values(self):
+        rows = parse_values("(1,'O''Brien',NULL,-75.10),(2, 'a,b' , 3);")
+        self.assertEqual(rows, [("1", "O'Brien", None, "-75.10"), ("2", "a,b", "3")])
+
+    def test_copy_escape(self):
+        self.assertEqual(copy_escape(None), "\\N")
+        self.assertEqual(copy_escape("a\tb\\c\n"), "a\\tb\\\\c\\n")
+
+class TestBulkLoader(unittest.TestCase):
+    def load(self, text):
+        handle, path = tempfile.mkstemp(suffix=".sql")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, "w", encoding="utf-8") as dump:
+            dump.write(text)
+        conn = FakeConnection()
+        return BulkLoader(conn).load(path), conn
+
+    def test_column_lists_are_copied_not_executed(self):
+        row_counts, conn = self.load(
+            "INSERT INTO region (id, name) VALUES (1,'Northeast'),(2,'West');\n"
+            "INSERT INTO region VALUES (3,'South');\n"
+            "INSERT INTO region (name,id) VALUES ('East',4);\n"
+        )
+        self.assertEqual(conn.statements, [])
+        self.assertEqual(row_counts, {"region": 4})
+        self.assertEqual(sorted(conn.copies), [
+            ("COPY region (id, name) FROM STDIN", "1\tNortheast\n2\tWest\n"),
+            ("COPY region (name, id) FROM STDIN", "East\t4\n"),
+            ("COPY region FROM STDIN", "3\tSouth\n"),
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+import numpy as np
+from config.config import ChartConfig
+from src.database.query_result import QueryResult
+from src.visualization.chart_generator import ChartGenerator, payload_bytes
+from src.visualization.downsample import lttb_indices, top_n_with_other
+
+class TestDownsample(unittest.TestCase):
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        x = np.arange(10000, dtype=float)
+        y = np.sin(x / 500)
+        y[5000] = 50.0
+        indices = lttb_indices(x, y, 200)
+        self.assertEqual(len(indices), 200)
+        self.assertEqual((indices[0], indices[-1]), (0, 9999))
+        self.assertIn(5000, indices)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_top_n_with_other(self):
+        import pandas as pd
+
+        frame = pd.DataFrame({"name": [f"n{i}" for i in range(10)], "total": list(range(10))})
+        reduced, folded = top_n_with_other(frame, "name", "total", 4)
+        self.assertEqual(list(reduced["name"]), ["n9", "n8", "n7", "Other"])
+        self.assertEqual(list(reduced["total"]), [9, 8, 7, sum(range(7))])
+        self.assertEqual(folded, 7)
+
+class TestChartGenerator(unittest.TestCase):
+    def setUp(self):
+        self.generator = ChartGenerator()
+
+    def test_axes_from_column_types(self):
+        axes = self.generator._get_axis_labels(["account_id", "month", "n"], ["numeric", "temporal", "numeric"])
+        self.assertEqual(axes, {"x": "month", "y": "n"})
+        axes = self.generator._get_axis_labels(["sales_rep", "total_revenue"], ["text", "numeric"])
+        self.assertEqual(axes, {"x": "sales_rep", "y": "total_revenue"})
+
+    def test_line_chart_is_downsampled(self):
+        start = datetime(2016, 1, 1)
+        result = QueryResult(
+            columns=["occurred_at", "total_amt_usd"],
+            rows=[(start + timedelta(minutes=i), Decimal(i % 97)) for i in range(20000)],
+            column_types=["temporal", "numeric"]
+        )
+        with mock.patch.object(ChartConfig, "MAX_LINE_POINTS", 500):
+            fig = self.generator.generate_chart(result, "line")
+        self.assertEqual(len(fig.data[0].x), 500)
+        self.assertIn("500 of 20,000 points", fig.layout.title.text)
+        self.assertLess(payload_bytes(fig), 100_000)
+
+    def test_bar_chart_folds_small_categories(self):
+        data = [{"name": f"account {i}", "total": i} for i in range(200)]
+        with mock.patch.object(ChartConfig, "MAX_BAR_CATEGORIES", 10):
+            fig = self.generator.generate_chart(data, "bar")
+        self.assertEqual(len(fig.data[0].x), 10)
+        self.assertEqual(fig.data[0].x[-1], "Other")
+
+    def test_large_scatter_uses_webgl_then_density(self):
+        rows = [(float(i), float(i % 13)) for i in range(3000)]
+        result = QueryResult(columns=["qty", "amount"], rows=rows, column_types=["numeric", "numeric"])
+        with mock.patch.object(ChartConfig, "MAX_SCATTER_SVG_POINTS", 1000):
+            self.assertEqual(self.generator.generate_chart(result, "scatter").data[0].type, "scattergl")
+            with mock.patch.object(ChartConfig, "MAX_SCATTER_POINTS", 2000):
+                self.assertEqual(self.generator.generate_chart(result, "scatter").data[0].type, "heatmap")
+
+    def test_small_results_are_unchanged(self):
+        result = QueryResult(columns=["region", "sales"], rows=[("East", 1), ("West", 2)],
+                             column_types=["text", "numeric"])
+        fig = self.generator.generate_chart(result, "bar")
+        self.assertEqual(list(fig.data[0].x), ["East", "West"])
+        self.assertEqual(fig.layout.title.text, "sales by region")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import threading
+import time
+import unittest
+import psycopg2
+from src.database.connection_pool import ConnectionPool
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query):
+        self.conn.pings += 1
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = 0
+        self.broken = False
+        self.pings = self.commits = self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+class FakePool:
+    """Stands in for ThreadedConnectionPool: reuses idle connections, opens new ones otherwise."""
+
+    def __init__(self):
+        self.idle = []
+        self.opened = []
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        conn = FakeConnection(len(self.opened))
+        self.opened.append(conn)
+        return conn
+
+    def putconn(self, conn, close=False):
+        if close:
+            conn.closed = 1
+        else:
+            self.idle.append(conn)
+
+    def closeall(self):
+        for conn in self.opened:
+            conn.closed = 1
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = ConnectionPool({}, min_size=1, max_size=2, health_check_interval=60)
+        self.pool._pool = FakePool()
+
+    def test_commits_on_success_and_rolls_back_on_error(self):
+        with self.pool.connection() as conn:
+            pass
+        self.assertEqual((conn.commits, conn.rollbacks), (1, 1))  # the rollback ends the health-check ping
+        with self.assertRaises(ValueError):
+            with self.pool.connection() as conn:
+                raise ValueError("bad query")
+        self.assertEqual((conn.commits, conn.rollbacks), (1, 2))
+        self.assertEqual(self.pool._pool.idle, [conn])
+
+    def test_idle_connections_are_pinged_recent_ones_are_not(self):
+        with self.pool.connection() as conn:
+            pass
+        with self.pool.connection():
+            pass
+        self.assertEqual(conn.pings, 1)
+        self.pool.health_check_interval = 0
+        with self.pool.connection():
+            pass
+        self.assertEqual(conn.pings, 2)
+        self.assertEqual(self.pool.stats["health_checks"], 2)
+
+    def test_broken_connections_are_discarded_until_a_healthy_one_is_found(self):
+        fake = self.pool._pool
+        stale = [fake.getconn(), fake.getconn()]
+        for conn in stale:
+            conn.broken = True
+            fake.putconn(conn)
+        with self.pool.connection() as conn:
+            self.assertNotIn(conn, stale)
+        self.assertTrue(all(conn.closed for conn in stale))
+        self.assertEqual(self.pool.stats["reconnects"], 2)
+        self.assertEqual(list(self.pool._last_used), [conn])
+
+    def test_gives_up_when_no_connection_is_healthy(self):
+        fake = self.pool._pool
+        getconn = fake.getconn
+
+        def broken_getconn():
+            conn = getconn()
+            conn.broken = True
+            return conn
+
+        fake.getconn = broken_getconn
+        with self.assertRaises(psycopg2.OperationalError):
+            with self.pool.connection():
+                pass
+        self.assertEqual(len(fake.opened), 3)
+        # The failed checkout gave its slot back.
+        fake.getconn = getconn
+        with self.pool.connection():
+            pass
+
+    def test_stats_are_exact_across_threads(self):
+        def work():
+            for _ in range(200):
+                with self.pool.connection():
+                    pass
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.pool.stats["checkouts"], 800)
+
+    def test_callers_block_at_max_size(self):
+        release = threading.Event()
+        acquired = []
+
+        def hold():
+            with self.pool.connection():
+                acquired.append(time.monotonic())
+                release.wait()
+
+        threads = [threading.Thread(target=hold) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        self.assertEqual(len(acquired), 2)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(acquired), 3)
+        self.assertLessEqual(len(self.pool._pool.opened), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from src.database.backends import DuckDBBackend, QueryHandle
+from src.database.db_manager import DatabaseManager
+from src.database.schema_cache import SchemaCache
+
+class TestDuckDBBackend(unittest.TestCase):
+    def setUp(self):
+        self.backend = DuckDBBackend(":memory:", statement_timeout_ms=0)
+        conn = self.backend.connect()
+        conn.execute("CREATE TABLE region (id integer, name varchar(250))")
+        conn.execute("CREATE TABLE sales_reps (id integer, name varchar(250), region_id integer)")
+        conn.execute("INSERT INTO region VALUES (1, 'Northeast'), (2, 'Midwest'), (3, 'West')")
+        conn.close()
+
+    def test_execute_returns_typed_columns(self):
+        result = self.backend.execute("SELECT id, name FROM region ORDER BY id;", max_rows=10)
+        self.assertEqual(result.columns, ["id", "name"])
+        self.assertEqual(result.column_types, ["numeric", "text"])
+        self.assertEqual(result.rows[0], (1, "Northeast"))
+        self.assertFalse(result.truncated)
+
+    def test_row_cap_marks_truncation(self):
+        result = self.backend.execute("SELECT * FROM region", max_rows=2)
+        self.assertEqual(len(result), 2)
+        self.assertTrue(result.truncated)
+        self.assertFalse(self.backend.execute("SELECT * FROM region", max_rows=3).truncated)
+
+    def test_write_statement_returns_empty_result(self):
+        result = self.backend.execute("INSERT INTO region VALUES (4, 'Southeast')", max_rows=10)
+        self.assertEqual(len(result), 0)
+        self.assertEqual(len(self.backend.execute("SELECT * FROM region", max_rows=10)), 4)
+
+    def test_handle_is_detached_after_execute(self):
+        handle = QueryHandle()
+        self.backend.execute("SELECT 1", max_rows=1, handle=handle)
+        self.assertIsNone(handle._cancel)
+
+    def test_schema_cache_reads_duckdb_catalog(self):
+        cache = SchemaCache({}, ttl_seconds=0, backend=self.backend)
+        snapshot = cache.get_snapshot()
+        self.assertEqual(list(snapshot.tables), ["region", "sales_reps"])
+        self.assertEqual(snapshot.foreign_keys("sales_reps"), [("region_id", "region")])
+        conn = self.backend.connect()
+        conn.execute("ALTER TABLE region ADD COLUMN code varchar")
+        conn.close()
+        self.assertEqual(cache.get_snapshot().version, snapshot.version + 1)
+
+    def test_database_manager_drop_in(self):
+        manager = DatabaseManager(backend=self.backend)
+        rows = manager.execute_query("SELECT name FROM region WHERE id = 2")
+        self.assertEqual(rows, [{"name": "Midwest"}])
+        manager.execute_query("UPDATE region SET name = 'Central' WHERE id = 2")
+        self.assertEqual(manager.execute_query("SELECT name FROM region WHERE id = 2"), [{"name": "Central"}])
+
+if __name__ == '__main__':
+    unittest.main()
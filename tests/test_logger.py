@@ -0,0 +1,70 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+from config.config import LogConfig
+from src.utils.logger import (
+    JsonFormatter, Logger, RequestIdFilter, log_payload, reset_request_id, set_request_id, truncate_payload
+)
+
+class TestPayloadHelpers(unittest.TestCase):
+    def test_truncate_keeps_short_text(self):
+        self.assertEqual(truncate_payload("SELECT 1", max_chars=20), "SELECT 1")
+
+    def test_truncate_long_text(self):
+        text = truncate_payload("x" * 1000, max_chars=10)
+        self.assertTrue(text.startswith("xxxxxxxxxx... [990 more chars, 1000 total, sha1 "))
+
+    def test_payload_skipped_at_info_unless_sampled(self):
+        logger = logging.getLogger("test_logger.payload")
+        logger.setLevel(logging.INFO)
+        with mock.patch.object(LogConfig, "PAYLOAD_SAMPLE_RATE", 0.0), \
+                mock.patch.object(logger, "info") as info:
+            log_payload(logger, "Schema", "y" * 5000)
+        info.assert_not_called()
+        with mock.patch.object(LogConfig, "PAYLOAD_SAMPLE_RATE", 1.0), \
+                mock.patch.object(logger, "info") as info:
+            log_payload(logger, "Schema", "y" * 5000)
+        self.assertLess(len(info.call_args[0][0]), 1000)
+
+class TestJsonRecords(unittest.TestCase):
+    def test_record_carries_request_id(self):
+        record = logging.LogRecord("src.test", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+        token = set_request_id("req-1")
+        try:
+            RequestIdFilter().filter(record)
+        finally:
+            reset_request_id(token)
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry["request_id"], "req-1")
+        self.assertEqual(entry["message"], "hello world")
+        self.assertEqual(entry["level"], "INFO")
+
+class TestSetupLogging(unittest.TestCase):
+    def test_queue_listener_writes_json_file(self):
+        root = logging.getLogger()
+        saved_handlers, saved_level = list(root.handlers), root.level
+        with tempfile.TemporaryDirectory() as log_dir, mock.patch.object(LogConfig, "LOG_DIR", log_dir):
+            try:
+                Logger.setup_logging()
+                Logger.setup_logging()
+                token = set_request_id("abc123")
+                logging.getLogger("src.test").info("queued message")
+                reset_request_id(token)
+                Logger.shutdown()
+                with open(os.path.join(log_dir, "app.log"), encoding="utf-8") as handle:
+                    entries = [json.loads(line) for line in handle]
+            finally:
+                Logger.shutdown()
+                for handler in list(root.handlers):
+                    root.removeHandler(handler)
+                for handler in saved_handlers:
+                    root.addHandler(handler)
+                root.setLevel(saved_level)
+        self.assertEqual(entries[-1]["message"], "queued message")
+        self.assertEqual(entries[-1]["request_id"], "abc123")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+import urllib.request
+from src.utils.metrics import NOOP_SPAN, Metrics, MetricsRegistry, start_metrics_server
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics(enabled=True, registry=MetricsRegistry())
+
+    def test_disabled_spans_are_noops(self):
+        metrics = Metrics(enabled=False, registry=MetricsRegistry())
+        with metrics.span("db_execute") as stage:
+            stage.set("rows", 10)
+        self.assertIs(metrics.span("db_execute"), NOOP_SPAN)
+        self.assertEqual(metrics.registry.render(), "\n")
+
+    def test_span_records_duration_and_attributes(self):
+        for rows in (3, 4):
+            with self.metrics.span("db_execute") as stage:
+                stage.set("rows", rows)
+        histogram = self.metrics.registry.histogram("rsa_stage_duration_seconds", stage="db_execute")
+        self.assertEqual(histogram.count, 2)
+        self.assertEqual(self.metrics.registry.counter("rsa_stage_rows_total", stage="db_execute"), 7)
+
+    def test_errors_are_counted(self):
+        with self.assertRaises(ValueError):
+            with self.metrics.span("sql_parse"):
+                raise ValueError("bad")
+        self.assertEqual(self.metrics.registry.counter("rsa_stage_errors_total", stage="sql_parse"), 1)
+
+    def test_traced_wraps_sync_and_async(self):
+        @self.metrics.traced("prompt_build")
+        def build():
+            return "prompt"
+
+        @self.metrics.traced("llm_generate")
+        async def generate():
+            return "sql"
+
+        self.assertEqual(build(), "prompt")
+        self.assertEqual(asyncio.run(generate()), "sql")
+        registry = self.metrics.registry
+        self.assertEqual(registry.histogram("rsa_stage_duration_seconds", stage="prompt_build").count, 1)
+        self.assertEqual(registry.histogram("rsa_stage_duration_seconds", stage="llm_generate").count, 1)
+
+    def test_prometheus_text(self):
+        self.metrics.registry.observe("rsa_stage_duration_seconds", 0.003, stage="chart_render")
+        text = self.metrics.registry.render()
+        self.assertIn("# TYPE rsa_stage_duration_seconds histogram", text)
+        self.assertIn('rsa_stage_duration_seconds_bucket{stage="chart_render",le="0.0025"} 0', text)
+        self.assertIn('rsa_stage_duration_seconds_bucket{stage="chart_render",le="0.005"} 1', text)
+        self.assertIn('rsa_stage_duration_seconds_bucket{stage="chart_render",le="+Inf"} 1', text)
+        self.assertIn('rsa_stage_duration_seconds_count{stage="chart_render"} 1', text)
+
+    def test_gauges_keep_the_last_value(self):
+        registry = self.metrics.registry
+        registry.set("rsa_llm_queue_depth", 3, priority="batch")
+        registry.set("rsa_llm_queue_depth", 1, priority="batch")
+        self.assertEqual(registry.gauge("rsa_llm_queue_depth", priority="batch"), 1)
+        text = registry.render()
+        self.assertIn("# TYPE rsa_llm_queue_depth gauge", text)
+        self.assertIn('rsa_llm_queue_depth{priority="batch"} 1', text)
+
+    def test_metrics_endpoint(self):
+        with self.metrics.span("schema_fetch"):
+            pass
+        server = start_metrics_server(port=0, host="127.0.0.1", registry=self.metrics.registry)
+        try:
+            port = server.server_address[1]
+            body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+            self.assertIn('rsa_stage_duration_seconds_count{stage="schema_fetch"} 1', body)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+from config.config import AppConfig, LLMConfig
+from src.database.schema_cache import ColumnInfo, SchemaSnapshot, TableInfo
+from src.llm.llm_handler import LLMHandler
+from src.llm.query_cache import QueryCache
+from src.utils.timeline import Timeline
+
+def snapshot(fingerprint: str) -> SchemaSnapshot:
+    tables = {"orders": TableInfo("orders", [ColumnInfo("id", "integer"), ColumnInfo("total", "integer")])}
+    return SchemaSnapshot(tables, fingerprint=fingerprint, version=1, loaded_at=0.0)
+
+class FakeSchemaCache:
+    """Serves ``current`` on validation; ``peek`` returns whatever was validated last (or ``known``)."""
+
+    def __init__(self, known, current, delay: float = 0.0):
+        self.known, self.current, self.delay = known, current, delay
+        self.backend = None
+
+    def peek(self):
+        return self.known
+
+    def get_snapshot(self):
+        time.sleep(self.delay)
+        self.known = self.current
+        return self.current
+
+class FailingSchemaCache(FakeSchemaCache):
+    def get_snapshot(self):
+        raise RuntimeError("db down")
+
+class ChangingSchemaCache(FakeSchemaCache):
+    """Every validation finds a new fingerprint, while ``peek`` still shows the previous one."""
+
+    def __init__(self):
+        super().__init__(snapshot("fp0"), None)
+        self.validations = 0
+
+    def get_snapshot(self):
+        self.validations += 1
+        self.known = snapshot(f"fp{self.validations}")
+        return self.known
+
+class SlowLLM:
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.calls = 0
+
+    async def astream(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        yield "SQL_QUERY_START\nSELECT SUM(total) FROM orders\nSQL_QUERY_END"
+
+
+class TestResolveSql(unittest.TestCase):
+    def setUp(self):
+        no_ping = mock.patch.object(LLMConfig, "KEEP_ALIVE_PING_SECONDS", 0)
+        no_ping.start()
+        self.addCleanup(no_ping.stop)
+        with mock.patch.object(AppConfig, "STARTUP_MODE", "lazy"):
+            self.handler = LLMHandler()
+        self.handler.query_cache = QueryCache(max_entries=16, path="")
+        generator = self.handler.query_generator
+        generator.schema_cache = FakeSchemaCache(snapshot("fp1"), snapshot("fp1"))
+        generator._lookup_semantic_cache = lambda question, fingerprint: None
+        generator.llm = SlowLLM()
+
+    def resolve(self, question: str):
+        timeline = Timeline()
+        sql, source = asyncio.run(self.handler.aresolve_sql(question, timeline))
+        return sql, source, {record.name: record.status for record in timeline.stages}, timeline
+
+    def test_cache_hit_skips_the_model(self):
+        self.handler.query_cache.put(self.handler._cache_key("total sales", "fp1"), "SELECT 1")
+        sql, source, stages, timeline = self.resolve("total sales")
+        self.assertEqual((sql, source), ("SELECT 1", "query_cache"))
+        self.assertEqual(stages["query_cache"], "hit")
+        self.assertNotIn("llm", stages)
+        self.assertNotIn("prompt_build", [record.name for record in timeline.critical_path()])
+        self.assertEqual(self.handler.query_generator.llm.calls, 0)
+
+    def test_semantic_hit_cancels_prompt_building(self):
+        generator = self.handler.query_generator
+        generator._lookup_semantic_cache = lambda question, fingerprint: "SELECT 2"
+        build_prompt = generator.build_prompt
+
+        def slow_build(question, snapshot):
+            time.sleep(0.2)
+            return build_prompt(question, snapshot)
+
+        generator.build_prompt = slow_build
+        sql, source, stages, timeline = self.resolve("total sales")
+        self.assertEqual((sql, source), ("SELECT 2", "semantic_cache"))
+        self.assertEqual(stages["query_cache"], "miss")
+        self.assertEqual(stages["prompt_build"], "cancelled")
+        self.assertEqual(timeline.critical_path()[-1].name, "semantic_cache")
+
+    def test_miss_generates_and_records_the_critical_path(self):
+        sql, source, stages, timeline = self.resolve("total sales")
+        self.assertEqual((sql, source), ("SELECT SUM(total) FROM orders", "llm"))
+        self.assertEqual(stages["llm"], "done")
+        path = [record.name for record in timeline.critical_path()]
+        self.assertEqual(path[-1], "llm")
+        self.assertIn(path[-2], ("prompt_build", "schema", "semantic_cache", "query_cache"))
+
+    def test_speculative_hit_under_an_old_schema_is_dropped(self):
+        self.handler.query_cache.put(self.handler._cache_key("total sales", "fp1"), "SELECT stale")
+        self.handler.query_generator.schema_cache = FakeSchemaCache(snapshot("fp1"), snapshot("fp2"), delay=0.02)
+        sql, source, _, _ = self.resolve("total sales")
+        self.assertEqual((sql, source), ("SELECT SUM(total) FROM orders", "llm"))
+
+    def test_first_request_waits_for_the_schema(self):
+        self.handler.query_generator.schema_cache = FakeSchemaCache(None, snapshot("fp1"))
+        sql, source, stages, _ = self.resolve("total sales")
+        self.assertEqual(source, "llm")
+        self.assertEqual(stages["schema"], "done")
+
+    def test_cache_hit_survives_a_failed_schema_check(self):
+        self.handler.query_cache.put(self.handler._cache_key("total sales", "fp1"), "SELECT 1")
+        self.handler.query_generator.schema_cache = FailingSchemaCache(snapshot("fp1"), None)
+        self.assertEqual(self.resolve("total sales")[:2], ("SELECT 1", "query_cache"))
+
+    def test_failed_schema_check_without_a_hit_is_reported(self):
+        for known in (snapshot("fp1"), None):
+            with self.subTest(known=known):
+                self.handler.query_generator.schema_cache = FailingSchemaCache(known, None)
+                sql, source, _, _ = self.resolve("total sales")
+                self.assertEqual((sql, source), ("Error generating SQL query: db down", "llm"))
+        self.assertEqual(self.handler.query_generator.llm.calls, 0)
+
+    def test_schema_change_reruns_only_once(self):
+        schema_cache = ChangingSchemaCache()
+        self.handler.query_generator.schema_cache = schema_cache
+        sql, source, _, timeline = self.resolve("total sales")
+        self.assertEqual((sql, source), ("SELECT SUM(total) FROM orders", "llm"))
+        self.assertEqual([record.name for record in timeline.stages].count("schema"), 2)
+
+    def test_generations_for_different_schemas_are_not_shared(self):
+        generator = self.handler.query_generator
+        old_schema = FakeSchemaCache(snapshot("fp1"), snapshot("fp1"))
+        new_schema = FakeSchemaCache(snapshot("fp2"), snapshot("fp2"))
+
+        async def main():
+            generator.schema_cache = old_schema
+            first = asyncio.ensure_future(self.handler.aresolve_sql("total sales"))
+            await asyncio.sleep(0.02)  # the first generation is in flight
+            generator.schema_cache = new_schema
+            await asyncio.gather(first, self.handler.aresolve_sql("total sales"))
+
+        asyncio.run(main())
+        self.assertEqual(generator.llm.calls, 2)
+        self.assertEqual(self.handler.in_flight.get_stats()["coalesced"], 0)
+
+    def test_only_one_keep_alive_ping_per_interval(self):
+        generator = self.handler.query_generator
+        with mock.patch.object(LLMConfig, "KEEP_ALIVE_PING_SECONDS", 60):
+            self.assertEqual([generator.keep_alive_due() for _ in range(3)], [True, False, False])
+
+
+class TestTimeline(unittest.TestCase):
+    def test_critical_path_follows_the_stages_that_were_waited_on(self):
+        timeline = Timeline()
+
+        async def sleep(seconds, value=None):
+            await asyncio.sleep(seconds)
+            return value
+
+        async def main():
+            schema = timeline.start("schema", sleep(0.01))
+            cache = timeline.start("cache", sleep(0.03), outcome=lambda result: "hit" if result else "miss")
+            ping = timeline.start("keep_alive", sleep(1))
+            timeline.start("warm_up", sleep(0.035), blocking=False)
+            await asyncio.gather(schema, cache)
+            timeline.cancel(ping)
+            await asyncio.gather(ping, return_exceptions=True)
+            await asyncio.sleep(0.01)
+            with timeline.stage("db_execute") as stage:
+                await asyncio.sleep(0.01)
+                stage.status = "hit"
+
+        asyncio.run(main())
+        statuses = {record.name: record.status for record in timeline.stages}
+        self.assertEqual(statuses, {
+            "schema": "done", "cache": "miss", "keep_alive": "cancelled", "warm_up": "done", "db_execute": "hit"
+        })
+        self.assertEqual([record.name for record in timeline.critical_path()], ["cache", "db_execute"])
+        self.assertIn("critical path: cache > db_execute", timeline.render())
+        self.assertEqual(timeline.as_dict()["critical_path"], ["cache", "db_execute"])
+
+if __name__ == '__main__':
+    unittest.main()
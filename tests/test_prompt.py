@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+from config.config import AppConfig, LLMConfig
+from src.database.schema_cache import ColumnInfo, SchemaSnapshot, TableInfo
+from src.llm.query_generator import QueryGenerator
+
+class FakeExampleStore:
+    def __init__(self):
+        self.calls = []
+
+    def search(self, question, k, fingerprint):
+        self.calls.append((question, k, fingerprint))
+        return [{"question": "total sales by region", "sql": "SELECT r.name FROM region r", "score": 0.9}]
+
+class TestPromptTemplates(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.object(AppConfig, "STARTUP_MODE", "lazy"):
+            self.generator = QueryGenerator({})
+        self.snapshot = SchemaSnapshot(
+            {"region": TableInfo("region", [ColumnInfo("id", "integer"), ColumnInfo("name", "text")])},
+            fingerprint="fp1", version=1, loaded_at=0.0
+        )
+
+    def test_compact_prompt_includes_retrieved_examples(self):
+        store = FakeExampleStore()
+        self.generator._example_store = store
+        self.generator._vector_ready.set()
+        with mock.patch.object(LLMConfig, "FEW_SHOT_K", 2):
+            prompt = self.generator.build_prompt("sales per region", self.snapshot, template="compact")
+        self.assertEqual(store.calls, [("sales per region", 2, "fp1")])
+        self.assertIn("User Query: total sales by region\nSQL_QUERY_START\nSELECT r.name FROM region r", prompt)
+        self.assertTrue(prompt.rstrip().endswith("User Query: sales per region"))
+
+        full = self.generator.build_prompt("sales per region", self.snapshot, template="full")
+        self.assertNotIn("SELECT r.name", full)
+        self.assertLess(len(prompt), len(full))
+
+    def test_compact_prompt_without_examples_while_warming_up(self):
+        prompt = self.generator.build_prompt("sales per region", self.snapshot, template="compact")
+        self.assertNotIn("Examples:", prompt)
+        self.assertIn("region", prompt)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from src.llm.query_cache import QueryCache, normalize_question
+
+class TestNormalizeQuestion(unittest.TestCase):
+    def test_case_whitespace_and_punctuation(self):
+        self.assertEqual(
+            normalize_question("  Show me   total sales, by REGION? "),
+            normalize_question("show me total sales by region")
+        )
+
+    def test_number_canonicalization(self):
+        self.assertEqual(
+            normalize_question("What are the top five sales reps?"),
+            normalize_question("what are the top 5 sales reps")
+        )
+        self.assertEqual(normalize_question("orders over 1,000.0"), "orders over 1000")
+
+class TestQueryCache(unittest.TestCase):
+    def test_key_depends_on_model_and_schema(self):
+        key = QueryCache.make_key("Total sales?", "llama3.1:8b", "fp1")
+        self.assertEqual(key, QueryCache.make_key("total  sales", "llama3.1:8b", "fp1"))
+        self.assertNotEqual(key, QueryCache.make_key("total sales", "other-model", "fp1"))
+        self.assertNotEqual(key, QueryCache.make_key("total sales", "llama3.1:8b", "fp2"))
+
+    def test_memory_lru_bound(self):
+        cache = QueryCache(max_entries=2, path="")
+        cache.put("a", "SELECT 1")
+        cache.put("b", "SELECT 2")
+        cache.get("a")
+        cache.put("c", "SELECT 3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "SELECT 1")
+
+    def test_disk_tier_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite")
+            QueryCache(path=path).put("a", "SELECT 1")
+            warm = QueryCache(path=path)
+            self.assertEqual(warm.get("a"), "SELECT 1")
+            self.assertEqual(warm.get_stats()["disk_hits"], 1)
+            self.assertEqual(warm.get("a"), "SELECT 1")
+            self.assertEqual(warm.get_stats()["memory_hits"], 1)
+            warm._db.close()
+
+if __name__ == '__main__':
+    unittest.main()
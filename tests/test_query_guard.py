@@ -0,0 +1,39 @@
+import unittest
+from src.database.query_guard import QueryGuard, QueryRejectedError
+
+class FakeCursor:
+    def __init__(self, total_cost, plan_rows):
+        self.plan = [{"Plan": {"Total Cost": total_cost, "Plan Rows": plan_rows}}]
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def fetchone(self):
+        return (self.plan,)
+
+class TestQueryGuard(unittest.TestCase):
+    def setUp(self):
+        self.guard = QueryGuard(max_cost=1000, max_rows=100, statement_timeout_ms=500)
+
+    def test_rejects_expensive_plans(self):
+        with self.assertRaises(QueryRejectedError):
+            self.guard.preflight(FakeCursor(5000, 10), "SELECT * FROM orders, web_events", 11)
+
+    def test_adds_limit_to_large_results(self):
+        query, estimate = self.guard.preflight(FakeCursor(10, 1000), "SELECT * FROM orders;", 11)
+        self.assertTrue(query.endswith("LIMIT 11"))
+        self.assertIn("SELECT * FROM orders\n", query)
+        self.assertEqual(estimate.plan_rows, 1000)
+
+    def test_keeps_existing_limit(self):
+        query, _ = self.guard.preflight(FakeCursor(10, 1000), "SELECT * FROM orders LIMIT 50", 11)
+        self.assertEqual(query, "SELECT * FROM orders LIMIT 50")
+
+    def test_timeout_is_transaction_local(self):
+        cur = FakeCursor(0, 0)
+        self.guard.apply_timeout(cur)
+        self.assertEqual(cur.executed, [("SET LOCAL statement_timeout = %s", (500,))])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+from unittest import mock
+from src.database.db_manager import DatabaseManager
+from src.database.query_result import QueryResult
+from src.database.result_cache import (
+    ResultCache, canonicalize_sql, referenced_tables, written_tables
+)
+
+class TestCanonicalizeSql(unittest.TestCase):
+    def test_whitespace_case_and_aliases(self):
+        first = """SELECT r.name, SUM(o.total) FROM orders o
+                   JOIN region r ON r.id = o.region_id GROUP BY r.name;"""
+        second = "select reg.name, sum(ord.total) from ORDERS as ord join region reg " \
+                 "on reg.id = ord.region_id -- comment\n group by reg.name"
+        self.assertEqual(canonicalize_sql(first), canonicalize_sql(second))
+
+    def test_string_literals_keep_case(self):
+        self.assertNotEqual(
+            canonicalize_sql("SELECT * FROM web_events WHERE channel = 'Direct'"),
+            canonicalize_sql("SELECT * FROM web_events WHERE channel = 'direct'")
+        )
+
+class TestTableParsing(unittest.TestCase):
+    def test_referenced_tables_skip_ctes_and_function_from(self):
+        sql = """WITH monthly AS (SELECT * FROM orders)
+                 SELECT EXTRACT(YEAR FROM m.occurred_at) FROM monthly m, accounts a
+                 WHERE a.id IN (SELECT account_id FROM web_events)"""
+        self.assertEqual(referenced_tables(sql), {"orders", "accounts", "web_events"})
+
+    def test_written_tables(self):
+        self.assertEqual(
+            written_tables("INSERT INTO orders VALUES (1); DELETE FROM public.region"),
+            {"orders", "region"}
+        )
+        self.assertEqual(written_tables("WITH d AS (DELETE FROM orders RETURNING *) SELECT * FROM d"), {"orders"})
+        self.assertEqual(written_tables('UPDATE public."Orders" SET total = 0'), {"orders"})
+
+    def test_reads_write_nothing(self):
+        for sql in (
+            "SELECT o.id FROM orders o WHERE o.note = 'please update accounts soon'",
+            "-- delete from accounts\nSELECT * FROM accounts",
+            "SELECT * FROM orders o FOR UPDATE OF orders",
+            "SELECT copy FROM web_events",
+        ):
+            with self.subTest(sql=sql):
+                self.assertEqual(written_tables(sql), set())
+
+    def test_quoted_names_match_invalidation(self):
+        self.assertEqual(referenced_tables('SELECT * FROM "Orders"'), {"orders"})
+        cache = ResultCache(ttl_seconds=60, max_bytes=1_000_000)
+        cache.put("k", 'SELECT * FROM "Orders"', QueryResult(columns=["a"], rows=[(1,)], column_types=["numeric"]))
+        self.assertEqual(cache.invalidate_table("Orders"), 1)
+
+class TestResultCache(unittest.TestCase):
+    def result(self, rows=1):
+        return QueryResult(columns=["a"], rows=[(i,) for i in range(rows)], column_types=["numeric"])
+
+    def test_hit_and_table_invalidation(self):
+        cache = ResultCache(ttl_seconds=60, max_bytes=1_000_000)
+        orders_sql = "SELECT * FROM orders o"
+        region_sql = "SELECT * FROM region"
+        cache.put(ResultCache.make_key(orders_sql), orders_sql, self.result())
+        cache.put(ResultCache.make_key(region_sql), region_sql, self.result())
+        self.assertIsNotNone(cache.get(ResultCache.make_key("select * from ORDERS x")))
+        self.assertEqual(cache.invalidate_table("orders"), 1)
+        self.assertIsNone(cache.get(ResultCache.make_key(orders_sql)))
+        self.assertIsNotNone(cache.get(ResultCache.make_key(region_sql)))
+
+    def test_ttl_expiry(self):
+        cache = ResultCache(ttl_seconds=0, max_bytes=1_000_000)
+        cache.put("k", "SELECT 1", self.result())
+        self.assertIsNone(cache.get("k"))
+
+    def test_byte_bound_evicts_oldest(self):
+        size = self.result(10).estimated_bytes()
+        cache = ResultCache(ttl_seconds=60, max_bytes=size * 2)
+        for key in ("a", "b", "c"):
+            cache.put(key, "SELECT * FROM orders", self.result(10))
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertLessEqual(cache.get_stats()["bytes"], size * 2)
+
+class FakeBackend:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, max_rows, handle=None):
+        self.executed.append(sql)
+        return QueryResult(columns=["id"], rows=[(1,)], column_types=["numeric"])
+
+class TestDatabaseManagerCaching(unittest.TestCase):
+    def test_writable_cte_invalidates_instead_of_caching(self):
+        backend = FakeBackend()
+        manager = DatabaseManager(backend=backend)
+        read_sql = "SELECT * FROM orders"
+        read_key = ResultCache.make_key(read_sql, manager.config.MAX_RESULT_ROWS)
+        manager.result_cache.put(read_key, read_sql, backend.execute(read_sql, 10))
+        delete_sql = "WITH d AS (DELETE FROM orders RETURNING *) SELECT * FROM d"
+        with mock.patch.object(manager.rollups, "source_written") as source_written:
+            manager.execute_query_columnar(delete_sql)
+            self.assertIsNone(manager.cached_result(delete_sql))
+            manager.execute_query_columnar(delete_sql)
+        self.assertEqual(backend.executed.count(delete_sql), 2)
+        self.assertIsNone(manager.cached_result(read_sql))
+        source_written.assert_called_with("orders")
+
+if __name__ == '__main__':
+    unittest.main()
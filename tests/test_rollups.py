@@ -0,0 +1,173 @@
+import unittest
+from src.database.backends import DuckDBBackend
+from src.database.db_manager import DatabaseManager
+from src.database.rollups import STATE_TABLE, RollupManager
+from src.database.schema_cache import SchemaCache
+
+JOINED = (
+    "FROM orders o JOIN accounts a ON o.account_id = a.id JOIN sales_reps s ON a.sales_rep_id = s.id "
+    "JOIN region r ON s.region_id = r.id "
+)
+
+REWRITABLE = [
+    "SELECT r.name, SUM(o.total_amt_usd) AS revenue " + JOINED + "GROUP BY r.name",
+    "SELECT s.name, COUNT(*) AS n FROM orders o JOIN accounts a ON o.account_id = a.id "
+    "JOIN sales_reps s ON a.sales_rep_id = s.id GROUP BY s.name",
+    "SELECT DATE_TRUNC('month', occurred_at) AS month, SUM(total) FROM orders "
+    "WHERE occurred_at >= '2016-01-01' AND occurred_at < '2017-01-01' GROUP BY month",
+    "SELECT EXTRACT(YEAR FROM o.occurred_at) AS year, COUNT(o.id) FROM orders o GROUP BY 1",
+    "SELECT SUM(gloss_qty) FROM orders",
+    "SELECT COUNT(DISTINCT r.id) " + JOINED,
+    "SELECT w.channel, COUNT(*) FROM web_events w GROUP BY w.channel",
+]
+
+NOT_REWRITABLE = [
+    "SELECT o.total FROM orders o",
+    "SELECT AVG(total) FROM orders",
+    "SELECT MAX(total_amt_usd) FROM orders",
+    "SELECT COUNT(*) FROM orders WHERE occurred_at > '2016-01-01'",
+    "SELECT DATE_TRUNC('day', occurred_at), COUNT(*) FROM orders GROUP BY 1",
+    "SELECT a.name, SUM(o.total) FROM orders o JOIN accounts a ON o.account_id = a.id GROUP BY a.name",
+    "SELECT r.name, SUM(o.total) FROM orders o LEFT JOIN accounts a ON o.account_id = a.id "
+    "LEFT JOIN sales_reps s ON a.sales_rep_id = s.id LEFT JOIN region r ON s.region_id = r.id GROUP BY r.name",
+    "SELECT DATE_TRUNC('quarter', occurred_at) AS month, COUNT(*) FROM orders GROUP BY month",
+    "SELECT COUNT(*) FROM orders WHERE account_id IN (SELECT id FROM accounts)",
+]
+
+def normalized(result):
+    rows = (tuple(float(v) if isinstance(v, (int, float)) else str(v) for v in row) for row in result.rows)
+    return sorted(rows, key=repr)
+
+
+class TestRollups(unittest.TestCase):
+    def setUp(self):
+        self.backend = DuckDBBackend(":memory:", statement_timeout_ms=0)
+        conn = self.backend.connect()
+        conn.execute("CREATE TABLE region (id integer, name varchar)")
+        conn.execute("CREATE TABLE sales_reps (id integer, name varchar, region_id integer)")
+        conn.execute("CREATE TABLE accounts (id integer, name varchar, sales_rep_id integer)")
+        conn.execute(
+            "CREATE TABLE orders (id integer, account_id integer, occurred_at timestamp, standard_qty integer, "
+            "gloss_qty integer, poster_qty integer, total integer, standard_amt_usd numeric(10,2), "
+            "gloss_amt_usd numeric(10,2), poster_amt_usd numeric(10,2), total_amt_usd numeric(10,2))"
+        )
+        conn.execute("CREATE TABLE web_events (id integer, account_id integer, occurred_at timestamp, channel varchar)")
+        conn.execute("INSERT INTO region VALUES (1, 'Northeast'), (2, 'West')")
+        # Rep 12 points at a missing region and account 4 has no rep: inner joins drop their rows.
+        conn.execute("INSERT INTO sales_reps VALUES (10, 'Ann', 1), (11, 'Bo', 2), (12, 'Cy', 99)")
+        conn.execute("INSERT INTO accounts VALUES (1, 'Acme', 10), (2, 'Bolt', 11), (3, 'Core', 12), (4, 'Dyn', NULL)")
+        self._insert_orders(conn, 1, 40)
+        conn.execute(
+            "INSERT INTO web_events SELECT i, i % 4 + 1, TIMESTAMP '2015-11-20' + i * INTERVAL '5 days', "
+            "CASE WHEN i % 3 = 0 THEN 'direct' ELSE 'facebook' END FROM range(1, 31) t(i)"
+        )
+        conn.close()
+        self.rollups = RollupManager(self.backend, check_seconds=0, rewrite=True)
+
+    @staticmethod
+    def _insert_orders(conn, first: int, last: int, start: str = "2015-12-10"):
+        conn.execute(
+            f"INSERT INTO orders SELECT i, i % 4 + 1, TIMESTAMP '{start}' + i * INTERVAL '9 days', i, i % 5, 2, "
+            f"i + i % 5 + 2, i * 4.99, (i % 5) * 7.49, 16.24, i * 4.99 + (i % 5) * 7.49 + 16.24 "
+            f"FROM range({first}, {last + 1}) t(i)"
+        )
+
+    def _execute(self, sql):
+        return self.backend.execute(sql, max_rows=10000)
+
+    def test_rewritten_queries_match_raw_results(self):
+        self.rollups.refresh()
+        for sql in REWRITABLE:
+            with self.subTest(sql=sql):
+                rewritten, rollup = self.rollups.route(sql)
+                self.assertIsNotNone(rollup)
+                self.assertIn(rollup, rewritten)
+                self.assertEqual(normalized(self._execute(rewritten)), normalized(self._execute(sql)))
+
+    def test_counts_over_no_matching_rows_are_zero(self):
+        self.rollups.refresh()
+        for sql in (
+            "SELECT COUNT(*) AS n FROM orders o WHERE EXTRACT(YEAR FROM o.occurred_at) = 2030",
+            "SELECT COUNT(*) AS n FROM orders o JOIN accounts a ON o.account_id = a.id "
+            "JOIN sales_reps s ON a.sales_rep_id = s.id WHERE s.name = 'Nobody'",
+            "SELECT COUNT(o.id), SUM(o.total) FROM orders o WHERE EXTRACT(YEAR FROM o.occurred_at) = 2030",
+        ):
+            with self.subTest(sql=sql):
+                rewritten, rollup = self.rollups.route(sql)
+                self.assertIsNotNone(rollup)
+                self.assertEqual(self._execute(rewritten).rows, self._execute(sql).rows)
+                self.assertEqual(self._execute(rewritten).rows[0][0], 0)
+
+    def test_ineligible_queries_run_as_written(self):
+        self.rollups.refresh()
+        for sql in NOT_REWRITABLE:
+            with self.subTest(sql=sql):
+                self.assertEqual(self.rollups.route(sql), (sql, None))
+
+    def test_bare_columns_keep_their_names(self):
+        self.rollups.refresh()
+        rewritten, _ = self.rollups.route(REWRITABLE[0])
+        self.assertEqual(self._execute(rewritten).columns, ["name", "revenue"])
+
+    def test_nothing_is_rewritten_before_rollups_are_built(self):
+        self.assertEqual(self.rollups.route(REWRITABLE[0]), (REWRITABLE[0], None))
+        self.assertFalse(RollupManager(self.backend, rewrite=False).route(REWRITABLE[0])[1])
+
+    def test_incremental_refresh_matches_full_rebuild(self):
+        self.rollups.refresh()
+        conn = self.backend.connect()
+        self._insert_orders(conn, 41, 50, start="2016-01-01")
+        conn.close()
+        report = self.rollups.refresh(names=["rollup_orders_monthly"])["rollup_orders_monthly"]
+        self.assertEqual(report["mode"], "incremental")
+        self.assertEqual(report["source_max_id"], 50)
+        incremental = normalized(self._execute("SELECT * FROM rollup_orders_monthly"))
+        self.assertEqual(self.rollups.refresh(full=True)["rollup_orders_monthly"]["mode"], "full")
+        self.assertEqual(incremental, normalized(self._execute("SELECT * FROM rollup_orders_monthly")))
+        self.assertEqual(self.rollups.refresh()["rollup_orders_monthly"]["mode"], "unchanged")
+
+    def _answer_while_refresh_is_blocked(self, manager, sql):
+        # Holding the refresh lock proves the query does not wait for maintenance.
+        with self.rollups._refresh_lock:
+            manager.result_cache.clear()
+            result = manager.execute_query(sql)
+        thread = self.rollups._refresh_thread
+        if thread is not None:
+            thread.join(timeout=10)
+        return result
+
+    def test_stale_rollups_are_refreshed_off_the_request_path(self):
+        manager = DatabaseManager(backend=self.backend)
+        manager.rollups = self.rollups
+        manager.refresh_rollups()
+        sql = "SELECT SUM(total) FROM orders"
+        before = manager.execute_query(sql)
+        self.assertEqual(self.rollups.stats["rewrites"], 1)
+        conn = self.backend.connect()
+        self._insert_orders(conn, 41, 45)
+        conn.close()
+        # Behind its source: the query runs on the raw table while the rollup catches up.
+        self.assertEqual(self._answer_while_refresh_is_blocked(manager, sql), self.backend.execute(sql, 10).to_dicts())
+        self.assertEqual(self.rollups.stats["rewrites"], 1)
+        manager.result_cache.clear()
+        self.assertEqual(manager.execute_query(sql), self.backend.execute(sql, 10).to_dicts())
+        self.assertNotEqual(manager.execute_query(sql), before)
+        self.assertEqual(self.rollups.stats["rewrites"], 2)
+        # An in-process UPDATE is not visible to the id watermark, so the rollup is rebuilt.
+        manager.execute_query("UPDATE orders SET total = total + 1000 WHERE id = 3")
+        self.assertEqual(self._answer_while_refresh_is_blocked(manager, sql), self.backend.execute(sql, 10).to_dicts())
+        manager.result_cache.clear()
+        self.assertEqual(manager.execute_query(sql), self.backend.execute(sql, 10).to_dicts())
+        self.assertEqual(self.rollups.stats["rewrites"], 3)
+        self.assertEqual(self.rollups.get_stats()["stale"], [])
+
+    def test_schema_describes_rollups_and_hides_state(self):
+        self.rollups.refresh()
+        snapshot = SchemaCache({}, ttl_seconds=0, backend=self.backend).get_snapshot()
+        self.assertNotIn(STATE_TABLE, snapshot.tables)
+        text = snapshot.to_prompt_text(["rollup_orders_monthly"])
+        self.assertIn("Table: rollup_orders_monthly\nNote: Pre-aggregated orders", text)
+        self.assertIsNone(snapshot.tables["orders"].description)
+
+if __name__ == '__main__':
+    unittest.main()
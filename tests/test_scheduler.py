@@ -0,0 +1,192 @@
+import asyncio
+import threading
+import time
+import unittest
+from src.llm.scheduler import LLMScheduler, SingleFlight, llm_priority, set_llm_priority
+
+class TestLLMScheduler(unittest.TestCase):
+    def test_concurrency_is_bounded(self):
+        scheduler = LLMScheduler(limit=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with scheduler.aslot():
+                peak = max(peak, scheduler.get_stats()["active"])
+                await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(*(call() for _ in range(8)))
+
+        asyncio.run(main())
+        stats = scheduler.get_stats()
+        self.assertEqual(peak, 2)
+        self.assertEqual(stats["calls"], 8)
+        self.assertEqual(stats["queued"], 6)
+        self.assertEqual(stats["active"], 0)
+        self.assertEqual(stats["depth"], {"interactive": 0, "batch": 0})
+
+    def test_interactive_calls_overtake_queued_batch_calls(self):
+        scheduler = LLMScheduler(limit=1)
+        order = []
+
+        async def call(name, priority):
+            if priority == "batch":
+                set_llm_priority("batch")
+            async with scheduler.aslot():
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        async def main():
+            first = asyncio.create_task(call("first", "interactive"))
+            await asyncio.sleep(0)
+            batch = [asyncio.create_task(call(f"batch{i}", "batch")) for i in range(3)]
+            await asyncio.sleep(0)
+            interactive = asyncio.create_task(call("user", "interactive"))
+            await asyncio.gather(first, interactive, *batch)
+
+        asyncio.run(main())
+        self.assertEqual(order, ["first", "user", "batch0", "batch1", "batch2"])
+
+    def test_cancelled_waiter_gives_up_its_place(self):
+        scheduler = LLMScheduler(limit=1)
+
+        async def hold(seconds):
+            async with scheduler.aslot():
+                await asyncio.sleep(seconds)
+
+        async def main():
+            holder = asyncio.create_task(hold(0.02))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(hold(0))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(holder, waiter, return_exceptions=True)
+            await asyncio.wait_for(hold(0), timeout=1)
+
+        asyncio.run(main())
+        self.assertEqual(scheduler.get_stats()["active"], 0)
+
+    def test_sync_callers_share_the_same_slots(self):
+        scheduler = LLMScheduler(limit=1)
+        inside = []
+
+        def call():
+            with scheduler.slot():
+                inside.append(1)
+                self.assertEqual(len(inside), 1)
+                time.sleep(0.005)
+                inside.pop()
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(scheduler.get_stats()["queued"], 3)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_run(self):
+        flight = SingleFlight()
+        runs = 0
+
+        async def generate():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return "SELECT 1"
+
+        async def main():
+            return await asyncio.gather(*(flight.run("same question", generate) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(main()), ["SELECT 1"] * 5)
+        self.assertEqual(runs, 1)
+        self.assertEqual(flight.get_stats(), {"leaders": 1, "coalesced": 4})
+        # Once finished, the next call runs again rather than reusing a stale result.
+        asyncio.run(main())
+        self.assertEqual(runs, 2)
+
+    def test_interactive_callers_do_not_join_batch_flights(self):
+        flight = SingleFlight()
+        priorities = []
+
+        async def generate():
+            priorities.append(llm_priority.get())
+            await asyncio.sleep(0.01)
+            return "SELECT 1"
+
+        async def ask(priority):
+            set_llm_priority(priority)
+            return await flight.run("q", generate)
+
+        async def main():
+            return await asyncio.gather(ask("batch"), ask("interactive"), ask("interactive"))
+
+        self.assertEqual(asyncio.run(main()), ["SELECT 1"] * 3)
+        self.assertEqual(sorted(priorities), ["batch", "interactive"])
+        self.assertEqual(flight.get_stats(), {"leaders": 2, "coalesced": 1})
+
+    def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("model unavailable")
+
+        async def main():
+            return await asyncio.gather(*(flight.run("q", fail) for _ in range(3)), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in asyncio.run(main())))
+
+    def test_cancelling_one_caller_leaves_the_others(self):
+        flight = SingleFlight()
+        cancelled = []
+
+        async def generate():
+            try:
+                await asyncio.sleep(0.02)
+                return "SELECT 1"
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def main():
+            first = asyncio.create_task(flight.run("q", generate))
+            second = asyncio.create_task(flight.run("q", generate))
+            await asyncio.sleep(0.005)
+            first.cancel()
+            result = await second
+            # With every caller gone the shared run is cancelled too.
+            third = asyncio.create_task(flight.run("q2", generate))
+            await asyncio.sleep(0.005)
+            third.cancel()
+            await asyncio.gather(third, return_exceptions=True)
+            await asyncio.sleep(0)
+            return result, first.cancelled()
+
+        self.assertEqual(asyncio.run(main()), ("SELECT 1", True))
+        self.assertEqual(cancelled, [True])
+
+    def test_threads_share_one_call(self):
+        flight = SingleFlight()
+        runs = []
+        results = []
+
+        def generate():
+            runs.append(1)
+            time.sleep(0.05)
+            return "SELECT 1"
+
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do("q", generate))) for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["SELECT 1"] * 4)
+        self.assertEqual(len(runs), 1)
+
+if __name__ == '__main__':
+    unittest.main()
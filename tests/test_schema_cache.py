@@ -0,0 +1,84 @@
+import unittest
+from src.database.schema_cache import SchemaCache
+
+class FakeBackend:
+    def __init__(self):
+        self.fingerprint = "abc"
+        self.rows = [
+            ("accounts", "id", "integer", True, None, None),
+            ("orders", "account_id", "integer", False, "accounts", "id"),
+        ]
+        self.queries = []
+
+    def schema_fingerprint(self):
+        self.queries.append("fingerprint")
+        return self.fingerprint
+
+    def schema_rows(self):
+        self.queries.append("introspection")
+        return self.rows
+
+class TestSchemaCache(unittest.TestCase):
+    def setUp(self):
+        self.conn = FakeBackend()
+        self.cache = SchemaCache({}, ttl_seconds=0, backend=self.conn)
+
+    def test_snapshot_model_and_prompt_text(self):
+        snapshot = self.cache.get_snapshot()
+        self.assertEqual(list(snapshot.tables), ["accounts", "orders"])
+        text = snapshot.to_prompt_text()
+        self.assertIn("  - id integer NOT NULL\n", text)
+        self.assertIn("account_id integer (FK -> accounts.id)", text)
+
+    def test_unchanged_fingerprint_skips_introspection(self):
+        first = self.cache.get_snapshot()
+        second = self.cache.get_snapshot()
+        self.assertIs(first, second)
+        self.assertEqual(self.cache.stats["refreshes"], 1)
+        self.assertEqual(self.cache.stats["fingerprint_checks"], 2)
+
+    def test_changed_fingerprint_refreshes(self):
+        first = self.cache.get_snapshot()
+        self.conn.fingerprint = "def"
+        second = self.cache.get_snapshot()
+        self.assertEqual(second.version, first.version + 1)
+        self.assertEqual(self.cache.stats["refreshes"], 2)
+
+    def test_ttl_serves_hits_without_queries(self):
+        self.cache.ttl_seconds = 60
+        self.cache.get_snapshot()
+        query_count = len(self.conn.queries)
+        for _ in range(5):
+            self.cache.get_snapshot()
+        self.assertEqual(len(self.conn.queries), query_count)
+        self.assertEqual(self.cache.stats["hits"], 5)
+
+class TestSchemaSnapshot(unittest.TestCase):
+    def setUp(self):
+        conn = FakeBackend()
+        conn.rows = [
+            ("accounts", "id", "integer", False, None, None),
+            ("accounts", "sales_rep_id", "integer", False, None, None),
+            ("orders", "account_id", "integer", False, None, None),
+            ("region", "id", "integer", False, None, None),
+            ("sales_reps", "region_id", "integer", False, None, None),
+            ("web_events", "channel", "character varying", False, None, None),
+        ]
+        cache = SchemaCache({}, ttl_seconds=0, backend=conn)
+        self.snapshot = cache.get_snapshot()
+
+    def test_naming_convention_foreign_keys(self):
+        self.assertEqual(self.snapshot.foreign_keys("orders"), [("account_id", "accounts")])
+        self.assertEqual(self.snapshot.foreign_keys("sales_reps"), [("region_id", "region")])
+
+    def test_neighbours_in_both_directions(self):
+        self.assertEqual(self.snapshot.neighbours("accounts"), {"orders", "sales_reps"})
+        self.assertEqual(self.snapshot.neighbours("web_events"), set())
+
+    def test_prompt_text_for_subset(self):
+        text = self.snapshot.to_prompt_text(["orders"])
+        self.assertIn("Table: orders", text)
+        self.assertNotIn("Table: accounts", text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from types import SimpleNamespace
+from src.llm.semantic_cache import SemanticCache
+
+class FakeVectorStore:
+    """Scores 1.0 for an identical question and 0.5 for anything else."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def add_texts(self, texts, metadatas, ids):
+        for text, metadata, doc_id in zip(texts, metadatas, ids):
+            self.docs[doc_id] = (text, metadata)
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+
+    def get(self, include):
+        return {"ids": list(self.docs), "metadatas": [metadata for _, metadata in self.docs.values()]}
+
+    def similarity_search_with_relevance_scores(self, query, k, filter):
+        matches = [
+            (SimpleNamespace(page_content=text, metadata=metadata), 1.0 if text == query else 0.5)
+            for text, metadata in self.docs.values()
+            if metadata["schema_fingerprint"] == filter["schema_fingerprint"]
+        ]
+        return sorted(matches, key=lambda match: -match[1])[:k]
+
+class TestSemanticCache(unittest.TestCase):
+    def setUp(self):
+        self.store = FakeVectorStore()
+        self.cache = SemanticCache(self.store, threshold=0.9, max_entries=2)
+
+    def test_hit_above_threshold(self):
+        self.cache.store("total sales by region", "SELECT 1", "fp1")
+        self.assertEqual(self.cache.lookup("total sales by region", "fp1"), "SELECT 1")
+        self.assertIsNone(self.cache.lookup("top sales reps", "fp1"))
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_lru_eviction(self):
+        self.cache.store("a", "SELECT 'a'", "fp1")
+        self.cache.store("b", "SELECT 'b'", "fp1")
+        self.cache.lookup("a", "fp1")
+        self.cache.store("c", "SELECT 'c'", "fp1")
+        self.assertEqual(self.cache.lookup("a", "fp1"), "SELECT 'a'")
+        self.assertIsNone(self.cache.lookup("b", "fp1"))
+        self.assertEqual(len(self.store.docs), 2)
+
+    def test_schema_change_invalidates(self):
+        self.cache.store("a", "SELECT 'a'", "fp1")
+        self.assertIsNone(self.cache.lookup("a", "fp2"))
+        self.assertEqual(self.store.docs, {})
+        self.assertEqual(self.cache.get_stats()["invalidations"], 1)
+
+    def test_restore_from_persisted_store(self):
+        self.cache.store("a", "SELECT 'a'", "fp1")
+        self.cache.store("b", "SELECT 'b'", "fp1")
+        restarted = SemanticCache(self.store, threshold=0.9, max_entries=1)
+        self.assertEqual(restarted.restore(), 1)
+        self.assertEqual(restarted.lookup("b", "fp1"), "SELECT 'b'")
+        self.assertEqual(len(self.store.docs), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+from unittest import mock
+from config.config import AppConfig, LLMConfig
+from src.database.schema_cache import ColumnInfo, SchemaSnapshot, TableInfo
+from src.llm.query_generator import QueryGenerator
+from src.llm.sql_validator import extract_sql, validate_sql
+
+SNAPSHOT = SchemaSnapshot(
+    {
+        "orders": TableInfo("orders", [ColumnInfo("id", "integer"), ColumnInfo("account_id", "integer"),
+                                       ColumnInfo("total_amt_usd", "numeric")]),
+        "accounts": TableInfo("accounts", [ColumnInfo("id", "integer"), ColumnInfo("name", "text")]),
+    },
+    fingerprint="fp1", version=1, loaded_at=0.0
+)
+
+class TestExtractSql(unittest.TestCase):
+    def test_keeps_join_and_limit_lines_and_drops_prose(self):
+        response = (
+            "Analysis: join orders to accounts.\nSQL_QUERY_START\n```sql\n"
+            "SELECT a.name, SUM(o.total_amt_usd) AS spend\nFROM orders o\n"
+            "JOIN accounts a ON a.id = o.account_id\nGROUP BY a.name\nORDER BY spend DESC\nLIMIT 5;\n```\n"
+            "This ranks accounts by spend.\nSQL_QUERY_END"
+        )
+        self.assertEqual(
+            extract_sql(response),
+            "SELECT a.name, SUM(o.total_amt_usd) AS spend\nFROM orders o\n"
+            "JOIN accounts a ON a.id = o.account_id\nGROUP BY a.name\nORDER BY spend DESC\nLIMIT 5"
+        )
+
+    def test_without_markers(self):
+        response = "Sure:\nWITH t AS (SELECT 1 AS x)\nSELECT t.x FROM t\nHope this helps; ask again!"
+        self.assertEqual(extract_sql(response), "WITH t AS (SELECT 1 AS x)\nSELECT t.x FROM t")
+        self.assertIsNone(extract_sql("I cannot answer that."))
+
+    def test_truncated_queries_are_kept_whole(self):
+        for sql in (
+            "SELECT o.id FROM orders o\nWHERE o.total_amt_usd > 100\n  AND o.account_id =",
+            "SELECT o.id FROM orders o\nORDER BY o.id DESC\nLIMIT",
+        ):
+            with self.subTest(sql=sql):
+                self.assertEqual(extract_sql(f"SQL_QUERY_START\n{sql}\nSQL_QUERY_END"), sql)
+                self.assertEqual(extract_sql(sql), sql)
+                self.assertTrue(validate_sql(extract_sql(sql), SNAPSHOT)[0].startswith("Syntax error"))
+
+    def test_prose_after_the_query_is_dropped(self):
+        response = "SELECT COUNT(*) FROM orders\nNote: this counts every order.\nThis query returns 5 rows."
+        self.assertEqual(extract_sql(response), "SELECT COUNT(*) FROM orders")
+
+class TestValidateSql(unittest.TestCase):
+    def test_valid_query(self):
+        sql = ("SELECT a.name, SUM(o.total_amt_usd) AS spend FROM orders o JOIN accounts a ON a.id = o.account_id "
+               "GROUP BY a.name ORDER BY spend DESC")
+        self.assertEqual(validate_sql(sql, SNAPSHOT), [])
+
+    def test_unknown_names(self):
+        self.assertIn("Unknown column o.amount", validate_sql("SELECT o.amount FROM orders o", SNAPSHOT)[0])
+        self.assertIn("Unknown table items", validate_sql("SELECT i.id FROM items i", SNAPSHOT)[0])
+        self.assertIn("Unknown table alias x", validate_sql("SELECT x.id FROM orders o", SNAPSHOT)[0])
+        self.assertIn("Unknown column nme", validate_sql("SELECT nme FROM accounts", SNAPSHOT)[0])
+
+    def test_statement_checks(self):
+        self.assertTrue(validate_sql("SELECT FROM WHERE", SNAPSHOT)[0].startswith("Syntax error"))
+        self.assertIn("Only SELECT", validate_sql("DELETE FROM orders", SNAPSHOT)[0])
+        self.assertIn("exactly one", validate_sql("SELECT 1; SELECT 2", SNAPSHOT)[0])
+
+    def test_derived_tables_are_left_to_the_database(self):
+        sql = "WITH t AS (SELECT account_id, COUNT(*) AS n FROM orders GROUP BY account_id) SELECT t.n, whatever FROM t"
+        self.assertEqual(validate_sql(sql, SNAPSHOT), [])
+
+class ScriptedLLM:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def stream(self, prompt):
+        self.prompts.append(prompt)
+        yield self.responses.pop(0)
+
+class TestRepairLoop(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.object(AppConfig, "STARTUP_MODE", "lazy"):
+            self.generator = QueryGenerator({})
+        self.generator.schema_cache.get_snapshot = lambda: SNAPSHOT
+        self.generator._lookup_semantic_cache = lambda question, fingerprint: None
+
+    def test_local_problem_is_fed_back(self):
+        self.generator.llm = ScriptedLLM([
+            "SQL_QUERY_START\nSELECT o.amount FROM orders o\nSQL_QUERY_END",
+            "SQL_QUERY_START\nSELECT SUM(o.total_amt_usd) FROM orders o\nSQL_QUERY_END",
+        ])
+        self.assertEqual(self.generator.generate_sql_query("total sales"), "SELECT SUM(o.total_amt_usd) FROM orders o")
+        self.assertIn("Unknown column o.amount", self.generator.llm.prompts[1])
+        self.assertIn("SELECT o.amount FROM orders o", self.generator.llm.prompts[1])
+
+    def test_repairs_are_bounded(self):
+        bad = "SQL_QUERY_START\nSELECT o.amount FROM orders o\nSQL_QUERY_END"
+        self.generator.llm = ScriptedLLM([bad] * 5)
+        with mock.patch.object(LLMConfig, "SQL_REPAIR_ATTEMPTS", 2):
+            self.assertEqual(self.generator.generate_sql_query("total sales"), "SELECT o.amount FROM orders o")
+        self.assertEqual(len(self.generator.llm.prompts), 3)
+
+    def test_truncated_query_is_repaired(self):
+        self.generator.llm = ScriptedLLM([
+            "SQL_QUERY_START\nSELECT o.id FROM orders o\nWHERE o.total_amt_usd > 100\n  AND o.account_id =\nSQL_QUERY_END",
+            "SQL_QUERY_START\nSELECT o.id FROM orders o\nWHERE o.total_amt_usd > 100\n  AND o.account_id = 1\nSQL_QUERY_END",
+        ])
+        self.assertTrue(self.generator.generate_sql_query("big orders for account 1").endswith("o.account_id = 1"))
+        self.assertIn("Syntax error", self.generator.llm.prompts[1])
+
+    def test_refusal_is_not_repaired(self):
+        self.generator.llm = ScriptedLLM(["ERROR_START\nNo such data\nERROR_END"])
+        self.assertEqual(self.generator.generate_sql_query("weather"), "Unable to generate query: No such data")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+from config.config import AppConfig
+from src.llm.llm_handler import LLMHandler
+from src.llm.query_generator import QueryGenerator
+from src.utils.startup import StartupTimer
+
+class TestStartupTimer(unittest.TestCase):
+    def test_report_lists_phases_in_order(self):
+        timer = StartupTimer()
+        with timer.phase("import gradio"):
+            pass
+        timer.record("load embedding model", 1.5)
+        lines = timer.report().splitlines()
+        self.assertIn("| import gradio", lines[1])
+        self.assertIn("1500.0", lines[2])
+        self.assertIn("total since process start", lines[-1])
+
+class TestLazyQueryGenerator(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.object(AppConfig, "STARTUP_MODE", "lazy"):
+            self.generator = QueryGenerator({})
+
+    def test_constructor_does_not_load_embeddings(self):
+        self.assertFalse(self.generator.vector_components_ready)
+        self.assertIsNone(self.generator._semantic_cache)
+        self.assertIsNone(self.generator._warm_up_thread)
+
+    def test_cold_lookup_misses_and_starts_warm_up_once(self):
+        with mock.patch.object(QueryGenerator, "_warm_up_and_report") as warm_up:
+            self.assertIsNone(self.generator._lookup_semantic_cache("total sales", "fp"))
+            self.assertIsNone(self.generator._lookup_semantic_cache("total sales", "fp"))
+            self.generator._warm_up_thread.join(timeout=5)
+        warm_up.assert_called_once()
+
+    def test_cold_record_success_does_not_block(self):
+        with mock.patch.object(QueryGenerator, "_load_vector_components") as load:
+            with self.assertLogs(level="DEBUG") as logs:
+                self.generator.record_success("total sales", "SELECT 1")
+        load.assert_not_called()
+        self.assertIn("not caching successful query for: total sales", logs.output[-1])
+
+    def test_cache_stats_do_not_load_embeddings(self):
+        with mock.patch.object(AppConfig, "STARTUP_MODE", "lazy"):
+            handler = LLMHandler()
+        with mock.patch.object(QueryGenerator, "_load_vector_components") as load:
+            self.assertEqual(handler.get_cache_stats()["semantic"], {})
+        load.assert_not_called()
+
+    def test_heavy_modules_not_imported(self):
+        # A fresh interpreter, since other test modules import the vector stack themselves.
+        script = (
+            "import sys\n"
+            "from src.llm.query_generator import QueryGenerator\n"
+            "QueryGenerator({})\n"
+            "print(','.join(m for m in ('langchain_huggingface', 'chromadb') if m in sys.modules))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+            env={**os.environ, "STARTUP_MODE": "lazy"}
+        )
+        self.assertEqual(result.stdout.strip(), "")
+
+if __name__ == '__main__':
+    unittest.main()
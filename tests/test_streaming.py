@@ -0,0 +1,34 @@
+import unittest
+from src.llm.streaming import MarkerScanner
+
+class TestMarkerScanner(unittest.TestCase):
+    def feed_all(self, chunks):
+        scanner = MarkerScanner()
+        consumed = 0
+        for chunk in chunks:
+            consumed += 1
+            if scanner.feed(chunk):
+                break
+        return scanner, consumed
+
+    def test_stops_at_sql_end_marker(self):
+        chunks = ["SQL_QUERY_START\nSELECT 1\n", "SQL_QUERY_END", "\nAnalysis:", " lots more"]
+        scanner, consumed = self.feed_all(chunks)
+        self.assertEqual(consumed, 2)
+        self.assertTrue(scanner.stopped_early)
+        self.assertTrue(scanner.text.endswith("SQL_QUERY_END"))
+
+    def test_marker_split_across_chunks(self):
+        chunks = ["ERROR_START\nno table\nERR", "OR_", "END trailing", "never read"]
+        scanner, consumed = self.feed_all(chunks)
+        self.assertEqual(consumed, 3)
+        self.assertEqual(scanner.text, "ERROR_START\nno table\nERROR_END")
+
+    def test_no_marker_reads_everything(self):
+        scanner, consumed = self.feed_all(["SELECT 1 ", "FROM region"])
+        self.assertEqual(consumed, 2)
+        self.assertFalse(scanner.stopped_early)
+        self.assertEqual(scanner.text, "SELECT 1 FROM region")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import chromadb  # noqa: F401
+    from langchain_chroma import Chroma
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    HAVE_CHROMA = True
+except ImportError:
+    HAVE_CHROMA = False
+
+from src.database.schema_cache import ColumnInfo, SchemaSnapshot, TableInfo
+
+if HAVE_CHROMA:
+    from src.llm.example_store import ExampleStore
+    from src.llm.schema_retriever import SchemaRetriever
+    from src.llm.vector_index import open_client, sync_collection
+
+    class CountingEmbedding(DeterministicFakeEmbedding):
+        embedded: list = []
+
+        def embed_documents(self, texts):
+            self.embedded.extend(texts)
+            return super().embed_documents(texts)
+
+@unittest.skipUnless(HAVE_CHROMA, "chromadb/langchain-chroma not installed")
+class TestVectorIndex(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.embeddings = CountingEmbedding(size=16)
+        self.embeddings.embedded = []
+
+    def tearDown(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def store(self, name="test_items"):
+        return Chroma(embedding_function=self.embeddings, client=open_client(self.path), collection_name=name)
+
+    def test_sync_embeds_only_changed_items(self):
+        items = {f"id{i}": (f"text {i}", {"n": i}) for i in range(5)}
+        self.assertEqual(sync_collection(self.store(), items, batch_size=2), {"embedded": 5, "unchanged": 0, "deleted": 0})
+
+        items["id1"] = ("text one", {"n": 1})
+        del items["id4"]
+        self.embeddings.embedded = []
+        stats = sync_collection(self.store(), items, batch_size=2)
+        self.assertEqual(stats, {"embedded": 1, "unchanged": 3, "deleted": 1})
+        self.assertEqual(self.embeddings.embedded, ["text one"])
+        self.assertEqual(sorted(self.store().get()["ids"]), ["id0", "id1", "id2", "id3"])
+
+        self.assertEqual(sync_collection(self.store(), items, force=True)["embedded"], 4)
+
+    def test_schema_index_survives_restart(self):
+        snapshot = SchemaSnapshot(
+            {
+                "orders": TableInfo("orders", [ColumnInfo("id", "integer"), ColumnInfo("account_id", "integer")]),
+                "accounts": TableInfo("accounts", [ColumnInfo("id", "integer"), ColumnInfo("name", "text")]),
+            },
+            fingerprint="fp1",
+            version=1,
+            loaded_at=0.0
+        )
+        SchemaRetriever(self.embeddings, open_client(self.path), top_k=1).index(snapshot)
+        self.embeddings.embedded = []
+        restarted = SchemaRetriever(self.embeddings, open_client(self.path), top_k=1)
+        self.assertEqual(restarted.index(snapshot), {"embedded": 0, "unchanged": 2, "deleted": 0})
+        self.assertEqual(self.embeddings.embedded, [])
+
+    def test_example_store_search(self):
+        examples_path = os.path.join(self.path, "examples.jsonl")
+        with open(examples_path, "w", encoding="utf-8") as handle:
+            for question, sql in [("total sales by region", "SELECT 1"), ("orders per year", "SELECT 2")]:
+                handle.write(json.dumps({"question": question, "sql": sql}) + "\n")
+
+        store = ExampleStore(self.embeddings, open_client(self.path), path=examples_path)
+        self.assertEqual(store.index()["embedded"], 2)
+        self.assertEqual(store.index()["embedded"], 0)
+        results = store.search("orders per year", k=1)
+        self.assertEqual([(result["question"], result["sql"]) for result in results], [("orders per year", "SELECT 2")])
+        self.assertEqual(len(store.search("anything", k=5)), 2)
+
+    def test_learned_examples(self):
+        store = ExampleStore(self.embeddings, open_client(self.path), path="", max_learned=2)
+        store.index([{"question": "total sales by region", "sql": "SELECT 1"}])
+        self.assertTrue(store.add("orders per year", "SELECT 2", "fp1"))
+        self.assertFalse(store.add("Orders per year?", "SELECT 2", "fp1"))
+        self.assertFalse(store.add("total sales by region", "SELECT 3", "fp1"))
+        store.add("orders per month", "SELECT 4", "fp1")
+        store.add("web events per channel", "SELECT 5", "fp2")
+        self.assertEqual(len(store), 3)  # one curated + the two newest learned pairs
+
+        found = {result["sql"] for result in store.search("orders", k=5, fingerprint="fp1")}
+        self.assertEqual(found, {"SELECT 1", "SELECT 4"})
+        # Re-indexing the curated file leaves learned pairs alone.
+        self.assertEqual(store.index([])["deleted"], 1)
+        self.assertEqual(len(store), 2)
+
+if __name__ == '__main__':
+    unittest.main()